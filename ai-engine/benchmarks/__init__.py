@@ -0,0 +1,6 @@
+"""
+Benchmarks
+Offline performance checks for the AI engine
+
+Run from the ai-engine directory, e.g. `python -m benchmarks.bench_concurrency`
+"""
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Anchoring Benchmark - Batched Merkle anchoring vs. one anchor per document
+
+Certifies random SHA-256 digests through blockchain.anchor_service with a
+LocalChain ledger and SQLite store in a temporary directory:
+
+- per-document: batch size 1 (one ledger append + one SQLite commit each)
+- batched: ANCHOR_BATCH_SIZE-leaf Merkle batches, up to --documents total
+
+Then measures receipt lookup from the store and verification cost (proof
+plus ledger check), and checks that tampered and forged receipts fail.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import report
+from blockchain import anchor_service, merkle
+from core import executor
+
+async def certify_all(service: anchor_service.AnchorService, count: int, wave: int) -> float:
+    start = time.perf_counter()
+    done = 0
+    while done < count:
+        size = min(wave, count - done)
+        futures = [service.submit(os.urandom(32)) for _ in range(size)]
+        await service.flush()
+        await asyncio.gather(*futures)
+        done += size
+    return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=1_000_000)
+    parser.add_argument('--baseline', type=int, default=2000, help='Documents for the per-document run')
+    parser.add_argument('--batch-size', type=int, default=anchor_service.BATCH_SIZE)
+    parser.add_argument('--lookups', type=int, default=10000)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        single = anchor_service.AnchorService(
+            anchor_service.AnchorStore(os.path.join(tmp, 'single.sqlite3')),
+            anchor_service.LocalChain(os.path.join(tmp, 'single.ledger')),
+            batch_size=1
+        )
+        seconds = await certify_all(single, args.baseline, 1)
+        results = {'per_document': {'seconds': seconds, 'throughput': args.baseline / seconds}}
+        print(f"per-document: {args.baseline:>9,} docs {seconds:>7.2f} s {args.baseline / seconds:>10,.0f} docs/s")
+        
+        batched = anchor_service.AnchorService(
+            anchor_service.AnchorStore(os.path.join(tmp, 'batched.sqlite3')),
+            anchor_service.LocalChain(os.path.join(tmp, 'batched.ledger')),
+            batch_size=args.batch_size
+        )
+        seconds = await certify_all(batched, args.documents, args.batch_size * 16)
+        stats = batched.stats()
+        results['batched'] = {'seconds': seconds, 'throughput': args.documents / seconds, 'batches': stats['batches']}
+        print(f"batched:      {args.documents:>9,} docs {seconds:>7.2f} s {args.documents / seconds:>10,.0f} docs/s "
+              f"({stats['batches']} batches of {args.batch_size})")
+        
+        # Lookups of hashes anchored earlier (known ones, read back from the store)
+        rows = batched.store._conn.execute(
+            'SELECT content_hash FROM leaves ORDER BY RANDOM() LIMIT ?', (args.lookups,)
+        ).fetchall()
+        hashes = [row[0] for row in rows]
+        start = time.perf_counter()
+        receipts = [batched.store.find(h) for h in hashes]
+        lookup = (time.perf_counter() - start) / len(hashes)
+        
+        start = time.perf_counter()
+        valid = sum(anchor_service.verify_receipt(r, batched.chain) for r in receipts)
+        verify = (time.perf_counter() - start) / len(receipts)
+        
+        tampered = dict(receipts[0], content_hash=os.urandom(32).hex())
+        # A one-leaf tree of its own: a valid proof, but a root never anchored
+        forged_hash = os.urandom(32)
+        forged = dict(receipts[0], content_hash=forged_hash.hex(),
+                      merkle_root=merkle.leaf_hash(forged_hash).hex(), proof=[])
+        assert valid == len(receipts)
+        assert not anchor_service.verify_receipt(tampered, batched.chain)
+        assert not anchor_service.verify_receipt(forged, batched.chain)
+        
+        steps = sum(len(r['proof']) for r in receipts) / len(receipts)
+        size_mb = os.path.getsize(os.path.join(tmp, 'batched.sqlite3')) / 1e6
+        print(f"lookup (index + proof slices): {lookup * 1e6:.1f} us")
+        print(f"verify_receipt: {verify * 1e6:.1f} us ({steps:.1f} hashes per proof)")
+        print(f"store size: {size_mb:.0f} MB ({size_mb * 1e6 / args.documents:.0f} bytes/doc)")
+        results.update(lookup_us=lookup * 1e6, verify_us=verify * 1e6, proof_hashes=steps, store_mb=size_mb)
+    
+    executor.shutdown()
+    report.write(args.json, 'anchor', args, results)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Audio Metrics Benchmark - analyze_audio on multi-hour recordings
+
+Writes synthetic 16 kHz speech-like WAVs of several hours to disk (one
+minute at a time) and runs, each in its own process so peak RSS is
+comparable:
+
+- naive: read the file and convert every sample to float64 at once
+- bytes: voice_processor.analyze_audio on the file contents
+- path:  voice_processor.analyze_audio on the path (memory-mapped)
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from benchmarks import report
+from benchmarks.report import peak_rss_mb
+from voice_processing import voice_processor
+
+RATE = 16000
+
+def write_wav(path: str, hours: float, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        for _ in range(int(hours * 60)):
+            minute = np.zeros(60 * RATE, dtype=np.float32)
+            position = 0
+            while position < len(minute):
+                burst = int(rng.uniform(2, 8) * RATE)
+                end = min(position + burst, len(minute))
+                t = np.arange(end - position, dtype=np.float32) / RATE
+                minute[position:end] = np.sin(2 * np.pi * 180 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)) * 8000
+                position = end + int(rng.uniform(0.2, 1.0) * RATE)
+            minute += rng.normal(0, 100, len(minute)).astype(np.float32)
+            wav.writeframes(minute.astype('<i2').tobytes())
+
+def naive(path: str):
+    with open(path, 'rb') as f:
+        data = f.read()
+    info = voice_processor.read_wav(data)
+    x = np.frombuffer(data, dtype='<i2', offset=info['data_offset']).astype(np.float64) / 32767
+    return {'rms': float(np.sqrt(np.mean(x ** 2))), 'peak': float(np.abs(x).max())}
+
+def child(mode: str, path: str):
+    start = time.perf_counter()
+    if mode == 'naive':
+        naive(path)
+    elif mode == 'bytes':
+        with open(path, 'rb') as f:
+            asyncio.run(voice_processor.analyze_audio(f.read()))
+    else:
+        asyncio.run(voice_processor.analyze_audio(path))
+    print(f"{time.perf_counter() - start:.3f} {peak_rss_mb():.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--mode', choices=['naive', 'bytes', 'path'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    if args.mode:
+        child(args.mode, args.path)
+        return
+    
+    results = {}
+    print(f"{'hours':>6} {'file MB':>8} {'mode':>6} {'seconds':>8} {'x realtime':>11} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for hours in args.hours:
+            path = os.path.join(tmp, f"audio-{hours}h.wav")
+            write_wav(path, hours)
+            size_mb = os.path.getsize(path) / 1e6
+            for mode in ('naive', 'bytes', 'path'):
+                out = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_audio_metrics', '--mode', mode, '--path', path],
+                    capture_output=True, text=True, check=True
+                ).stdout.split()
+                seconds, peak = float(out[0]), float(out[1])
+                print(f"{hours:>6g} {size_mb:>8.0f} {mode:>6} {seconds:>8.2f} "
+                      f"{hours * 3600 / seconds:>10.0f}x {peak:>12.1f}")
+                results.setdefault(f'{hours:g}_hours', {})[mode] = {'seconds': seconds, 'peak_rss_mb': peak}
+            os.remove(path)
+    report.write(args.json, 'audio_metrics', args, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Batch Load Test - /api/batch vs one HTTP call per item
+
+Drives the FastAPI app in-process through httpx's ASGI transport with a
+fake fixed-latency model, and the response cache and translation memory
+disabled, so the only savings measured are request fan-out and in-batch
+de-duplication. Model calls are counted for every mode.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks import report
+from benchmarks.fake_backend import FakeModel
+from core import executor, model_registry, response_cache, translation_memory
+
+OPERATIONS = [
+    ('auto_fix', lambda text: {'text': text}),
+    ('translate', lambda text: {'text': text, 'target_language': 'Spanish'}),
+    ('adjust_tone', lambda text: {'text': text, 'tone': 'formal'}),
+]
+
+def make_items(count: int, duplicate_ratio: float, seed: int = 3):
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        if items and rng.random() < duplicate_ratio:
+            items.append(rng.choice(items))
+            continue
+        operation, params = rng.choice(OPERATIONS)
+        items.append({'operation': operation, 'params': params(f"Product description number {i}.")})
+    return items
+
+async def per_item(client: httpx.AsyncClient, items, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def post(item):
+        async with semaphore:
+            response = await client.post('/api/batch', json={'items': [item]})
+            response.raise_for_status()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(post(item) for item in items))
+    return time.perf_counter() - start
+
+async def batched(client: httpx.AsyncClient, items, stream: bool) -> float:
+    start = time.perf_counter()
+    response = await client.post('/api/batch', json={'items': items, 'stream': stream})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--duplicates', type=float, default=0.2, help='Share of repeated items')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    model = FakeModel(latency=args.latency, reply="Corrected text.")
+    model_registry.set_factory(lambda name, config: model)
+    response_cache.cache.enabled = False
+    # Segment prompts would need numbered replies; one call per translate item
+    translation_memory.memory.enabled = False
+    
+    from main import app
+    items = make_items(args.items, args.duplicates)
+    transport = httpx.ASGITransport(app=app)
+    modes = [
+        ('per_item_sequential', 'per-item, sequential', lambda client: per_item(client, items, 1)),
+        ('per_item_concurrent', 'per-item, 8 in flight', lambda client: per_item(client, items, 8)),
+        ('batch', 'batch', lambda client: batched(client, items, False)),
+        ('batch_stream', 'batch, NDJSON stream', lambda client: batched(client, items, True)),
+    ]
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        for key, _, run in modes:
+            model.calls = 0
+            seconds = await run(client)
+            results[key] = {'seconds': seconds, 'throughput': args.items / seconds, 'model_calls': model.calls}
+    
+    print(f"{args.items} items, {args.latency * 1000:.0f} ms model latency, {args.duplicates:.0%} duplicates")
+    print(f"{'mode':<24} {'seconds':>8} {'items/s':>9} {'model calls':>12}")
+    for key, label, _ in modes:
+        r = results[key]
+        print(f"{label:<24} {r['seconds']:>8.2f} {r['throughput']:>9.1f} {r['model_calls']:>12}")
+    report.write(args.json, 'batch', args, results)
+    
+    executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
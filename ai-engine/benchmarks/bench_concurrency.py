@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Concurrency Benchmark - Throughput of model calls vs in-flight requests
+
+Compares calling the blocking SDK method directly inside a coroutine
+(the old behaviour) with core.executor.generate_content.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks import report
+from benchmarks.fake_backend import FakeModel
+from core import executor
+
+async def _blocking_call(model: FakeModel, prompt: str):
+    return model.generate_content(prompt)
+
+async def _executor_call(model: FakeModel, prompt: str):
+    return await executor.generate_content(model, prompt)
+
+async def run(call, model: FakeModel, in_flight: int, total: int) -> float:
+    """Run `total` calls with `in_flight` concurrent workers, return req/s"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(f"prompt {i}")
+    
+    async def worker():
+        while not queue.empty():
+            prompt = queue.get_nowait()
+            await call(model, prompt)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(in_flight)))
+    return total / (time.perf_counter() - start)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake model latency in seconds')
+    parser.add_argument('--total', type=int, default=64, help='Requests per measurement')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    model = FakeModel(latency=args.latency)
+    
+    results = {}
+    print(f"{'in-flight':>10} {'blocking req/s':>16} {'executor req/s':>16}")
+    for in_flight in (1, 2, 4, 8, 16, 32):
+        blocking = await run(_blocking_call, model, in_flight, args.total)
+        offloaded = await run(_executor_call, model, in_flight, args.total)
+        print(f"{in_flight:>10} {blocking:>16.1f} {offloaded:>16.1f}")
+        results[f'in_flight_{in_flight}'] = {'throughput_blocking': blocking, 'throughput_executor': offloaded}
+    report.write(args.json, 'concurrency', args, results)
+    
+    executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Hashing Benchmark - Whole-content hashing vs. chunked streaming hashes
+
+Hashes --size-mb of content (default 1 GB) three ways, each in a fresh
+subprocess so its peak RSS is its own:
+
+- file:   read the whole file vs. blockchain.content_hash.hash_file
+- text:   sha256(text.encode()) vs. hash_content(text) (the text itself
+          is resident either way; 'input MB' is RSS after building it)
+- stream: join an async byte stream vs. hash_stream
+
+Then compares sha256, blake2b (and blake3 if installed) throughput on the
+streaming file path.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import pathlib
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from blockchain import content_hash
+from . import report
+from .report import peak_rss_mb
+
+MB = 1024 * 1024
+
+async def fake_upload(size: int, chunk: int = 64 * 1024):
+    """Async byte stream shaped like an upload body"""
+    block = random.Random(0).randbytes(chunk)
+    sent = 0
+    while sent < size:
+        n = min(chunk, size - sent)
+        yield block[:n] if n < chunk else block
+        sent += n
+        await asyncio.sleep(0)
+
+async def run(kind: str, mode: str, path: str, size: int, algorithm: str) -> str:
+    if kind == 'text':
+        text = 'a' * size
+    input_mb = peak_rss_mb()
+    start = time.perf_counter()
+    if kind == 'file' and mode == 'whole':
+        with open(path, 'rb') as f:
+            digest = hashlib.new(algorithm, f.read()).hexdigest()
+    elif kind == 'file':
+        digest = (await content_hash.hash_file(pathlib.Path(path), algorithm))['digest'].hex()
+    elif kind == 'text' and mode == 'whole':
+        digest = hashlib.new(algorithm, text.encode()).hexdigest()
+    elif kind == 'text':
+        digest = (await content_hash.hash_content(text, algorithm))['digest'].hex()
+    elif mode == 'whole':
+        body = b''.join([chunk async for chunk in fake_upload(size)])
+        digest = hashlib.new(algorithm, body).hexdigest()
+    else:
+        digest = (await content_hash.hash_stream(fake_upload(size), algorithm))['digest'].hex()
+    seconds = time.perf_counter() - start
+    return f"{seconds:.3f} {input_mb:.1f} {peak_rss_mb():.1f} {digest}"
+
+def child(args) -> str:
+    return subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_hashing', '--kind', args[0], '--mode', args[1],
+         '--path', args[2], '--size-mb', str(args[3]), '--algorithm', args[4]],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--kind', choices=['file', 'text', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=['whole', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    parser.add_argument('--algorithm', default='sha256', help=argparse.SUPPRESS)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    size = args.size_mb * MB
+    
+    if args.kind:
+        print(asyncio.run(run(args.kind, args.mode, args.path, size, args.algorithm)))
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'content.bin')
+        with open(path, 'wb') as f:
+            block = os.urandom(MB)
+            for _ in range(args.size_mb):
+                f.write(block)
+        
+        results = {'sha256': {}, 'algorithms': {}}
+        print(f"{args.size_mb} MB input, sha256, chunk {content_hash.CHUNK_SIZE // 1024} KiB")
+        print(f"{'input':>7} {'mode':>7} {'seconds':>8} {'MB/s':>7} {'input MB':>9} {'peak RSS MB':>12}")
+        for kind in ('file', 'text', 'stream'):
+            digests = set()
+            for mode in ('whole', 'stream'):
+                seconds, input_mb, peak, digest = child((kind, mode, path, args.size_mb, 'sha256'))
+                digests.add(digest)
+                print(f"{kind:>7} {mode:>7} {float(seconds):>8.2f} {args.size_mb / float(seconds):>7.0f} "
+                      f"{float(input_mb):>9.1f} {float(peak):>12.1f}")
+                results['sha256'][f'{kind}_{mode}'] = {
+                    'seconds': float(seconds), 'input_mb': float(input_mb), 'peak_rss_mb': float(peak)
+                }
+            assert len(digests) == 1, f"{kind}: digests differ"
+        
+        print()
+        print(f"{'algorithm':>9} {'seconds':>8} {'MB/s':>7} {'peak RSS MB':>12}")
+        for algorithm in content_hash.algorithms():
+            seconds, _, peak, _ = child(('file', 'stream', path, args.size_mb, algorithm))
+            print(f"{algorithm:>9} {float(seconds):>8.2f} {args.size_mb / float(seconds):>7.0f} {float(peak):>12.1f}")
+            results['algorithms'][algorithm] = {'seconds': float(seconds), 'peak_rss_mb': float(peak)}
+    report.write(args.json, 'hashing', args, results)
+
+if __name__ == "__main__":
+    main()
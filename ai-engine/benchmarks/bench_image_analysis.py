@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Image Analysis Benchmark - describe + detect + scene on the same upload
+
+Each image is requested through all three legacy functions at once, as
+clients do. With use_cache=False every function makes its own vision
+call (the previous behavior); with the combined analysis one call serves
+all three. Reports model calls, image bytes uploaded and wall time.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import time
+from typing import Any
+
+from PIL import Image
+
+from benchmarks import report
+from benchmarks.fake_backend import FakeModel, FakeResponse
+from core import executor, model_registry
+from visual_ai import image_analyzer, image_preprocessor
+
+REPLY = json.dumps({
+    'description': 'A red square on a white background.',
+    'objects': ['square'],
+    'scene': {'scene_type': 'graphic', 'main_subjects': ['square'],
+              'composition_quality': 'simple', 'lighting': 'flat', 'mood': 'neutral'}
+})
+
+class UploadCountingModel(FakeModel):
+    """FakeModel that also counts image bytes sent"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.image_bytes = 0
+    
+    def generate_content(self, contents: Any, **kwargs) -> FakeResponse:
+        self.image_bytes += sum(len(part['data']) for part in contents if isinstance(part, dict))
+        return super().generate_content(contents, **kwargs)
+
+def make_images(count: int):
+    images = []
+    for i in range(count):
+        image = Image.effect_noise((64, 48), 50 + i).resize((2400, 1800), Image.BICUBIC).convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+async def run(model: UploadCountingModel, images, use_cache: bool):
+    model.calls = model.image_bytes = 0
+    image_analyzer.clear()
+    image_preprocessor.clear()
+    start = time.perf_counter()
+    for data in images:
+        await asyncio.gather(
+            image_analyzer.describe_image(data, use_cache=use_cache),
+            image_analyzer.detect_objects(data, use_cache=use_cache),
+            image_analyzer.analyze_scene(data, use_cache=use_cache)
+        )
+    return time.perf_counter() - start, model.calls, model.image_bytes
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    model = UploadCountingModel(latency=args.latency, reply=REPLY)
+    model_registry.set_factory(lambda name, config: model)
+    images = make_images(args.images)
+    
+    results = {}
+    print(f"{'mode':<10} {'calls':>6} {'upload KB':>10} {'seconds':>8}")
+    for label, use_cache in (('separate', False), ('combined', True)):
+        seconds, calls, uploaded = await run(model, images, use_cache)
+        print(f"{label:<10} {calls:>6} {uploaded / 1024:>10.0f} {seconds:>8.2f}")
+        results[label] = {'model_calls': calls, 'upload_mb': uploaded / (1024 * 1024), 'seconds': seconds}
+    report.write(args.json, 'image_analysis', args, results)
+    
+    executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Image Preprocessing Benchmark - Bytes and latency saved per image
+
+Compares what the SDK did with Image.open() output before (decode at
+full resolution, re-encode in the original format) with
+visual_ai.image_preprocessor. Pass --corpus DIR to use local images;
+otherwise synthetic 12MP phone-style JPEGs are generated.
+"""
+
+import argparse
+import io
+import os
+import time
+from typing import List, Tuple
+
+from PIL import Image
+
+from benchmarks import report
+from visual_ai import image_preprocessor
+
+def synthetic_corpus(count: int) -> List[Tuple[str, bytes]]:
+    corpus = []
+    for i in range(count):
+        # Smooth blobs plus light sensor noise: compresses like a photo
+        blobs = Image.effect_noise((80, 60), 60 + i * 10).resize((4000, 3000), Image.BICUBIC)
+        grain = Image.effect_noise((4000, 3000), 6)
+        gradient = Image.linear_gradient('L').resize((4000, 3000))
+        image = Image.merge('RGB', (
+            Image.blend(blobs, grain, 0.5),
+            Image.blend(gradient, grain, 0.3),
+            blobs.transpose(Image.FLIP_LEFT_RIGHT)
+        ))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 CW, as phones write
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=92, exif=exif)
+        corpus.append((f"synthetic-{i}.jpg", buffer.getvalue()))
+    return corpus
+
+def load_corpus(path: str) -> List[Tuple[str, bytes]]:
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.tif', '.tiff')):
+            with open(os.path.join(path, name), 'rb') as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+def legacy(image_data: bytes) -> bytes:
+    image = Image.open(io.BytesIO(image_data))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image.format)
+    return buffer.getvalue()
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--corpus', help='Directory of images')
+    parser.add_argument('--count', type=int, default=5, help='Synthetic images to generate')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.count)
+    
+    print(f"{'image':<20} {'upload KB':>10} {'legacy KB':>10} {'legacy ms':>10} "
+          f"{'vision KB':>10} {'vision ms':>10} {'ocr KB':>8} {'ocr ms':>8}")
+    totals = [0.0] * 7
+    for name, data in corpus:
+        old, old_ms = timed(legacy, data)
+        vision, vision_ms = timed(image_preprocessor._prepare, data, 'vision')
+        ocr, ocr_ms = timed(image_preprocessor._prepare, data, 'ocr')
+        row = [len(data) / 1024, len(old) / 1024, old_ms,
+               len(vision['data']) / 1024, vision_ms, len(ocr['data']) / 1024, ocr_ms]
+        totals = [t + r for t, r in zip(totals, row)]
+        print(f"{name[:20]:<20} {row[0]:>10.0f} {row[1]:>10.0f} {row[2]:>10.1f} "
+              f"{row[3]:>10.0f} {row[4]:>10.1f} {row[5]:>8.0f} {row[6]:>8.1f}")
+    
+    n = len(corpus)
+    print(f"\nPer image: vision saves {(totals[1] - totals[3]) / n:.0f} KB and "
+          f"{(totals[2] - totals[4]) / n:.1f} ms; OCR saves {(totals[1] - totals[5]) / n:.0f} KB "
+          f"and {(totals[2] - totals[6]) / n:.1f} ms vs. the legacy path")
+    # Per-image means; sizes in MB so compare tracks them
+    names = ('upload_mb', 'legacy_mb', 'legacy_ms', 'vision_mb', 'vision_ms', 'ocr_mb', 'ocr_ms')
+    report.write(args.json, 'image_preprocess', args, {
+        name: total / n / (1024 if name.endswith('_mb') else 1) for name, total in zip(names, totals)
+    })
+
+if __name__ == "__main__":
+    main()
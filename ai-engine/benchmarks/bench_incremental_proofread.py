@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Incremental Proofreading Benchmark - Simulated typing session
+
+A 5,000-word document is edited one sentence at a time; after each edit
+the document is proofread either in full (check_all) or incrementally
+(check_incremental). The fake model's latency grows with prompt size,
+and the response cache is disabled so only the paragraph diff helps.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks import report
+from benchmarks.bench_summarize_long import make_document
+from benchmarks.fake_backend import FakeModel
+from core import executor, model_registry, response_cache
+from neural_networks import proofreader_api
+
+REPLY = json.dumps({
+    'findings': [{'category': 'style', 'type': 'wordiness', 'text': 'system',
+                  'correction': 'platform', 'explanation': 'clearer'}],
+    'overall_quality_score': 85
+})
+
+def edit_session(text: str, edits: int, seed: int = 11):
+    """Yield successive versions of text, each changing one sentence"""
+    rng = random.Random(seed)
+    paragraphs = text.split('\n\n')
+    for step in range(edits):
+        i = rng.randrange(len(paragraphs))
+        sentences = paragraphs[i].split('. ')
+        j = rng.randrange(len(sentences))
+        sentences[j] = f"{sentences[j]} edited {step}"
+        paragraphs[i] = '. '.join(sentences)
+        yield '\n\n'.join(paragraphs)
+
+async def run(model: FakeModel, versions, incremental: bool):
+    model.calls = model.prompt_chars = 0
+    latencies = []
+    for text in versions:
+        start = time.perf_counter()
+        if incremental:
+            await proofreader_api.check_incremental('bench-doc', text)
+        else:
+            await proofreader_api.check_all(text, use_cache=False)
+        latencies.append(time.perf_counter() - start)
+    return latencies, model.calls, model.prompt_chars
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--edits', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--per-token', type=float, default=2e-5)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    model = FakeModel(latency=args.latency, reply=REPLY, per_token_latency=args.per_token)
+    model_registry.set_factory(lambda name, config: model)
+    response_cache.cache.enabled = False
+    
+    document = make_document(args.words)
+    versions = list(edit_session(document, args.edits))
+    
+    # Initial full check so the incremental run starts from a checked version
+    await proofreader_api.check_incremental('bench-doc', document)
+    
+    print(f"{args.words}-word document, {args.edits} single-sentence edits")
+    results = {}
+    print(f"{'mode':<12} {'mean ms':>9} {'p95 ms':>8} {'calls':>6} {'prompt tokens':>14}")
+    for label, incremental in (('full', False), ('incremental', True)):
+        latencies, calls, chars = await run(model, versions, incremental)
+        latencies.sort()
+        mean = sum(latencies) / len(latencies) * 1e3
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1e3
+        print(f"{label:<12} {mean:>9.1f} {p95:>8.1f} {calls:>6} {chars // 4:>14}")
+        results[label] = {'mean_ms': mean, 'p95_ms': p95, 'model_calls': calls, 'prompt_tokens': chars // 4}
+    report.write(args.json, 'incremental_proofread', args, results)
+    
+    executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Language ID Benchmark - Accuracy, fallback rate and speed of local detection
+
+Runs neural_networks.language_id over a labelled sample that is not part
+of its training data: a few sentences per Latin-script language (down to
+two-word phrases), some per language identified by script, and texts in
+unsupported languages or with no language at all, which should fall back
+to the model. The unsupported ones include close neighbours of supported
+languages (Danish, Catalan, Malay, ...) and languages sharing a script
+with one (Serbian, Bulgarian, Marathi, kanji-only Japanese).
+
+Reports per language how many texts were answered locally at
+--min-confidence and how many of those were right, then the time per
+detection one text at a time and in batches of --batch.
+"""
+
+import argparse
+import time
+
+from benchmarks import report
+from neural_networks import language_id
+
+# (expected code or None for "should go to the model", text)
+SAMPLE = [
+    ('en', "The committee will publish its final report at the end of next month."),
+    ('en', "We need more volunteers for the weekend, especially people who can drive."),
+    ('en', "My brother forgot his keys again, so he had to wait outside for an hour."),
+    ('en', "Please remember to save your work before closing the application."),
+    ('en', "How much does it cost?"),
+    ('en', "Thanks a lot!"),
+    ('es', "El comité publicará su informe final a finales del mes que viene."),
+    ('es', "Necesitamos más voluntarios para el fin de semana, sobre todo personas que sepan conducir."),
+    ('es', "Mi hermano volvió a olvidar las llaves y tuvo que esperar fuera una hora."),
+    ('es', "Por favor, recuerda guardar tu trabajo antes de cerrar la aplicación."),
+    ('es', "¿Cuánto cuesta?"),
+    ('es', "Muchas gracias."),
+    ('fr', "Le comité publiera son rapport final à la fin du mois prochain."),
+    ('fr', "Nous avons besoin de plus de bénévoles pour le week-end, surtout des personnes qui savent conduire."),
+    ('fr', "Mon frère a encore oublié ses clés, alors il a dû attendre dehors pendant une heure."),
+    ('fr', "N'oubliez pas d'enregistrer votre travail avant de fermer l'application."),
+    ('fr', "Combien ça coûte ?"),
+    ('fr', "Merci beaucoup !"),
+    ('de', "Der Ausschuss wird seinen Abschlussbericht Ende nächsten Monats veröffentlichen."),
+    ('de', "Wir brauchen mehr Freiwillige für das Wochenende, vor allem Leute, die Auto fahren können."),
+    ('de', "Mein Bruder hat schon wieder seine Schlüssel vergessen und musste eine Stunde draußen warten."),
+    ('de', "Bitte denken Sie daran, Ihre Arbeit zu speichern, bevor Sie die Anwendung schließen."),
+    ('de', "Wie viel kostet das?"),
+    ('de', "Vielen Dank!"),
+    ('de', "Danke schön, bis morgen"),
+    ('it', "Il comitato pubblicherà la sua relazione finale alla fine del mese prossimo."),
+    ('it', "Abbiamo bisogno di più volontari per il fine settimana, soprattutto persone che sappiano guidare."),
+    ('it', "Mio fratello ha dimenticato di nuovo le chiavi e ha dovuto aspettare fuori per un'ora."),
+    ('it', "Ricordati di salvare il tuo lavoro prima di chiudere l'applicazione."),
+    ('it', "Quanto costa?"),
+    ('it', "Grazie mille!"),
+    ('pt', "O comitê vai publicar o relatório final no fim do mês que vem."),
+    ('pt', "Precisamos de mais voluntários para o fim de semana, principalmente pessoas que saibam dirigir."),
+    ('pt', "Meu irmão esqueceu as chaves de novo e teve que esperar do lado de fora por uma hora."),
+    ('pt', "Por favor, lembre-se de salvar o seu trabalho antes de fechar o aplicativo."),
+    ('pt', "Quanto custa?"),
+    ('pt', "Muito obrigado!"),
+    ('pl', "Komisja opublikuje swój raport końcowy pod koniec przyszłego miesiąca."),
+    ('pl', "Potrzebujemy więcej wolontariuszy na weekend, zwłaszcza osób, które potrafią prowadzić samochód."),
+    ('pl', "Mój brat znowu zapomniał kluczy i musiał czekać na zewnątrz przez godzinę."),
+    ('pl', "Pamiętaj, aby zapisać swoją pracę przed zamknięciem aplikacji."),
+    ('pl', "Ile to kosztuje?"),
+    ('pl', "Dziękuję bardzo!"),
+    ('nl', "De commissie publiceert haar eindrapport aan het einde van volgende maand."),
+    ('nl', "We hebben meer vrijwilligers nodig voor het weekend, vooral mensen die kunnen autorijden."),
+    ('nl', "Mijn broer was zijn sleutels weer vergeten en moest een uur buiten wachten."),
+    ('nl', "Vergeet niet je werk op te slaan voordat je de applicatie sluit."),
+    ('nl', "Hoeveel kost het?"),
+    ('nl', "Hartelijk bedankt!"),
+    ('sv', "Kommittén kommer att publicera sin slutrapport i slutet av nästa månad."),
+    ('sv', "Vi behöver fler volontärer till helgen, särskilt personer som kan köra bil."),
+    ('sv', "Min bror glömde sina nycklar igen och fick vänta utanför i en timme."),
+    ('sv', "Kom ihåg att spara ditt arbete innan du stänger programmet."),
+    ('sv', "Vad kostar det?"),
+    ('sv', "Tack så mycket!"),
+    ('tr', "Komite nihai raporunu gelecek ayın sonunda yayınlayacak."),
+    ('tr', "Hafta sonu için daha fazla gönüllüye ihtiyacımız var, özellikle araba kullanabilen kişilere."),
+    ('tr', "Kardeşim anahtarlarını yine unuttu ve bir saat dışarıda beklemek zorunda kaldı."),
+    ('tr', "Lütfen uygulamayı kapatmadan önce çalışmanızı kaydetmeyi unutmayın."),
+    ('tr', "Bu ne kadar?"),
+    ('tr', "Çok teşekkürler!"),
+    ('vi', "Ủy ban sẽ công bố báo cáo cuối cùng vào cuối tháng sau."),
+    ('vi', "Chúng tôi cần thêm tình nguyện viên cho cuối tuần, đặc biệt là những người biết lái xe."),
+    ('vi', "Anh trai tôi lại quên chìa khóa và phải đợi bên ngoài một tiếng đồng hồ."),
+    ('vi', "Vui lòng nhớ lưu công việc của bạn trước khi đóng ứng dụng."),
+    ('vi', "Cái này bao nhiêu tiền?"),
+    ('vi', "Cảm ơn nhiều!"),
+    ('id', "Komite akan menerbitkan laporan akhirnya pada akhir bulan depan."),
+    ('id', "Kami membutuhkan lebih banyak sukarelawan untuk akhir pekan, terutama orang yang bisa menyetir."),
+    ('id', "Kakak saya lupa kuncinya lagi dan harus menunggu di luar selama satu jam."),
+    ('id', "Jangan lupa menyimpan pekerjaan Anda sebelum menutup aplikasi."),
+    ('id', "Berapa harganya?"),
+    ('id', "Terima kasih banyak!"),
+    ('ru', "Комитет опубликует свой итоговый доклад в конце следующего месяца."),
+    ('ru', "Мой брат опять забыл ключи и целый час ждал на улице."),
+    ('ru', "Сколько это стоит?"),
+    ('ja', "委員会は来月末に最終報告書を公表する予定です。"),
+    ('ja', "兄はまた鍵を忘れて、外で一時間待たなければなりませんでした。"),
+    ('ja', "いくらですか？"),
+    ('ko', "위원회는 다음 달 말에 최종 보고서를 발표할 예정입니다."),
+    ('ko', "형이 또 열쇠를 잊어버려서 밖에서 한 시간을 기다려야 했어요."),
+    ('ko', "얼마예요?"),
+    ('zh', "委员会将在下个月底发布最终报告。"),
+    ('zh', "我哥哥又忘了带钥匙，只好在外面等了一个小时。"),
+    ('zh', "多少钱？"),
+    ('ar', "ستنشر اللجنة تقريرها النهائي في نهاية الشهر المقبل."),
+    ('ar', "نسي أخي مفاتيحه مرة أخرى واضطر إلى الانتظار في الخارج لمدة ساعة."),
+    ('ar', "كم سعره؟"),
+    ('hi', "समिति अगले महीने के अंत में अपनी अंतिम रिपोर्ट प्रकाशित करेगी।"),
+    ('hi', "मेरा भाई फिर से अपनी चाबियाँ भूल गया और उसे एक घंटे बाहर इंतज़ार करना पड़ा।"),
+    ('hi', "यह कितने का है?"),
+    ('bn', "কমিটি আগামী মাসের শেষে তাদের চূড়ান্ত প্রতিবেদন প্রকাশ করবে।"),
+    ('bn', "আমার ভাই আবার চাবি ভুলে গেছে এবং তাকে এক ঘণ্টা বাইরে অপেক্ষা করতে হয়েছে।"),
+    ('bn', "এটার দাম কত?"),
+    ('th', "คณะกรรมการจะเผยแพร่รายงานฉบับสุดท้ายในช่วงปลายเดือนหน้า"),
+    ('th', "พี่ชายของฉันลืมกุญแจอีกแล้วและต้องรออยู่ข้างนอกหนึ่งชั่วโมง"),
+    ('th', "ราคาเท่าไหร่"),
+    (None, "Η επιτροπή θα δημοσιεύσει την τελική της έκθεση στο τέλος του επόμενου μήνα."),
+    (None, "Комітет опублікує свою остаточну доповідь наприкінці наступного місяця."),
+    (None, "کمیته گزارش نهایی خود را در پایان ماه آینده منتشر خواهد کرد."),
+    (None, "הוועדה תפרסם את הדוח הסופי שלה בסוף החודש הבא."),
+    (None, "Komiteen vil offentliggøre sin endelige rapport i slutningen af næste måned."),
+    (None, "Comitetul își va publica raportul final la sfârșitul lunii viitoare."),
+    (None, "Výbor zveřejní svou závěrečnou zprávu na konci příštího měsíce."),
+    (None, "Komitea julkaisee loppuraporttinsa ensi kuun lopussa."),
+    (None, "Mange frivillige hjalp med at rydde stranden i weekenden."),
+    (None, "Husk at gemme dit arbejde, inden du lukker programmet."),
+    (None, "Hvor meget koster det?"),
+    (None, "Monet vapaaehtoiset auttoivat siivoamaan rannan viikonloppuna."),
+    (None, "Paljonko se maksaa?"),
+    (None, "El comitè publicarà el seu informe final a finals del mes que ve."),
+    (None, "Molts voluntaris van ajudar a netejar la platja el cap de setmana."),
+    (None, "Quant costa això?"),
+    (None, "Komiteen vil publisere sluttrapporten sin i slutten av neste måned."),
+    (None, "O comité publicará o seu informe final a finais do mes que vén."),
+    (None, "Die komitee sal sy finale verslag aan die einde van volgende maand publiseer."),
+    (None, "Jawatankuasa akan menerbitkan laporan akhirnya pada hujung bulan hadapan."),
+    (None, "Комитет ће објавити свој завршни извештај крајем следећег месеца."),
+    (None, "Много волонтера је помогло да се очисти плажа."),
+    (None, "Комисията ще публикува окончателния си доклад в края на следващия месец."),
+    (None, "Много доброволци помогнаха да се почисти плажът през уикенда."),
+    (None, "समिती पुढील महिन्याच्या शेवटी आपला अंतिम अहवाल प्रसिद्ध करेल."),
+    (None, "माझा भाऊ काल त्याच्या चाव्या ऑफिसमध्ये विसरला."),
+    (None, "東京都庁"),
+    (None, "東京都庁舎展望室"),
+    (None, "Order #4821 - 2024-03-15 12:30 - $199.99"),
+    (None, "def f(x): return x**2 + 1"),
+    (None, "OK"),
+]
+
+def evaluate(results, threshold: float):
+    """Per expected language: texts, answered locally, answered correctly"""
+    rows = {}
+    for (expected, _), result in zip(SAMPLE, results):
+        row = rows.setdefault(expected or 'other', {'texts': 0, 'local': 0, 'correct': 0})
+        row['texts'] += 1
+        if result['code'] is not None and result['confidence'] >= threshold:
+            row['local'] += 1
+            row['correct'] += result['code'] == expected
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--min-confidence', type=float, default=language_id.MIN_CONFIDENCE)
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the sample for timing')
+    parser.add_argument('--batch', type=int, default=256, help='Texts per detect_many call')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    language_id.detect('warm up')
+    load_seconds = time.perf_counter() - started
+    
+    texts = [text for _, text in SAMPLE]
+    results = language_id.detect_many(texts)
+    rows = evaluate(results, args.min_confidence)
+    
+    latencies = []
+    for _ in range(args.repeat):
+        for text in texts:
+            began = time.perf_counter()
+            language_id.detect(text)
+            latencies.append(time.perf_counter() - began)
+    
+    stream = texts * args.repeat
+    started = time.perf_counter()
+    for start in range(0, len(stream), args.batch):
+        language_id.detect_many(stream[start:start + args.batch])
+    batch_us = (time.perf_counter() - started) / len(stream) * 1e6
+    
+    supported = [r for code, r in rows.items() if code != 'other']
+    local = sum(r['local'] for r in supported)
+    correct = sum(r['correct'] for r in supported)
+    results_out = {
+        'texts': len(SAMPLE),
+        'supported_texts': sum(r['texts'] for r in supported),
+        'local_rate': local / sum(r['texts'] for r in supported),
+        'local_accuracy': correct / local if local else 0.0,
+        'other_local': rows['other']['local'],
+        'other_texts': rows['other']['texts'],
+        'load_ms': load_seconds * 1e3,
+        'single_us': {k: v * 1e6 for k, v in report.percentiles(latencies).items()},
+        'batch_us_per_text': batch_us,
+        'languages': rows,
+    }
+    
+    print(report.table(
+        [{'language': code, **r} for code, r in rows.items()],
+        ['language', 'texts', 'local', 'correct']
+    ))
+    print(f"\nmin confidence {args.min_confidence}: {results_out['local_rate']:.1%} of supported-language texts "
+          f"answered locally, {results_out['local_accuracy']:.1%} of those correct; "
+          f"{results_out['other_local']}/{results_out['other_texts']} unsupported or non-language texts "
+          f"answered locally")
+    single = results_out['single_us']
+    print(f"profiles built in {results_out['load_ms']:.1f} ms; detect p50 {single['p50']:.0f} us, "
+          f"p99 {single['p99']:.0f} us; detect_many {batch_us:.1f} us per text (batches of {args.batch})")
+    report.write(args.json, 'language_id', args, results_out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Metrics Benchmark - Cost of instrumentation per request
+
+Separate processes differ by more than the effect being measured here,
+so both variants run interleaved in one process with the fake model:
+
+- operation: proofreader check_all, instrumented vs. the undecorated
+  function with the stage hooks switched off (metrics.ENABLED)
+- middleware: an ASGI call with and without MetricsMiddleware around a
+  trivial app (the HTTP stack adds noise larger than the middleware)
+
+Overhead is the sum of both medians, reported against the full HTTP
+request time for a cache miss (model call + parse) and a cache hit.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks import report
+from benchmarks.fake_backend import FakeModel
+from core import metrics, model_registry
+
+REPLY = '{"findings": [], "overall_quality_score": 90}'
+TEXT = 'The quick brown fox jumps over the lazy dog. ' * 20
+
+async def interleave(variants, rounds: int, per_round: int):
+    """Alternate variants in small rounds; median seconds per call for each"""
+    samples = [[] for _ in variants]
+    for r in range(rounds):
+        for i, (setup, call) in enumerate(variants):
+            setup()
+            start = time.perf_counter()
+            for n in range(per_round):
+                await call(f"{r}.{n}")
+            samples[i].append((time.perf_counter() - start) / per_round)
+    metrics.ENABLED = True
+    return [statistics.median(s) for s in samples]
+
+async def _empty_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def _discard(message):
+    pass
+
+def asgi_call(app):
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/proofread',
+             'headers': [(b'content-type', b'application/json'), (b'user-agent', b'bench')]}
+    return lambda tag: app(dict(scope), None, _discard)
+
+def enabled(flag: bool):
+    def setup():
+        metrics.ENABLED = flag
+    return setup
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=40)
+    parser.add_argument('--per-round', type=int, default=100)
+    parser.add_argument('--latency', type=float, nargs='+', default=[0.2, 1.0], help='Model seconds to project onto')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    model_registry.set_factory(lambda name, config: FakeModel(latency=0, reply=REPLY))
+    import main as app_module
+    from neural_networks import proofreader_api
+    
+    check_all = proofreader_api.check_all
+    plain = check_all.__wrapped__
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url='http://bench')
+    
+    async def post(text):
+        response = await client.post('/api/proofread', json={'text': text})
+        assert response.status_code == 200, response.text
+    
+    mw_off, mw_on = await interleave([
+        (enabled(True), asgi_call(_empty_app)),
+        (enabled(True), asgi_call(metrics.MetricsMiddleware(_empty_app))),
+    ], args.rounds, args.per_round * 10)
+    
+    rows = []
+    for path in ('miss', 'hit'):
+        text_for = (lambda tag: f"{path}{tag} {TEXT}") if path == 'miss' else (lambda tag: TEXT)
+        op_off, op_on = await interleave([
+            (enabled(False), lambda tag: plain(text_for(tag))),
+            (enabled(True), lambda tag: check_all(text_for('op' + tag))),
+        ], args.rounds, args.per_round)
+        (full,) = await interleave([
+            (enabled(True), lambda tag: post(text_for('full' + tag))),
+        ], args.rounds, args.per_round)
+        rows.append((path, op_on - op_off, mw_on - mw_off, full))
+    
+    print(f"{'path':>5} {'operation us':>13} {'middleware us':>14} {'request ms':>11} {'overhead':>9}")
+    for path, op, mw, full in rows:
+        print(f"{path:>5} {op * 1e6:>13.1f} {mw * 1e6:>14.1f} {full * 1e3:>11.3f} {(op + mw) / full:>9.2%}")
+    miss = rows[0]
+    for latency in args.latency:
+        print(f"miss with a {latency:g} s model call: {(miss[1] + miss[2]) / (miss[3] + latency):.4%}")
+    
+    await client.aclose()
+    report.write(args.json, 'metrics', args, {
+        path: {'operation_us': op * 1e6, 'middleware_us': mw * 1e6, 'request_ms': full * 1e3}
+        for path, op, mw, full in rows
+    })
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Micro Benchmark - Prompt construction and reply parsing per API function
+
+Calls every neural_networks function against a zero-latency stub model
+(core.stub_backend, which answers prompts ending in a JSON example with
+a reply of that shape) with a distinct input per call and the response
+cache off, and reads the per-operation stage timings core.metrics
+already records:
+
+- prompt_build: function start to the model call (prompt formatting,
+  chunking, cache keys)
+- parse: structured-output parsing of the reply
+- model: the executor round trip to the stub (scheduler, resilience,
+  stub bookkeeping); not the function's own work
+- other: everything else (post-processing, result assembly)
+
+Writes per-operation means in microseconds with --json for
+benchmarks.compare.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+from core import metrics, model_registry, response_cache
+from core.stub_backend import StubModel
+from benchmarks import report
+
+TEXT = (
+    "Their going to the libary tomorow to study for the exam, wich is on monday. "
+    "The team have finished the report but it still need a final review before it is sent. "
+    "Despite the rain the event was a success and everyone enjoyed themself. "
+) * 4
+
+def cases():
+    from neural_networks import (
+        batch_api, prompt_api, proofreader_api, rewriter_api, summarizer_api, translator_api, writer_api
+    )
+    batch = lambda i: [{'operation': 'simplify', 'params': {'text': f"{i}.{n} {TEXT}"}} for n in range(4)]
+    return {
+        'prompt.generate': lambda i: prompt_api.generate(f"{i} Write a tagline for a bakery", context=TEXT),
+        'prompt.stream_generate': lambda i: prompt_api.stream_generate(f"{i} Write a tagline", context=TEXT),
+        'prompt.analyze_intent': lambda i: prompt_api.analyze_intent(f"{i} {TEXT}"),
+        'proofreader.check_all': lambda i: proofreader_api.check_all(f"{i} {TEXT}", use_cache=False),
+        'proofreader.check_incremental': lambda i: proofreader_api.check_incremental(f"doc-{i}", f"{i} {TEXT}"),
+        'proofreader.check': lambda i: proofreader_api.check(f"{i} {TEXT}", use_cache=False),
+        'proofreader.check_grammar': lambda i: proofreader_api.check_grammar(f"{i} {TEXT}", use_cache=False),
+        'proofreader.check_spelling': lambda i: proofreader_api.check_spelling(f"{i} {TEXT}", use_cache=False),
+        'proofreader.get_readability_score': lambda i: proofreader_api.get_readability_score(f"{i} {TEXT}", True),
+        'proofreader.auto_fix': lambda i: proofreader_api.auto_fix(f"{i} {TEXT}", use_cache=False),
+        'rewriter.rewrite': lambda i: rewriter_api.rewrite(f"{i} {TEXT}", style='formal'),
+        'rewriter.paraphrase': lambda i: rewriter_api.paraphrase(f"{i} {TEXT}"),
+        'rewriter.simplify': lambda i: rewriter_api.simplify(f"{i} {TEXT}"),
+        'rewriter.humanize': lambda i: rewriter_api.humanize(f"{i} {TEXT}", {'vary_sentences': True}),
+        'rewriter.adjust_tone': lambda i: rewriter_api.adjust_tone(f"{i} {TEXT}", 'friendly'),
+        'rewriter.stream_rewrite': lambda i: rewriter_api.stream_rewrite(f"{i} {TEXT}"),
+        'summarizer.summarize': lambda i: summarizer_api.summarize(f"{i} {TEXT}", use_cache=False),
+        'summarizer.stream_summarize': lambda i: summarizer_api.stream_summarize(f"{i} {TEXT}"),
+        'summarizer.extract_key_points': lambda i: summarizer_api.extract_key_points(f"{i} {TEXT}"),
+        'translator.translate': lambda i: translator_api.translate(f"{i} {TEXT}", 'French', use_cache=False),
+        'translator.stream_translate': lambda i: translator_api.stream_translate(f"{i} {TEXT}", 'French', use_cache=False),
+        'translator.detect_language': lambda i: translator_api.detect_language(f"{i} {TEXT}", use_cache=False),
+        'writer.generate': lambda i: writer_api.generate(f"{i} A post about remote work", tone='casual'),
+        'writer.stream_generate': lambda i: writer_api.stream_generate(f"{i} A post about remote work"),
+        'writer.complete': lambda i: writer_api.complete(f"{i} The quick brown fox"),
+        'writer.expand': lambda i: writer_api.expand(f"{i} {TEXT}"),
+        'writer.stream_expand': lambda i: writer_api.stream_expand(f"{i} {TEXT}"),
+        'batch.run_batch': lambda i: batch_api.run_batch(batch(i)),
+        'batch.stream_batch': lambda i: batch_api.stream_batch(batch(i)),
+    }
+
+async def consume(result):
+    if hasattr(result, '__aiter__'):
+        async for _ in result:
+            pass
+    else:
+        await result
+
+def snapshot():
+    return metrics.operation_seconds.totals(), metrics.stage_seconds.totals()
+
+def mean_delta(before, after, key):
+    count, total = after.get(key, (0, 0.0))
+    count0, total0 = before.get(key, (0, 0.0))
+    return (total - total0) / (count - count0) if count > count0 else 0.0
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=200, help='Calls per operation')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--only', nargs='*', help='Operations to run (default: all)')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    model_registry.set_factory(lambda name, config: StubModel(
+        name, config, latency=0, distribution='fixed', seconds_per_token=0, reply_tokens=64
+    ))
+    response_cache.cache.enabled = False
+    
+    results = {}
+    for operation, make in cases().items():
+        if args.only and operation not in args.only:
+            continue
+        for i in range(args.warmup):
+            await consume(make(f"w{i}"))
+        ops0, stages0 = snapshot()
+        started = time.perf_counter()
+        for i in range(args.calls):
+            await consume(make(i))
+        wall = (time.perf_counter() - started) / args.calls
+        ops1, stages1 = snapshot()
+        
+        # Nested operations (batch items) record their stages under their own name
+        stage = defaultdict(float)
+        for name in ('prompt_build', 'parse', 'model_call'):
+            count0, total0 = stages0.get((operation, name), (0, 0.0))
+            count1, total1 = stages1.get((operation, name), (0, 0.0))
+            stage[name] = (total1 - total0) / args.calls
+        total = mean_delta(ops0, ops1, (operation,)) or wall
+        results[operation] = {
+            'total_us': total * 1e6,
+            'prompt_build_us': stage['prompt_build'] * 1e6,
+            'parse_us': stage['parse'] * 1e6,
+            'model_us': stage['model_call'] * 1e6,
+            'other_us': max(0.0, total - sum(stage.values())) * 1e6,
+        }
+    
+    rows = [{'operation': op, **{k: round(v, 1) for k, v in r.items()}} for op, r in results.items()]
+    print(f"{args.calls} calls per operation, zero-latency stub model, means in microseconds\n")
+    print(report.table(rows, ['operation', 'total_us', 'prompt_build_us', 'parse_us', 'model_us', 'other_us']))
+    report.write(args.json, 'micro', args, results)
+
+if __name__ == "__main__":
+    asyncio.run(main())
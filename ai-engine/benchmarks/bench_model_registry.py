@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Model Registry Benchmark - Per-request client setup cost
+
+Compares building a fresh genai.GenerativeModel on every call (the old
+behaviour) with fetching the shared client from core.model_registry.
+Construction is local; no API key or network access is needed.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import google.generativeai as genai
+from google.generativeai import client
+
+from benchmarks import report
+from core import model_registry
+
+GENERATION_CONFIG = {'temperature': 0.7, 'max_output_tokens': 1024}
+
+def per_call_construction():
+    # What every request paid before: a new client object plus the lazy
+    # service-client attach done on its first generate_content call
+    model = genai.GenerativeModel(
+        model_registry.DEFAULT_MODEL,
+        generation_config=GENERATION_CONFIG
+    )
+    model._client = client.get_default_generative_client()
+    return model
+
+def registry_lookup():
+    return model_registry.get_model('prompt', GENERATION_CONFIG)
+
+def measure(fn, iterations: int):
+    """Return (microseconds per call, transient bytes allocated per call)"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    
+    return elapsed / iterations * 1e6, allocated / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    genai.configure(api_key='benchmark')
+    model_registry.warm_up()
+    
+    rows = [
+        ('per_call', 'GenerativeModel per call', per_call_construction),
+        ('registry', 'model_registry.get_model', registry_lookup),
+    ]
+    print(f"{'path':<28} {'us/call':>10} {'alloc B/call':>14}")
+    results = {}
+    for key, label, fn in rows:
+        us, alloc = measure(fn, args.iterations)
+        results[key] = {'call_us': us, 'alloc_bytes': alloc}
+        print(f"{label:<28} {us:>10.2f} {alloc:>14.1f}")
+    
+    base_us, base_alloc = results['per_call']['call_us'], results['per_call']['alloc_bytes']
+    shared_us, shared_alloc = results['registry']['call_us'], results['registry']['alloc_bytes']
+    print(f"\nRemoved per request: {base_us - shared_us:.2f} us, "
+          f"{base_alloc - shared_alloc:.0f} bytes allocated")
+    report.write(args.json, 'model_registry', args, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Document OCR Benchmark - Page-parallel, lazily decoded multi-page TIFF
+
+Builds a synthetic scanned document (bilevel, Group 4 compressed, one
+page per 200 dpi letter sheet) and extracts it through a fake OCR model:
+
+- eager: decode every page into memory, then prepare and extract each
+  page with the same concurrency limit
+- lazy:  ocr_processor.extract_document (one page decoded at a time,
+  bounded pages in flight)
+
+Each run is a separate process so peak RSS is comparable.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw, ImageSequence
+
+from core import executor, model_registry
+from benchmarks import report
+from benchmarks.fake_backend import FakeModel
+from benchmarks.report import peak_rss_mb
+from visual_ai import image_preprocessor, ocr_processor
+
+PAGE_SIZE = (1700, 2200)
+
+def page(number: int) -> Image.Image:
+    image = Image.new('1', PAGE_SIZE, 1)
+    draw = ImageDraw.Draw(image)
+    for line in range(60):
+        draw.text((120, 120 + line * 32), f"Page {number} line {line}: the quick brown fox jumps over the lazy dog", fill=0)
+    return image
+
+def make_tiff(path: str, pages: int):
+    first = page(0)
+    first.save(path, format='TIFF', compression='group4', save_all=True,
+               append_images=(page(n) for n in range(1, pages)))
+
+async def eager(path: str, concurrency: int):
+    # Every page decoded up front, then the same per-page preparation and call
+    with Image.open(path) as document:
+        frames = [frame.copy() for frame in ImageSequence.Iterator(document)]
+    model = model_registry.get_model('ocr')
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def extract(frame):
+        async with semaphore:
+            image = await executor.run_blocking(image_preprocessor.prepare_frame, frame, 'ocr')
+            response = await executor.generate_content(model, [ocr_processor.EXTRACT_PROMPT, image])
+            return response.text
+    
+    texts = await asyncio.gather(*(extract(frame) for frame in frames))
+    return len(texts)
+
+async def lazy(path: str, concurrency: int):
+    result = await ocr_processor.extract_document(path, max_concurrency=concurrency)
+    return result['metadata']['page_count']
+
+def child(args):
+    model_registry.set_factory(lambda name, config: FakeModel(latency=args.latency, reply="text"))
+    runner = lazy if args.mode == 'lazy' else eager
+    start = time.perf_counter()
+    pages = asyncio.run(runner(args.path, args.concurrency))
+    elapsed = time.perf_counter() - start
+    print(f"{pages} {elapsed:.3f} {peak_rss_mb():.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--latency', type=float, default=0.3, help='Fake model seconds per page')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mode', choices=['eager', 'lazy'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    if args.mode:
+        child(args)
+        return
+    
+    results = {}
+    print(f"{'pages':>6} {'TIFF MB':>8} {'mode':>6} {'seconds':>8} {'pages/s':>8} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.pages:
+            path = os.path.join(tmp, f"doc-{count}.tif")
+            make_tiff(path, count)
+            size_mb = os.path.getsize(path) / 1e6
+            for mode in ('eager', 'lazy'):
+                out = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_ocr_document', '--mode', mode,
+                     '--path', path, '--latency', str(args.latency),
+                     '--concurrency', str(args.concurrency)],
+                    capture_output=True, text=True, check=True
+                ).stdout.split()
+                pages, seconds, peak = int(out[0]), float(out[1]), float(out[2])
+                print(f"{pages:>6} {size_mb:>8.2f} {mode:>6} {seconds:>8.2f} "
+                      f"{pages / seconds:>8.1f} {peak:>12.1f}")
+                results.setdefault(f'{count}_pages', {})[mode] = {
+                    'seconds': seconds, 'throughput': pages / seconds, 'peak_rss_mb': peak
+                }
+    report.write(args.json, 'ocr_document', args, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Readability Benchmark - Local scoring latency per page and per batch
+
+A "page" is ~500 words of mixed-length prose. Target: under 1 ms per page.
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks import report
+from neural_networks import readability
+
+VOCABULARY = (
+    "the a of and to in is was it for on with as by this that from "
+    "system reading people important because however information development "
+    "simple document quickly understand organization particularly considerable"
+).split()
+
+def make_page(words: int, seed: int) -> str:
+    rng = random.Random(seed)
+    sentences, total = [], 0
+    while total < words:
+        n = rng.randint(6, 28)
+        sentences.append(' '.join(rng.choice(VOCABULARY) for _ in range(n)).capitalize() + rng.choice('..!?'))
+        total += n
+    return ' '.join(sentences)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=500, help='Words per page')
+    parser.add_argument('--pages', type=int, default=1000, help='Pages per batch')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    pages = [make_page(args.words, seed) for seed in range(args.pages)]
+    
+    # Cold: empty syllable memo, as on the first request after startup
+    readability.count_syllables.cache_clear()
+    start = time.perf_counter()
+    readability.score(pages[0])
+    cold = (time.perf_counter() - start) * 1e3
+    
+    start = time.perf_counter()
+    for page in pages:
+        readability.score(page)
+    single = (time.perf_counter() - start) / len(pages) * 1e3
+    
+    start = time.perf_counter()
+    readability.score_batch(pages)
+    batch = (time.perf_counter() - start) / len(pages) * 1e3
+    
+    print(f"{args.words}-word page, {args.pages} pages")
+    print(f"  cold first page:      {cold:.3f} ms")
+    print(f"  score() per page:     {single:.3f} ms")
+    print(f"  score_batch per page: {batch:.3f} ms")
+    report.write(args.json, 'readability', args, {'cold_ms': cold, 'score_ms': single, 'score_batch_ms': batch})
+
+if __name__ == "__main__":
+    main()
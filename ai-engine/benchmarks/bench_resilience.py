@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Resilience Benchmark - Tail latency and failures with injected faults
+
+Sends writer_api.complete calls at a fixed --rate (open loop, so failing
+fast does not change the offered load) to a core.stub_backend StubModel
+with injected faults, each scenario
+with the relevant core.resilience feature off and on:
+
+- tail:    3% of calls take 20x longer; hedging off vs. on
+- errors:  10% of calls fail with a 503; retries off vs. on
+- outage:  the backend hangs and fails for the middle third of the run;
+           circuit breaker off vs. on (retries on in both)
+
+Backoff and breaker timings are scaled down with the stub model's 50 ms
+latency so each scenario runs in seconds.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import report
+from core import model_registry, resilience
+from core.stub_backend import StubModel
+
+REPLY = '{"completions": ["one", "two", "three"]}'
+
+SCENARIOS = {
+    'tail': ('hedging', dict(slow_rate=0.03, slow_latency=1.0)),
+    'errors': ('retries', dict(error_rate=0.1)),
+    'outage': ('breaker', {}),
+}
+
+# Seconds a call hangs before failing while the backend is down
+OUTAGE_LATENCY = 0.5
+
+def configure(feature: str, on: bool) -> None:
+    resilience.clear()
+    resilience.RETRY_BASE_SECONDS = 0.025
+    resilience.RETRY_MAX_SECONDS = 0.4
+    resilience.HEDGE_ENABLED = feature == 'hedging' and on
+    resilience.RETRY_ATTEMPTS = 1 if feature == 'retries' and not on else 3
+    resilience.breaker.enabled = feature == 'breaker' and on
+    resilience.breaker.failures = 5
+    resilience.breaker.reset_seconds = 0.5
+
+async def run(scenario: str, on: bool, args) -> dict:
+    from neural_networks import writer_api
+    
+    feature, faults = SCENARIOS[scenario]
+    configure(feature, on)
+    model = StubModel(
+        latency=args.latency,
+        distribution='fixed',
+        seconds_per_token=0.0,
+        reply=REPLY,
+        seed=args.seed,
+        **faults
+    )
+    model_registry.clear()
+    model_registry.set_factory(lambda name, config: model)
+    
+    latencies = []
+    failed = []
+    outage_calls = 0
+    start = time.monotonic()
+    
+    async def call(number: int):
+        began = time.monotonic()
+        try:
+            await writer_api.complete(f"Call {number}: the quick brown")
+            latencies.append(time.monotonic() - began)
+        except Exception:
+            failed.append(time.monotonic() - began)
+    
+    async def outage():
+        nonlocal outage_calls
+        # Down for the middle third of the run
+        third = args.calls / args.rate / 3
+        await asyncio.sleep(third)
+        before = model.calls
+        model.latency, model.error_rate = OUTAGE_LATENCY, 1.0
+        await asyncio.sleep(third)
+        model.latency, model.error_rate = args.latency, 0.0
+        outage_calls = model.calls - before
+    
+    tasks = [asyncio.ensure_future(outage())] if scenario == 'outage' else []
+    for number in range(args.calls):
+        delay = start + number / args.rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(call(number)))
+    await asyncio.gather(*tasks)
+    
+    ordered = sorted(latencies)
+    return {
+        'ok': len(latencies),
+        'failed': len(failed),
+        'p50': statistics.median(ordered) if ordered else float('nan'),
+        'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else float('nan'),
+        'failed_mean': statistics.mean(failed) if failed else 0.0,
+        'backend_calls': model.calls,
+        'outage_calls': outage_calls,
+        'seconds': time.monotonic() - start,
+        'stats': resilience.stats(),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=200, help='Calls per second')
+    parser.add_argument('--latency', type=float, default=0.05, help='Normal model seconds per call')
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--scenario', choices=list(SCENARIOS), nargs='*', default=list(SCENARIOS))
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    print(f"{'scenario':>8} {'feature':>12} {'ok':>6} {'failed':>6} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'fail ms':>8} {'backend':>8} {'seconds':>8}")
+    results = {}
+    for scenario in args.scenario:
+        feature = SCENARIOS[scenario][0]
+        for on in (False, True):
+            r = await run(scenario, on, args)
+            results.setdefault(scenario, {})[f"{feature}_{'on' if on else 'off'}"] = {
+                'ok': r['ok'],
+                'errors': r['failed'],
+                'p50_ms': r['p50'] * 1e3,
+                'p99_ms': r['p99'] * 1e3,
+                'failed_mean_ms': r['failed_mean'] * 1e3,
+                'backend_calls': r['backend_calls'],
+                'outage_calls': r['outage_calls'],
+                'seconds': r['seconds'],
+            }
+            label = f"{feature} {'on' if on else 'off'}"
+            print(f"{scenario:>8} {label:>12} {r['ok']:>6} {r['failed']:>6} {r['p50'] * 1e3:>7.0f} "
+                  f"{r['p99'] * 1e3:>7.0f} {r['failed_mean'] * 1e3:>8.0f} {r['backend_calls']:>8} {r['seconds']:>8.1f}")
+            if scenario == 'outage':
+                print(f"{'':>21} backend calls during outage: {r['outage_calls']}, "
+                      f"breaker opened {r['stats']['breaker_opened']}x, rejected {r['stats']['breaker_rejected']}")
+            elif on:
+                print(f"{'':>21} {r['stats']}")
+    report.write(args.json, 'resilience', args, results)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Scheduler Benchmark - Goodput under overload with and without admission control
+
+Drives core.executor.generate_content against a core.stub_backend
+StubModel with an upstream quota (1 s sliding window, 429 beyond it) and
+an open
+arrival process several times larger than the quota:
+
+- tenant 'heavy' floods batch-style calls (normal priority)
+- tenants 'light-1' and 'light-2' send a steady trickle (normal priority)
+- autocomplete sends short calls at interactive priority
+- a batch job sends calls at batch priority
+
+Each call has a client deadline (its class deadline). 'direct' sends
+straight to the backend and retries 429s with jittered backoff until the
+deadline ('direct, free 429s' is the same against an upstream that does not
+meter rejected attempts); 'scheduled' goes through core.scheduler with
+limits just under the upstream quota. Goodput counts calls that succeed
+within their deadline, per second of wall time until the last one ends.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from benchmarks import report
+from core import executor, resilience, scheduler, stub_backend
+from core.stub_backend import StubModel, StubRateLimitError
+
+DEADLINES = {'interactive': 2.0, 'normal': 10.0, 'batch': 60.0}
+
+# (tenant, priority, calls per second, prompt characters)
+STREAMS = [
+    ('heavy', 'normal', 40, (2000, 6000)),
+    ('light-1', 'normal', 4, (2000, 6000)),
+    ('light-2', 'normal', 4, (2000, 6000)),
+    ('autocomplete', 'interactive', 6, (200, 600)),
+    ('batch-job', 'batch', 10, (4000, 8000)),
+]
+
+async def call(model, tenant: str, priority: str, prompt: str, mode: str, results):
+    started = time.monotonic()
+    deadline = started + DEADLINES[priority]
+    attempt = 0
+    while True:
+        try:
+            with scheduler.tenant(tenant), scheduler.priority(priority):
+                await executor.generate_content(model, prompt)
+            ok = time.monotonic() <= deadline
+            break
+        except scheduler.QuotaExceeded:
+            ok = False
+            break
+        except StubRateLimitError:
+            attempt += 1
+            backoff = min(2.0, 0.05 * 2 ** attempt) * random.uniform(0.5, 1.5)
+            if mode == 'scheduled' or time.monotonic() + backoff > deadline:
+                ok = False
+                break
+            await asyncio.sleep(backoff)
+    results.append((tenant, priority, ok, time.monotonic() - started))
+
+MODES = ('direct', 'direct, free 429s', 'scheduled')
+
+async def run(mode: str, args) -> dict:
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    model = StubModel(
+        latency=args.latency,
+        distribution='fixed',
+        seconds_per_token=0.0,
+        reply_tokens=100,
+        quota_requests=args.rpw,
+        quota_tokens=args.tpw,
+        quota_window=1.0,
+        meter_rejected=(mode == 'direct'),
+        seed=args.seed
+    )
+    stub_backend.clear()
+    # The direct clients retry 429s themselves
+    resilience.RETRY_ATTEMPTS = 1
+    scheduler.model_scheduler = scheduler.ModelScheduler(
+        enabled=(mode == 'scheduled'),
+        requests_per_window=args.rpw * 0.95,
+        tokens_per_window=args.tpw * 0.95,
+        window_seconds=1.0,
+        burst_seconds=args.burst,
+        reply_tokens=model.reply_tokens,
+        deadlines=DEADLINES
+    )
+    
+    # Poisson arrivals for every stream over the run
+    arrivals = []
+    for tenant, priority, rate, (low, high) in STREAMS:
+        t = 0.0
+        while True:
+            t += rng.expovariate(rate)
+            if t >= args.seconds:
+                break
+            arrivals.append((t, tenant, priority, 'x' * rng.randint(low, high)))
+    arrivals.sort()
+    
+    results = []
+    tasks = []
+    start = time.monotonic()
+    for at, tenant, priority, prompt in arrivals:
+        delay = start + at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(call(model, tenant, priority, prompt, mode, results)))
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - start
+    
+    by_tenant = defaultdict(lambda: [0, 0])
+    latencies = defaultdict(list)
+    for tenant, priority, ok, seconds in results:
+        by_tenant[tenant][0] += 1
+        by_tenant[tenant][1] += ok
+        if ok:
+            latencies[priority].append(seconds)
+    return {
+        'offered': len(results),
+        'goodput': sum(ok for *_, ok, _ in results) / elapsed,
+        'elapsed': elapsed,
+        'upstream_calls': model.calls,
+        'upstream_429': stub_backend.stats()['rate_limited'],
+        'by_tenant': dict(by_tenant),
+        'latencies': latencies,
+    }
+
+def p95(values):
+    return statistics.quantiles(values, n=20)[-1] if len(values) >= 2 else float('nan')
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--rpw', type=int, default=20, help='Upstream requests per 1 s window')
+    parser.add_argument('--tpw', type=int, default=30000, help='Upstream tokens per 1 s window')
+    parser.add_argument('--latency', type=float, default=0.3, help='Upstream seconds per call')
+    parser.add_argument('--burst', type=float, default=0.05, help='Scheduler burst seconds')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    offered_rate = sum(rate for _, _, rate, _ in STREAMS)
+    print(f"offered {offered_rate} calls/s against an upstream quota of {args.rpw} calls/s, "
+          f"{args.tpw} tokens/s, for {args.seconds:g} s\n")
+    results = {}
+    for mode in MODES:
+        outcome = await run(mode, args)
+        print(f"{mode}: goodput {outcome['goodput']:.1f} calls/s over {outcome['elapsed']:.0f} s, "
+              f"upstream calls {outcome['upstream_calls']}, upstream 429s {outcome['upstream_429']}")
+        for tenant, (offered, succeeded) in outcome['by_tenant'].items():
+            print(f"  {tenant:>13}: {succeeded:>5}/{offered:<5} succeeded ({succeeded / offered:>6.1%})")
+        for priority, values in sorted(outcome['latencies'].items()):
+            print(f"  {priority:>13}: p50 {statistics.median(values):.2f} s, p95 {p95(values):.2f} s")
+        print(f"  scheduler: {scheduler.model_scheduler.stats()}\n" if mode == 'scheduled' else '')
+        results[mode] = {
+            'throughput': outcome['goodput'],
+            'seconds': outcome['elapsed'],
+            'upstream_calls': outcome['upstream_calls'],
+            'upstream_429': outcome['upstream_429'],
+            'by_tenant': {
+                tenant: {'offered': offered, 'completed': succeeded}
+                for tenant, (offered, succeeded) in outcome['by_tenant'].items()
+            },
+            'latency': {
+                priority: {'p50_seconds': statistics.median(values), 'p95_seconds': p95(values)}
+                for priority, values in outcome['latencies'].items()
+            },
+        }
+    report.write(args.json, 'scheduler', args, results)
+    
+    executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Semantic Cache Benchmark - Near-duplicate hit rate and lookup latency
+
+Fills a core.semantic_cache index with --entries random texts, then looks
+up four kinds of query:
+
+- normalized: an indexed text with different case, punctuation and spacing
+- edited:     an indexed text with one word replaced (any hit is wrong: the
+  reply to the other text is served)
+- shortened:  an indexed text missing its last 20% (length check)
+- negated:    an indexed text with "not" inserted (any hit is wrong)
+- renumbered: an indexed text with one word replaced by a number (any hit
+  is wrong)
+- unrelated:  a fresh random text (any hit is a false positive)
+
+and reports hit rate and lookup latency per kind, insert rate and index
+memory. Thresholds are the module defaults per --operation.
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks import report
+from core.response_cache import make_key
+from core.semantic_cache import SemanticCache
+
+def random_text(rng: random.Random, vocabulary, words: int) -> str:
+    return ' '.join(rng.choice(vocabulary) for _ in range(words)).capitalize() + '.'
+
+def variants(rng: random.Random, text: str, vocabulary):
+    words = text.rstrip('.').split()
+    edited = list(words)
+    edited[rng.randrange(len(edited))] = rng.choice(vocabulary)
+    negated = list(words)
+    negated.insert(rng.randrange(1, len(negated)), 'not')
+    renumbered = list(words)
+    renumbered[rng.randrange(len(renumbered))] = str(rng.randint(2, 999))
+    return {
+        'normalized': '  ' + ', '.join(words).upper() + ' !',
+        'edited': ' '.join(edited) + '.',
+        'shortened': ' '.join(words[:int(len(words) * 0.8)]) + '.',
+        'negated': ' '.join(negated) + '.',
+        'renumbered': ' '.join(renumbered) + '.',
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=2000, help='Lookups per kind')
+    parser.add_argument('--words', type=int, default=60, help='Words per text')
+    parser.add_argument('--operation', default='summarizer.summarize')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9)))
+                  for _ in range(20000)]
+    index = SemanticCache(max_entries=args.entries)
+    params = {'length': 'medium', 'style': 'paragraph'}
+    
+    texts = []
+    started = time.perf_counter()
+    for i in range(args.entries):
+        text = random_text(rng, vocabulary, args.words)
+        if i % max(1, args.entries // args.queries) == 0:
+            texts.append(text)
+        index.add(args.operation, text, make_key(args.operation, text, params), params)
+    insert_seconds = time.perf_counter() - started
+    
+    queries = {'normalized': [], 'edited': [], 'shortened': [], 'negated': [], 'renumbered': [], 'unrelated': []}
+    for text in texts[:args.queries]:
+        for kind, query in variants(rng, text, vocabulary).items():
+            expected = None if kind in ('edited', 'negated', 'renumbered') else make_key(args.operation, text, params)
+            queries[kind].append((query, expected))
+        queries['unrelated'].append((random_text(rng, vocabulary, args.words), None))
+    
+    results = {
+        'entries': len(index),
+        'insert_us': insert_seconds / args.entries * 1e6,
+        'index_mb': index.memory_bytes() / (1024 * 1024),
+        'lookups': {},
+    }
+    for kind, pairs in queries.items():
+        latencies, hits, wrong = [], 0, 0
+        for query, expected in pairs:
+            began = time.perf_counter()
+            found = index.lookup(args.operation, query, params)
+            latencies.append(time.perf_counter() - began)
+            hits += found is not None
+            wrong += found is not None and found != expected
+        results['lookups'][kind] = {
+            'hit_rate': hits / len(pairs),
+            'wrong': wrong,
+            'latency_us': {k: v * 1e6 for k, v in report.percentiles(latencies).items()},
+        }
+    
+    print(f"{results['entries']} entries, {args.words} words each, {args.operation} "
+          f"(threshold {index.thresholds[args.operation]}): insert {results['insert_us']:.0f} us, "
+          f"index {results['index_mb']:.1f} MB\n")
+    rows = [
+        {'query': kind, 'hit rate': r['hit_rate'], 'wrong': r['wrong'], **{f"{k} us": v for k, v in r['latency_us'].items()}}
+        for kind, r in results['lookups'].items()
+    ]
+    print(report.table(rows, ['query', 'hit rate', 'wrong', 'p50 us', 'p95 us', 'p99 us']))
+    report.write(args.json, 'semantic_cache', args, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Long-Document Summarization Benchmark - Single-shot vs chunked map-reduce
+
+Uses a fake model whose latency grows with prompt size, so the numbers
+reflect request fan-out and prompt volume rather than a real backend.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks import report
+from benchmarks.fake_backend import FakeModel
+from core import executor, model_registry
+from neural_networks import summarizer_api
+
+WORDS = (
+    "system data model user network report value market energy policy "
+    "research result process design growth signal method cost quality"
+).split()
+
+def make_document(word_count: int, seed: int = 7) -> str:
+    """Build paragraphs of 8-20 word sentences totalling word_count words"""
+    rng = random.Random(seed)
+    paragraphs, sentences, words = [], [], 0
+    while words < word_count:
+        n = rng.randint(8, 20)
+        sentences.append(' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.')
+        words += n
+        if len(sentences) == 6:
+            paragraphs.append(' '.join(sentences))
+            sentences = []
+    if sentences:
+        paragraphs.append(' '.join(sentences))
+    return '\n\n'.join(paragraphs)
+
+async def time_summary(model: FakeModel, text: str, chunked: bool):
+    model.calls = model.prompt_chars = 0
+    start = time.perf_counter()
+    result = await summarizer_api.summarize(text, use_cache=False, chunked=chunked)
+    return time.perf_counter() - start, model.calls, result['metadata']['chunks']
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.05, help='Fixed seconds per call')
+    parser.add_argument('--per-token', type=float, default=1e-5, help='Seconds per prompt token')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 50_000, 200_000])
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    reply = ' '.join(WORDS[:12]) + '.'
+    model = FakeModel(latency=args.latency, reply=reply, per_token_latency=args.per_token)
+    model_registry.set_factory(lambda name, config: model)
+    
+    results = {}
+    print(f"{'words':>8} {'single s':>10} {'chunked s':>10} {'chunks':>7} {'calls':>6} {'speedup':>8}")
+    for size in args.sizes:
+        text = make_document(size)
+        single, _, _ = await time_summary(model, text, chunked=False)
+        chunked, calls, chunks = await time_summary(model, text, chunked=True)
+        print(f"{size:>8} {single:>10.2f} {chunked:>10.2f} {chunks:>7} {calls:>6} {single / chunked:>7.1f}x")
+        results[f'{size}_words'] = {
+            'single_seconds': single, 'chunked_seconds': chunked, 'chunks': chunks, 'model_calls': calls
+        }
+    report.write(args.json, 'summarize_long', args, results)
+    
+    executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Transcription Benchmark - Latency vs. audio length
+
+Synthetic 16 kHz speech-like WAVs (bursts separated by pauses) are
+transcribed through a FakeTranscriber whose latency grows with audio
+length, either as one request or split at pauses into chunks that run
+concurrently (voice_processor.transcribe). Also reports when the first
+partial transcript arrives in streaming mode.
+"""
+
+import argparse
+import asyncio
+import io
+import time
+import wave
+
+import numpy as np
+
+from benchmarks import report
+from benchmarks.fake_backend import FakeTranscriber
+from voice_processing import voice_processor
+
+RATE = 16000
+
+def make_wav(minutes: float, seed: int = 3) -> bytes:
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * RATE)
+    samples = np.zeros(total, dtype=np.int16)
+    position = 0
+    while position < total:
+        # A 2-8 s "utterance" followed by a 0.2-1 s pause
+        burst = int(rng.uniform(2, 8) * RATE)
+        end = min(position + burst, total)
+        t = np.arange(end - position) / RATE
+        tone = np.sin(2 * np.pi * rng.uniform(120, 300) * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+        samples[position:end] = (tone * 8000 + rng.normal(0, 300, end - position)).astype(np.int16)
+        position = end + int(rng.uniform(0.2, 1.0) * RATE)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+async def first_partial(audio: bytes) -> float:
+    start = time.perf_counter()
+    async for _ in voice_processor.stream_transcribe(audio):
+        return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--minutes', type=float, nargs='+', default=[1, 5, 15, 30, 60])
+    parser.add_argument('--latency', type=float, default=0.3, help='Fixed seconds per request')
+    parser.add_argument('--per-second', type=float, default=0.005, help='Seconds per second of audio')
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    backend = FakeTranscriber(latency=args.latency, per_second=args.per_second)
+    voice_processor.set_backend(backend)
+    
+    results = {}
+    print(f"{'minutes':>8} {'single s':>9} {'chunks':>7} {'chunked s':>10} {'first partial s':>16} {'speedup':>8}")
+    for minutes in args.minutes:
+        audio = make_wav(minutes)
+        
+        start = time.perf_counter()
+        await voice_processor.transcribe(audio, chunk_seconds=24 * 3600)
+        single = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        result = await voice_processor.transcribe(audio)
+        chunked = time.perf_counter() - start
+        
+        first = await first_partial(audio)
+        print(f"{minutes:>8g} {single:>9.2f} {result['metadata']['chunks']:>7} {chunked:>10.2f} "
+              f"{first:>16.2f} {single / chunked:>7.1f}x")
+        results[f'{minutes:g}_minutes'] = {
+            'single_seconds': single,
+            'chunked_seconds': chunked,
+            'first_partial_seconds': first,
+            'chunks': result['metadata']['chunks'],
+        }
+    
+    voice_processor.set_backend(None)
+    report.write(args.json, 'transcribe', args, results)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Translation Memory Benchmark - Tokens and model time saved on repetitive text
+
+Translates --documents documents, each --sentences sentences drawn from
+a pool in which a few sentences are very common (Zipf-like, as in
+documentation and UI strings) and some are small edits of others, once
+with core.translation_memory off and once on. The response caches are
+off, so only segment reuse differs.
+
+The stub model (core.stub_backend) answers numbered segment prompts with
+one line per marker. It charges --latency per call, --prefill-ms per
+1000 prompt tokens and --ms-per-token per reply token, so the time
+reflects fewer calls and shorter prompts and replies.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import time
+
+# The run clears the memory: keep it off the configured on-disk store
+os.environ['TRANSLATION_MEMORY_PATH'] = ':memory:'
+
+from benchmarks import report
+from core import model_registry, response_cache, semantic_cache, stub_backend, translation_memory
+from core.stub_backend import StubModel
+
+def reply(prompt: str) -> str:
+    """Echo each numbered segment back 'translated'; plain prompts get their text"""
+    segments = re.findall(r'^\[\[(\d+)\]\] (.*)', prompt, re.MULTILINE)
+    if segments:
+        return '\n'.join(f"[[{n}]] FR: {text}" for n, text in segments)
+    body = prompt.split(':\n\n', 1)[-1].rsplit('\n\nTranslation:', 1)[0]
+    return f"FR: {body}"
+
+def corpus(rng: random.Random, args):
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9))) for _ in range(3000)]
+    pool = [' '.join(rng.choice(words) for _ in range(rng.randint(6, 20))).capitalize() + '.' for _ in range(args.pool)]
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    documents = []
+    for _ in range(args.documents):
+        sentences = []
+        for sentence in rng.choices(pool, weights, k=args.sentences):
+            if rng.random() < args.edit_rate:
+                edited = sentence.split()
+                edited[rng.randrange(len(edited))] = rng.choice(words)
+                sentence = ' '.join(edited)
+            sentences.append(sentence)
+        documents.append(' '.join(sentences))
+    return documents
+
+async def run(documents, enabled: bool, args) -> dict:
+    from neural_networks import translator_api
+    
+    translation_memory.memory.enabled = enabled
+    translation_memory.memory.clear()
+    stub_backend.clear()
+    model = StubModel(
+        latency=args.latency, distribution='fixed', seconds_per_token=args.ms_per_token / 1e3,
+        prefill_seconds_per_token=args.prefill_ms / 1e6, reply=reply
+    )
+    model_registry.clear()
+    model_registry.set_factory(lambda name, config: model)
+    
+    reports = []
+    started = time.perf_counter()
+    for document in documents:
+        result = await translator_api.translate(document, 'French', 'English', use_cache=False)
+        reports.append(result['metadata'].get('translation_memory'))
+    seconds = time.perf_counter() - started
+    return {
+        'seconds': seconds,
+        'model_calls': model.calls,
+        'prompt_tokens': stub_backend.stats()['prompt_tokens'],
+        'reports': [r for r in reports if r],
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=200)
+    parser.add_argument('--sentences', type=int, default=12, help='Sentences per document')
+    parser.add_argument('--pool', type=int, default=400, help='Distinct sentences')
+    parser.add_argument('--edit-rate', type=float, default=0.1, help='Share of sentences with one word changed')
+    parser.add_argument('--latency', type=float, default=0.02, help='Stub seconds per model call')
+    parser.add_argument('--ms-per-token', type=float, default=2.0, help='Stub milliseconds per reply token')
+    parser.add_argument('--prefill-ms', type=float, default=1.0, help='Stub milliseconds per 1000 prompt tokens')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    response_cache.cache.enabled = False
+    semantic_cache.index.enabled = False
+    documents = corpus(random.Random(args.seed), args)
+    
+    off = await run(documents, False, args)
+    on = await run(documents, True, args)
+    stats = translation_memory.memory.stats()
+    
+    print(f"{args.documents} documents x {args.sentences} sentences from a pool of {args.pool}, "
+          f"{args.edit_rate:.0%} edited\n")
+    print(f"{'memory':>7} {'model calls':>12} {'prompt tokens':>14} {'seconds':>8}")
+    for label, r in (('off', off), ('on', on)):
+        print(f"{label:>7} {r['model_calls']:>12} {r['prompt_tokens']:>14} {r['seconds']:>8.2f}")
+    print(f"\nsegments {stats['segments']}: exact {stats['exact']}, new {stats['new']} "
+          f"(fuzzy 95-99: {stats['fuzzy_95_99']}, 85-94: {stats['fuzzy_85_94']}, 75-84: {stats['fuzzy_75_84']}), "
+          f"fallbacks {stats['fallbacks']}")
+    print(f"source tokens not sent: {stats['tokens_saved_pct']}%  "
+          f"(last 50 documents: {sum(r['tokens_saved_pct'] for r in on['reports'][-50:]) / 50:.1f}%)")
+    report.write(args.json, 'translation_memory', args, {
+        **{label: {k: r[k] for k in ('seconds', 'model_calls', 'prompt_tokens')} for label, r in (('off', off), ('on', on))},
+        'memory': stats,
+    })
+
+if __name__ == "__main__":
+    asyncio.run(main())
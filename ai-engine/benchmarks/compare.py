@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Compare - Flag regressions between two benchmark result files
+
+Walks the numeric results of two --json outputs of the same benchmark
+(e.g. benchmarks.bench_micro or benchmarks.loadgen at two commits) and
+reports every metric that moved by more than --threshold in the bad
+direction. Times (*_us, *_ms, latency and lag percentiles), memory
+(*_mb) and drops or errors are lower-is-better; throughput is
+higher-is-better; counts that only describe the run are ignored.
+
+Exits with status 1 when anything regressed, for use in CI.
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from benchmarks import report
+
+HIGHER_IS_BETTER = ('throughput', 'completed')
+LOWER_IS_BETTER = ('_us', '_ms', '_mb', 'dropped', 'errors', 'seconds')
+
+def direction(path: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None to skip"""
+    parts = path.split('/')
+    if parts[-1].startswith(HIGHER_IS_BETTER):
+        return 1
+    if any(part.endswith(LOWER_IS_BETTER) or part.startswith(LOWER_IS_BETTER) for part in parts):
+        return -1
+    return None
+
+def leaves(value: Any, path: str = '') -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            yield from leaves(inner, f"{path}/{key}" if path else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield path, float(value)
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float, floor: float):
+    base_values = dict(leaves(base))
+    rows = []
+    for path, value in leaves(new):
+        sign = direction(path)
+        # An error status the base run never saw counts from zero
+        old = base_values.get(path, 0.0 if path.startswith('errors/') else None)
+        if sign is None or old is None or max(abs(old), abs(value)) < floor:
+            continue
+        change = (value - old) / abs(old) if old else float('inf')
+        if abs(change) >= threshold:
+            rows.append({
+                'metric': path,
+                'base': old,
+                'new': value,
+                'change': f"{change:+.1%}",
+                'verdict': 'regression' if change * sign < 0 else 'improvement',
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('base', help='Result file of the reference run')
+    parser.add_argument('new', help='Result file of the run to check')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change to report (0.10 = 10%%)')
+    parser.add_argument('--floor', type=float, default=1.0,
+                        help='Ignore metrics below this value in both runs (noise in tiny timings)')
+    args = parser.parse_args()
+    
+    base, new = report.load(args.base), report.load(args.new)
+    if base.get('benchmark') != new.get('benchmark'):
+        sys.exit(f"Different benchmarks: {base.get('benchmark')} vs {new.get('benchmark')}")
+    if base.get('args') != new.get('args'):
+        print("warning: runs used different arguments; differences may not be regressions\n")
+    
+    rows = compare(base['results'], new['results'], args.threshold, args.floor)
+    commits = f"{base['environment'].get('commit')} -> {new['environment'].get('commit')}"
+    if not rows:
+        print(f"{new['benchmark']} {commits}: no change beyond {args.threshold:.0%}")
+        return
+    rows.sort(key=lambda r: (r['verdict'] != 'regression', r['metric']))
+    print(f"{new['benchmark']} {commits}: changes beyond {args.threshold:.0%}\n")
+    print(report.table(rows, ['metric', 'base', 'new', 'change', 'verdict']))
+    if any(r['verdict'] == 'regression' for r in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
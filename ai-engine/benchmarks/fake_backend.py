@@ -0,0 +1,61 @@
+"""
+Fake Backend - Latency-simulating stand-in for GenerativeModel
+"""
+
+import asyncio
+import io
+import wave
+from typing import Any
+
+from core.stub_backend import StubModel
+
+class FakeResponse:
+    """Minimal response object exposing .text like the Gemini SDK"""
+    
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeModel(StubModel):
+    """
+    Synchronous model that sleeps to simulate latency
+    
+    A fixed-latency core.stub_backend.StubModel without the native async
+    method, mirroring the blocking generate_content of the Gemini SDK so
+    calls go through the thread pool. Latency is `latency` plus
+    `per_token_latency` for every ~4 characters of prompt.
+    """
+    
+    generate_content_async = None
+    
+    def __init__(self, latency: float = 0.05, reply: str = "ok", per_token_latency: float = 0.0):
+        super().__init__(
+            'fake',
+            latency=latency,
+            distribution='fixed',
+            seconds_per_token=0.0,
+            prefill_seconds_per_token=per_token_latency,
+            reply=reply
+        )
+        self.per_token_latency = per_token_latency
+
+class FakeTranscriber:
+    """
+    Async transcription backend for voice_processor.set_backend
+    
+    Sleeps `latency` plus `per_second` for every second of audio and
+    returns one placeholder word per second of audio.
+    """
+    
+    def __init__(self, latency: float = 0.2, per_second: float = 0.01):
+        self.latency = latency
+        self.per_second = per_second
+        self.calls = 0
+        self.audio_seconds = 0.0
+    
+    async def __call__(self, chunk: bytes) -> str:
+        with wave.open(io.BytesIO(chunk), 'rb') as wav:
+            seconds = wav.getnframes() / wav.getframerate()
+        self.calls += 1
+        self.audio_seconds += seconds
+        await asyncio.sleep(self.latency + self.per_second * seconds)
+        return ' '.join(f"w{self.calls}.{i}" for i in range(int(seconds)))
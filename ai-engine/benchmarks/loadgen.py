@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Load Generator - Open-loop HTTP load against the AI engine
+
+Sends a weighted mix of API requests with Poisson arrivals at each of
+--rates requests per second for --seconds. Arrivals do not wait for
+earlier responses (open loop), so a slow server builds a queue instead of
+quietly lowering the offered load; above --max-in-flight new arrivals
+are dropped and counted.
+
+By default the FastAPI app runs in this process behind httpx's ASGI
+transport with MODEL_BACKEND=stub (STUB_* settings apply; --latency
+sets the stub's median latency), so the run needs no network or key;
+event-loop lag and memory are then the server's own. With --url the
+load goes to a running server instead, and lag and memory describe the
+generator only.
+
+Per rate it reports throughput, p50/p95/p99 latency overall and per
+endpoint, time to first byte for streams (--url only; the ASGI transport
+buffers responses), error counts by status, event-loop lag and RSS.
+--json writes the same for benchmarks.compare.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from core import model_registry
+from benchmarks import report
+
+SENTENCES = [
+    "Their going to the libary tomorow to study for the exam.",
+    "The team have finished the report but it still need a final review.",
+    "Despite the rain the event was a success and everyone enjoyed themself.",
+    "Our new release improves startup time and reduces memory use.",
+    "Please send the signed contract back by the end of the week.",
+    "The museum opens at nine and closes at five on weekdays.",
+]
+
+# (name, weight, method, path, body builder, streamed)
+def workload(rng: random.Random, repeat: float) -> List[tuple]:
+    def text(words: int) -> str:
+        # A share of requests repeat a fixed text, as real traffic does (cache hits)
+        body = ' '.join(rng.choice(SENTENCES) for _ in range(words // 10 + 1))
+        return SENTENCES[0] * (words // 10 + 1) if rng.random() < repeat else f"{rng.random():.6f} {body}"
+    return [
+        ('generate', 3, '/api/generate', lambda: {'text': text(20)}, False),
+        ('proofread', 3, '/api/proofread', lambda: {'text': text(120)}, False),
+        ('proofread_incremental', 1, '/api/proofread/incremental',
+         lambda: {'document_id': f"doc-{rng.randrange(50)}", 'text': text(300)}, False),
+        ('stream_write', 2, '/api/stream/write', lambda: {'prompt': text(15), 'tone': 'casual'}, True),
+        ('stream_translate', 1, '/api/stream/translate',
+         lambda: {'text': text(80), 'target_language': 'French'}, True),
+        ('batch', 1, '/api/batch',
+         lambda: {'items': [{'operation': 'simplify', 'params': {'text': text(40)}} for _ in range(4)]}, False),
+    ]
+
+class LoopMonitor:
+    """Samples event-loop lag (oversleep of a short timer) and RSS"""
+    
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lag: List[float] = []
+        self.rss_mb: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self):
+        page_mb = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag.append(max(0.0, time.perf_counter() - started - self.interval))
+            try:
+                with open('/proc/self/statm') as f:
+                    self.rss_mb.append(int(f.read().split()[1]) * page_mb)
+            except OSError:
+                pass
+    
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+async def send(client: httpx.AsyncClient, name: str, path: str, body: Dict[str, Any], streamed: bool, record):
+    started = time.perf_counter()
+    first = None
+    try:
+        async with client.stream('POST', path, json=body) as response:
+            async for _ in response.aiter_bytes():
+                if first is None:
+                    first = time.perf_counter() - started
+            status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    record(name, status, time.perf_counter() - started, first if streamed else None)
+
+async def run_rate(client: httpx.AsyncClient, rate: float, args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    mix = workload(rng, args.repeat)
+    weights = [w for _, w, *_ in mix]
+    latencies = defaultdict(list)
+    ttfb = defaultdict(list)
+    errors = defaultdict(int)
+    tasks = set()
+    dropped = 0
+    
+    def record(name, status, seconds, first):
+        if status != 200:
+            errors[f"{name}:{status}"] += 1
+            return
+        latencies[name].append(seconds)
+        if first is not None:
+            ttfb[name].append(first)
+    
+    monitor = LoopMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    at = 0.0
+    offered = 0
+    while True:
+        at += rng.expovariate(rate)
+        if at >= args.seconds:
+            break
+        delay = start + at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name, _, path, build, streamed = rng.choices(mix, weights)[0]
+        offered += 1
+        if len(tasks) >= args.max_in_flight:
+            dropped += 1
+            continue
+        # The ASGI transport hands back the body only once it is complete
+        task = asyncio.ensure_future(send(client, name, path, build(), streamed and bool(args.url), record))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    
+    all_latencies = [s for values in latencies.values() for s in values]
+    ms = lambda values: {k: (v * 1e3 if v is not None else None) for k, v in report.percentiles(values).items()}
+    return {
+        'offered': offered,
+        'completed': len(all_latencies),
+        'dropped': dropped,
+        'errors': dict(errors),
+        'throughput': len(all_latencies) / elapsed,
+        'latency_ms': ms(all_latencies),
+        'endpoints': {
+            name: {'completed': len(values), 'latency_ms': ms(values), **({'ttfb_ms': ms(ttfb[name])} if ttfb[name] else {})}
+            for name, values in sorted(latencies.items())
+        },
+        'loop_lag_ms': {**ms(monitor.lag), 'max': max(monitor.lag, default=0.0) * 1e3},
+        'rss_mb': {'max': max(monitor.rss_mb, default=0.0), 'peak': report.peak_rss_mb()},
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rates', type=float, nargs='+', default=[20, 50, 100], help='Requests per second')
+    parser.add_argument('--seconds', type=float, default=10, help='Arrival window per rate')
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process app with the stub backend)')
+    parser.add_argument('--latency', type=float, help='Stub median model latency in seconds (in-process only)')
+    parser.add_argument('--repeat', type=float, default=0.2, help='Share of requests repeating an earlier text')
+    parser.add_argument('--max-in-flight', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+    
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=120)
+    else:
+        if args.latency is not None:
+            os.environ['STUB_LATENCY_SECONDS'] = str(args.latency)
+        model_registry.use_backend('stub')
+        import main as app_module
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url='http://loadgen', timeout=120)
+    
+    results = {}
+    print(f"{'rate':>6} {'offered':>8} {'ok':>6} {'errors':>6} {'dropped':>7} {'req/s':>7} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'lag p99':>8} {'lag max':>8} {'RSS MB':>7}")
+    for rate in args.rates:
+        r = await run_rate(client, rate, args)
+        results[f"{rate:g}"] = r
+        p = r['latency_ms']
+        fmt = lambda v: f"{v:.0f}" if v is not None else '-'
+        print(f"{rate:>6g} {r['offered']:>8} {r['completed']:>6} {sum(r['errors'].values()):>6} {r['dropped']:>7} "
+              f"{r['throughput']:>7.1f} {fmt(p['p50']):>7} {fmt(p['p95']):>7} {fmt(p['p99']):>7} "
+              f"{r['loop_lag_ms']['p99']:>8.1f} {r['loop_lag_ms']['max']:>8.1f} {r['rss_mb']['max']:>7.1f}")
+    last = results[f"{args.rates[-1]:g}"]
+    print(f"\nper endpoint at {args.rates[-1]:g} req/s:")
+    rows = [
+        {'endpoint': name, 'ok': e['completed'], **{f"{k} ms": v for k, v in e['latency_ms'].items()},
+         'ttfb p50 ms': e.get('ttfb_ms', {}).get('p50')}
+        for name, e in last['endpoints'].items()
+    ]
+    print(report.table(rows, ['endpoint', 'ok', 'p50 ms', 'p95 ms', 'p99 ms', 'ttfb p50 ms']))
+    if last['errors']:
+        print(f"errors: {last['errors']}")
+    
+    await client.aclose()
+    report.write(args.json, 'loadgen', args, results)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Report - JSON result files shared by the benchmark suite
+
+Results are written as {"benchmark", "environment", "args", "results"}
+so benchmarks.compare can diff two runs of the same benchmark.
+"""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+# Arguments that only say where results go, not how the benchmark ran
+OUTPUT_ARGS = ('json',)
+
+def percentiles(values: Sequence[float], points: Sequence[int] = (50, 95, 99)) -> Dict[str, Optional[float]]:
+    """
+    Nearest-rank percentiles
+    
+    Args:
+        values: Samples
+        points: Percentiles to report
+    
+    Returns:
+        {'p50': ..., ...}, None for each point when there are no samples
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {f'p{p}': None for p in points}
+    return {f'p{p}': ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))] for p in points}
+
+def environment() -> Dict[str, Any]:
+    """Where and on what the benchmark ran"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'argv': sys.argv[1:],
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    # VmHWM is reset by exec; ru_maxrss can carry over the forking parent's peak
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def write(path: Optional[str], benchmark: str, args: Any, results: Any) -> None:
+    """
+    Write a result file (nothing when path is None)
+    
+    Args:
+        path: Output path, or '-' for stdout
+        benchmark: Benchmark name; compare only diffs files with the same name
+        args: argparse namespace (or dict) the run used; OUTPUT_ARGS are
+            left out so runs writing to different files compare as equal
+        results: JSON-serializable results
+    """
+    if path is None:
+        return
+    used = vars(args) if not isinstance(args, dict) else args
+    document = {
+        'benchmark': benchmark,
+        'environment': environment(),
+        'args': {name: value for name, value in used.items() if name not in OUTPUT_ARGS},
+        'results': results,
+    }
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if path == '-':
+        print(text)
+        return
+    with open(path, 'w') as f:
+        f.write(text + '\n')
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def table(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    """Right-aligned text table of dict rows"""
+    cells = [[_cell(row.get(c)) for c in columns] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in cells]) for i, c in enumerate(columns)]
+    lines = [' '.join(c.rjust(w) for c, w in zip(columns, widths))]
+    lines += [' '.join(v.rjust(w) for v, w in zip(r, widths)) for r in cells]
+    return '\n'.join(lines)
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.1f}' if abs(value) >= 1 or value == 0 else f'{value:.3f}'
+    return str(value)
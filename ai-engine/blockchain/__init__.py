@@ -3,6 +3,9 @@ Blockchain Module
 Web3 integration for content verification
 """
 
+from . import merkle
+from . import content_hash
+from . import anchor_service
 from . import web3_service
 
-__all__ = ['web3_service']
+__all__ = ['merkle', 'content_hash', 'anchor_service', 'web3_service']
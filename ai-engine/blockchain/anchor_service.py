@@ -0,0 +1,493 @@
+"""
+Anchor Service - Batched Merkle-tree anchoring of content hashes
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.executor import run_blocking
+from . import merkle
+
+# A batch is anchored when it reaches this many hashes...
+BATCH_SIZE = int(os.getenv('ANCHOR_BATCH_SIZE', '4096'))
+# ...or this long after its first hash arrived, whichever comes first
+BATCH_SECONDS = float(os.getenv('ANCHOR_BATCH_SECONDS', '1.0'))
+# Tree nodes per stored row: 2 KB, small enough to stay off SQLite overflow pages
+NODES_PER_ROW = 64
+
+class ChainBackend(ABC):
+    """
+    Where batch roots are anchored
+    
+    Subclass and implement anchor() and is_anchored() to publish roots to
+    a real chain. Both are blocking; the service calls them on the worker
+    pool.
+    """
+    
+    name = 'none'
+    
+    @abstractmethod
+    def anchor(self, root: bytes, leaf_count: int) -> Dict[str, Any]:
+        """
+        Publish one batch root
+        
+        Args:
+            root: Merkle root of the batch
+            leaf_count: Hashes in the batch
+        
+        Returns:
+            Dict with at least 'transaction_id'
+        """
+    
+    @abstractmethod
+    def is_anchored(self, root: bytes, transaction_id: str) -> bool:
+        """
+        Whether the chain holds a root in the given transaction
+        
+        Args:
+            root: Merkle root from a receipt
+            transaction_id: Transaction the receipt names
+        
+        Returns:
+            True if that transaction anchored exactly this root
+        """
+
+class LocalChain(ChainBackend):
+    """
+    Append-only JSON-lines ledger of batch roots
+    
+    Every record carries the hash of the previous one, so rewriting any
+    past root breaks the chain from that point on. A transaction id is
+    the hash of its record; the roots are indexed by it in memory.
+    Appends hold an exclusive lock on the ledger file and first catch up
+    with records other processes wrote, so workers sharing a ledger
+    extend one chain instead of forking it.
+    """
+    
+    name = 'local'
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # transaction_id -> hex root of every record read or written
+        self._roots: Dict[str, str] = {}
+        self._indexed = 0
+        self._head = '0' * 64
+        self._height = 0
+        self._index_new()
+    
+    def _index_new(self) -> None:
+        """Index records appended since the last call, by any process, and move the head to the last one"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._indexed)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # still being written
+                self._indexed += len(line)
+                if line.strip():
+                    self._head = hashlib.sha256(line.rstrip(b'\n')).hexdigest()
+                    self._height += 1
+                    self._roots[f"tx_{self._head}"] = json.loads(line)['root']
+    
+    def anchor(self, root: bytes, leaf_count: int) -> Dict[str, Any]:
+        with self._lock, open(self.path, 'ab') as f:
+            # Read the head and append under one file lock, so no other process appends in between
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                self._index_new()
+                record = json.dumps({
+                    'height': self._height,
+                    'previous': self._head,
+                    'root': root.hex(),
+                    'leaf_count': leaf_count,
+                    'timestamp': time.time()
+                }, sort_keys=True).encode()
+                f.write(record + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+                self._indexed = f.tell()
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            self._head = hashlib.sha256(record).hexdigest()
+            self._height += 1
+            self._roots[f"tx_{self._head}"] = root.hex()
+            return {'transaction_id': f"tx_{self._head}", 'block_height': self._height - 1}
+    
+    def is_anchored(self, root: bytes, transaction_id: str) -> bool:
+        with self._lock:
+            if transaction_id not in self._roots:
+                # Possibly appended by another worker since
+                self._index_new()
+            return self._roots.get(transaction_id) == root.hex()
+
+class AnchorStore:
+    """
+    SQLite store of anchored batches and the position of every hash in them
+    
+    Each batch keeps its whole tree, packed into fixed-size rows, so a
+    proof is read as O(log n) nodes instead of being stored per document.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS batches ('
+            'id INTEGER PRIMARY KEY, root BLOB NOT NULL, leaf_count INTEGER NOT NULL, '
+            'blockchain TEXT NOT NULL, transaction_id TEXT NOT NULL, anchored_at REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS tree_rows ('
+            'batch_id INTEGER NOT NULL, row INTEGER NOT NULL, nodes BLOB NOT NULL, '
+            'PRIMARY KEY (batch_id, row)) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS leaves ('
+            'content_hash BLOB NOT NULL, batch_id INTEGER NOT NULL, leaf_index INTEGER NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS leaves_by_hash ON leaves (content_hash)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS certificates ('
+            'certificate_id TEXT PRIMARY KEY, content_hash BLOB NOT NULL, algorithm TEXT NOT NULL, '
+            'author TEXT NOT NULL, issued_at INTEGER NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS certificates_by_hash ON certificates (content_hash)')
+        self._conn.commit()
+    
+    def save_batch(
+        self,
+        content_hashes: List[bytes],
+        levels: List[List[bytes]],
+        blockchain: str,
+        anchor: Dict[str, Any]
+    ) -> Tuple[int, float]:
+        anchored_at = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO batches (root, leaf_count, blockchain, transaction_id, anchored_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (levels[-1][0], len(content_hashes), blockchain, anchor['transaction_id'], anchored_at)
+            )
+            batch_id = cursor.lastrowid
+            packed = merkle.pack_levels(levels)
+            row_bytes = NODES_PER_ROW * merkle.HASH_SIZE
+            self._conn.executemany(
+                'INSERT INTO tree_rows (batch_id, row, nodes) VALUES (?, ?, ?)',
+                ((batch_id, row, packed[row * row_bytes:(row + 1) * row_bytes])
+                 for row in range((len(packed) + row_bytes - 1) // row_bytes))
+            )
+            self._conn.executemany(
+                'INSERT INTO leaves (content_hash, batch_id, leaf_index) VALUES (?, ?, ?)',
+                ((h, batch_id, i) for i, h in enumerate(content_hashes))
+            )
+        return batch_id, anchored_at
+    
+    def find(self, content_hash: bytes) -> Optional[Dict[str, Any]]:
+        """Earliest anchoring of a hash, with its proof, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT l.batch_id, l.leaf_index, b.root, b.leaf_count, b.blockchain, '
+                'b.transaction_id, b.anchored_at '
+                'FROM leaves l JOIN batches b ON b.id = l.batch_id '
+                'WHERE l.content_hash = ? ORDER BY l.batch_id LIMIT 1',
+                (content_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            batch_id, index, root, leaf_count, blockchain, transaction_id, anchored_at = row
+            
+            # Read only the rows holding the sibling nodes
+            positions = merkle.proof_positions(leaf_count, index)
+            wanted = sorted({position // NODES_PER_ROW for position, _ in positions})
+            rows = dict(self._conn.execute(
+                f'SELECT row, nodes FROM tree_rows WHERE batch_id = ? '
+                f'AND row IN ({", ".join("?" * len(wanted))})',
+                (batch_id, *wanted)
+            ).fetchall()) if wanted else {}
+        
+        proof = []
+        for position, on_right in positions:
+            start = (position % NODES_PER_ROW) * merkle.HASH_SIZE
+            proof.append((rows[position // NODES_PER_ROW][start:start + merkle.HASH_SIZE].hex(), on_right))
+        return _receipt(content_hash, batch_id, index, root, proof, blockchain, transaction_id, anchored_at)
+    
+    def save_certificate(self, certificate: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO certificates (certificate_id, content_hash, algorithm, author, issued_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (certificate['certificate_id'], bytes.fromhex(certificate['content_hash']),
+                 certificate['algorithm'], certificate['author'], certificate['timestamp'])
+            )
+    
+    def find_certificates(self, content_hash: bytes) -> List[Dict[str, Any]]:
+        """Certificates issued for a hash, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT certificate_id, algorithm, author, issued_at FROM certificates '
+                'WHERE content_hash = ? ORDER BY issued_at',
+                (content_hash,)
+            ).fetchall()
+        return [
+            {'certificate_id': certificate_id, 'content_hash': content_hash.hex(),
+             'algorithm': algorithm, 'author': author, 'timestamp': issued_at}
+            for certificate_id, algorithm, author, issued_at in rows
+        ]
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches, leaves = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(leaf_count), 0) FROM batches'
+            ).fetchone()
+        return {'batches': batches, 'anchored_hashes': leaves}
+
+def _receipt(
+    content_hash: bytes,
+    batch_id: int,
+    index: int,
+    root: bytes,
+    proof: List[Tuple[str, bool]],
+    blockchain: str,
+    transaction_id: str,
+    anchored_at: float
+) -> Dict[str, Any]:
+    return {
+        'content_hash': content_hash.hex(),
+        'merkle_root': root.hex(),
+        'batch_id': batch_id,
+        'leaf_index': index,
+        'proof': [[sibling, 'right' if on_right else 'left'] for sibling, on_right in proof],
+        'blockchain': blockchain,
+        'transaction_id': transaction_id,
+        'anchored_at': int(anchored_at)
+    }
+
+def verify_receipt(receipt: Dict[str, Any], chain: Optional[ChainBackend] = None) -> bool:
+    """
+    Check a receipt's inclusion proof and that its root is on the chain
+    
+    The proof costs one hash per step but only shows the receipt is
+    self-consistent (any hash is the root of a one-leaf tree); the chain
+    must also hold the root in the receipt's transaction. Blocking: async
+    callers run it on the worker pool.
+    
+    Args:
+        receipt: Receipt returned by AnchorService.certify or lookup
+        chain: Chain to ask; defaults to the process-wide service's
+    
+    Returns:
+        True if the content hash is included under the receipt's root and
+        the chain anchored that root in the receipt's transaction
+    """
+    chain = chain or get_service().chain
+    try:
+        proof = [(bytes.fromhex(sibling), side == 'right') for sibling, side in receipt['proof']]
+        root = bytes.fromhex(receipt['merkle_root'])
+        return (
+            merkle.verify_proof(bytes.fromhex(receipt['content_hash']), proof, root)
+            and receipt['blockchain'] == chain.name
+            and chain.is_anchored(root, receipt['transaction_id'])
+        )
+    except (KeyError, TypeError, ValueError):
+        return False
+
+class AnchorService:
+    """
+    Collects content hashes and anchors them in Merkle-tree batches
+    
+    certify() waits until its hash's batch is anchored: the batch closes
+    at `batch_size` hashes or `batch_seconds` after its first hash. One
+    chain transaction and one SQLite transaction cover the whole batch.
+    """
+    
+    def __init__(
+        self,
+        store: AnchorStore,
+        chain: ChainBackend,
+        batch_size: int = BATCH_SIZE,
+        batch_seconds: float = BATCH_SECONDS
+    ):
+        self.store = store
+        self.chain = chain
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+        self.batches = 0
+        self.certified = 0
+    
+    @classmethod
+    def from_env(cls) -> 'AnchorService':
+        return cls(
+            store=AnchorStore(os.getenv('ANCHOR_DB_PATH', 'anchors.sqlite3')),
+            chain=LocalChain(os.getenv('ANCHOR_LEDGER_PATH', 'anchors.ledger')),
+        )
+    
+    def submit(self, content_hash: bytes) -> asyncio.Future:
+        """
+        Queue a raw content digest for the current batch
+        
+        Args:
+            content_hash: Raw digest (e.g. SHA-256, 32 bytes)
+        
+        Returns:
+            Future resolving to the receipt once the batch is anchored
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((content_hash, future))
+        if len(self._pending) >= self.batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_seconds, self._start_flush)
+        return future
+    
+    async def certify(self, content_hash: bytes) -> Dict[str, Any]:
+        """
+        Anchor a raw content digest and wait for its receipt
+        
+        Args:
+            content_hash: Raw digest (e.g. SHA-256, 32 bytes)
+        
+        Returns:
+            Receipt with merkle_root, leaf_index, proof and transaction_id
+        """
+        return await asyncio.shield(self.submit(content_hash))
+    
+    async def lookup(self, content_hash: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Receipt for a digest anchored earlier, or None
+        
+        Args:
+            content_hash: Raw digest
+        
+        Returns:
+            Receipt as returned by certify
+        """
+        return await run_blocking(self.store.find, content_hash)
+    
+    async def record_certificate(self, certificate: Dict[str, Any]) -> None:
+        """
+        Index a certificate by content hash for later verify_certificate calls
+        
+        Args:
+            certificate: Dict with certificate_id, content_hash (hex),
+                algorithm, author and timestamp
+        """
+        await run_blocking(self.store.save_certificate, certificate)
+    
+    async def certificates(self, content_hash: bytes) -> List[Dict[str, Any]]:
+        """
+        Certificates recorded for a digest
+        
+        Args:
+            content_hash: Raw digest
+        
+        Returns:
+            Certificate dicts, oldest first
+        """
+        return await run_blocking(self.store.find_certificates, content_hash)
+    
+    async def flush(self) -> None:
+        """Anchor whatever is pending now and wait for all batches in progress"""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+    
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._anchor(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+    
+    async def _anchor(self, batch: List[Tuple[bytes, asyncio.Future]]) -> None:
+        content_hashes = [h for h, _ in batch]
+        try:
+            receipts = await run_blocking(self._anchor_batch, content_hashes)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(Exception(f"Anchoring Error: {str(e)}"))
+            return
+        
+        self.batches += 1
+        self.certified += len(batch)
+        for (_, future), receipt in zip(batch, receipts):
+            if not future.done():
+                future.set_result(receipt)
+    
+    def _anchor_batch(self, content_hashes: List[bytes]) -> List[Dict[str, Any]]:
+        levels = merkle.build_levels(content_hashes)
+        root = levels[-1][0]
+        anchor = self.chain.anchor(root, len(content_hashes))
+        batch_id, anchored_at = self.store.save_batch(content_hashes, levels, self.chain.name, anchor)
+        
+        # Hex-encode each node once; receipts share the strings
+        hex_levels = [[node.hex() for node in level] for level in levels]
+        return [
+            _receipt(h, batch_id, i, root, merkle.proof_for(hex_levels, i),
+                     self.chain.name, anchor['transaction_id'], anchored_at)
+            for i, h in enumerate(content_hashes)
+        ]
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Batching counters and store totals
+        
+        Returns:
+            Dict of anchoring metrics
+        """
+        return {
+            'pending': len(self._pending),
+            'batches': self.batches,
+            'certified': self.certified,
+            'batch_size': self.batch_size,
+            'batch_seconds': self.batch_seconds,
+            'blockchain': self.chain.name,
+            **self.store.stats()
+        }
+
+_service: Optional[AnchorService] = None
+_service_lock = threading.Lock()
+
+def get_service() -> AnchorService:
+    """
+    Process-wide anchor service, created from ANCHOR_* settings on first use
+    
+    Returns:
+        Shared AnchorService
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = AnchorService.from_env()
+    return _service
+
+def set_service(service: Optional[AnchorService]) -> None:
+    """
+    Replace the process-wide service (e.g. another chain backend or store)
+    
+    Args:
+        service: Service to use, or None to recreate from ANCHOR_* settings
+    """
+    global _service
+    _service = service
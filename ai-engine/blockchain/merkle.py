@@ -0,0 +1,120 @@
+"""
+Merkle - Binary hash trees over content hashes with inclusion proofs
+"""
+
+import hashlib
+from typing import List, Sequence, Tuple
+
+# Domain separation (RFC 6962): a leaf can never be mistaken for an inner node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+HASH_SIZE = 32
+
+def leaf_hash(content_hash: bytes) -> bytes:
+    """
+    Tree leaf for a content digest
+    
+    Args:
+        content_hash: Raw digest of the content (32 bytes)
+    
+    Returns:
+        Leaf node hash
+    """
+    return hashlib.sha256(LEAF_PREFIX + content_hash).digest()
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def build_levels(content_hashes: Sequence[bytes]) -> List[List[bytes]]:
+    """
+    Build every level of the tree, leaves first
+    
+    An unpaired last node is carried up unchanged rather than paired with
+    itself, so no two distinct leaf lists share a root.
+    
+    Args:
+        content_hashes: Raw content digests, in leaf order
+    
+    Returns:
+        Levels from leaves to root; the last level has one node
+    """
+    if not content_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    
+    level = [leaf_hash(h) for h in content_hashes]
+    levels = [level]
+    while len(level) > 1:
+        paired = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+        levels.append(level)
+    return levels
+
+def proof_for(levels: List[List[bytes]], index: int) -> List[Tuple[bytes, bool]]:
+    """
+    Inclusion proof for one leaf
+    
+    Args:
+        levels: Output of build_levels (or the same levels with nodes
+            in another encoding, e.g. hex)
+        index: Leaf position
+    
+    Returns:
+        (sibling node, sibling is on the right) pairs from leaf to root
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append((level[sibling], sibling > index))
+        index //= 2
+    return proof
+
+def verify_proof(content_hash: bytes, proof: Sequence[Tuple[bytes, bool]], root: bytes) -> bool:
+    """
+    Check that a content digest is included under a root
+    
+    Costs one hash per proof step, i.e. O(log n) for a tree of n leaves.
+    
+    Args:
+        content_hash: Raw content digest
+        proof: Output of proof_for
+        root: Expected tree root
+    
+    Returns:
+        True if the proof leads to root
+    """
+    node = leaf_hash(content_hash)
+    for sibling, on_right in proof:
+        node = node_hash(node, sibling) if on_right else node_hash(sibling, node)
+    return node == root
+
+def pack_levels(levels: List[List[bytes]]) -> bytes:
+    """Concatenate all tree nodes, leaves first, for storage"""
+    return b''.join(b''.join(level) for level in levels)
+
+def proof_positions(leaf_count: int, index: int) -> List[Tuple[int, bool]]:
+    """
+    Where a leaf's proof nodes sit in pack_levels output
+    
+    Args:
+        leaf_count: Number of leaves in the tree
+        index: Leaf position
+    
+    Returns:
+        (node position, sibling is on the right) pairs from leaf to root;
+        node position counts HASH_SIZE-byte nodes from the start
+    """
+    positions = []
+    offset = 0
+    size = leaf_count
+    while size > 1:
+        sibling = index ^ 1
+        if sibling < size:
+            positions.append((offset + sibling, sibling > index))
+        offset += size
+        size = (size + 1) // 2
+        index //= 2
+    return positions
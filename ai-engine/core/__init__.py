@@ -0,0 +1,30 @@
+"""
+Core Module
+Shared model execution infrastructure
+"""
+
+from . import executor
+from . import metrics
+from . import model_registry
+from . import resilience
+from . import response_cache
+from . import scheduler
+from . import semantic_cache
+from . import structured_output
+from . import stub_backend
+from . import text_chunking
+from . import translation_memory
+
+__all__ = [
+    'executor',
+    'metrics',
+    'model_registry',
+    'resilience',
+    'response_cache',
+    'scheduler',
+    'semantic_cache',
+    'structured_output',
+    'stub_backend',
+    'text_chunking',
+    'translation_memory'
+]
@@ -0,0 +1,215 @@
+"""
+Executor - Non-blocking model calls for the async API layer
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from core import metrics, resilience, scheduler
+
+# Upper bound on blocking SDK calls running at the same time
+MAX_WORKERS = int(os.getenv('MODEL_MAX_WORKERS', '32'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get the shared thread pool, creating it on first use
+    
+    Returns:
+        Process-wide ThreadPoolExecutor
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MAX_WORKERS,
+            thread_name_prefix='model-call'
+        )
+    return _executor
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking callable on the shared thread pool
+    
+    Args:
+        func: Synchronous callable
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+    
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(func, *args, **kwargs)
+    )
+
+async def generate_content(model: Any, contents: Any, **kwargs) -> Any:
+    """
+    Call model.generate_content without blocking the event loop
+    
+    Uses the SDK's native coroutine when the model provides one,
+    otherwise offloads the synchronous call to the bounded thread pool.
+    Each attempt is admitted by the rate-limiting scheduler first;
+    transient failures are retried (and calls in a resilience.hedged()
+    block hedged) by core.resilience.
+    
+    Args:
+        model: GenerativeModel (or compatible) instance
+        contents: Prompt text or list of parts
+        **kwargs: Extra generate_content arguments (generation_config, ...)
+    
+    Returns:
+        The model response
+    """
+    started = metrics.model_call_started()
+    
+    async def attempt() -> Any:
+        charged = await scheduler.model_scheduler.acquire(contents)
+        native = getattr(model, 'generate_content_async', None)
+        if native is not None:
+            response = await native(contents, **kwargs)
+        else:
+            response = await run_blocking(model.generate_content, contents, **kwargs)
+        scheduler.model_scheduler.settle(charged, response)
+        return response
+    
+    response = error = None
+    try:
+        response = await resilience.call(attempt)
+        return response
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        metrics.model_call_finished(started, response, error)
+
+async def stream_content(
+    model: Any,
+    contents: Any,
+    max_buffered: int = 8,
+    **kwargs
+) -> AsyncIterator[str]:
+    """
+    Stream generated text chunks without blocking the event loop
+    
+    With the SDK's native coroutine the stream is pulled chunk by chunk.
+    Otherwise the synchronous stream is drained on the thread pool; the
+    worker stops reading once `max_buffered` chunks are waiting, and
+    stops entirely when the consumer goes away (e.g. the client
+    disconnects and the generator is closed). A transient failure before
+    the first chunk is retried; once text has been sent it is raised.
+    Like generate_content, each attempt passes the circuit breaker before
+    the scheduler charges it, and the charge is settled with the usage
+    reported on the last chunk.
+    
+    Args:
+        model: GenerativeModel (or compatible) instance
+        contents: Prompt text or list of parts
+        max_buffered: Chunks the worker may read ahead of the consumer
+        **kwargs: Extra generate_content arguments
+    
+    Yields:
+        Non-empty text chunks
+    """
+    started = metrics.model_call_started()
+    # Most recent raw chunk; the last one carries the usage of the whole stream
+    last_chunk: List[Any] = [None]
+    error = None
+    try:
+        for number in range(1, resilience.RETRY_ATTEMPTS + 1):
+            probe = resilience.breaker.before_call()
+            sent = False
+            try:
+                charged = await scheduler.model_scheduler.acquire(contents)
+                async for chunk in _stream_chunks(model, contents, max_buffered, last_chunk, **kwargs):
+                    sent = True
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                resilience.breaker.release(probe)
+                raise
+            except Exception as e:
+                resilience.breaker.record(e, probe)
+                if sent or number == resilience.RETRY_ATTEMPTS or resilience.classify(e) == resilience.FATAL:
+                    raise
+                await asyncio.sleep(resilience.backoff(number))
+                continue
+            resilience.breaker.record(None, probe)
+            scheduler.model_scheduler.settle(charged, last_chunk[0])
+            return
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        metrics.model_call_finished(started, last_chunk[0], error)
+
+async def _stream_chunks(
+    model: Any,
+    contents: Any,
+    max_buffered: int,
+    last_chunk: List[Any],
+    **kwargs
+) -> AsyncIterator[str]:
+    native = getattr(model, 'generate_content_async', None)
+    if native is not None:
+        response = await native(contents, stream=True, **kwargs)
+        async for chunk in response:
+            last_chunk[0] = chunk
+            if chunk.text:
+                yield chunk.text
+        return
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(max_buffered)
+    cancelled = threading.Event()
+    done = object()
+    
+    def produce() -> None:
+        try:
+            for chunk in model.generate_content(contents, stream=True, **kwargs):
+                last_chunk[0] = chunk
+                if not chunk.text:
+                    continue
+                # Wait for the consumer to catch up, unless it has gone away
+                while not slots.acquire(timeout=0.1):
+                    if cancelled.is_set():
+                        return
+                if cancelled.is_set():
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+            item = done
+        except Exception as e:
+            item = e
+        if not cancelled.is_set():
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+    
+    loop.run_in_executor(get_executor(), produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            slots.release()
+            yield item
+    finally:
+        cancelled.set()
+
+def shutdown(wait: bool = True) -> None:
+    """
+    Shut down the shared thread pool
+    
+    Args:
+        wait: Whether to wait for running calls to finish
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
@@ -0,0 +1,450 @@
+"""
+Metrics - Prometheus-style counters, gauges and latency histograms
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.text_chunking import CHARS_PER_TOKEN
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+ENABLED = _env_flag('METRICS_ENABLED', 'true')
+# Request header that turns on the per-request stage breakdown
+PROFILE_HEADER = os.getenv('METRICS_PROFILE_HEADER', 'X-Profile').lower()
+_PROFILE_HEADER_BYTES = PROFILE_HEADER.encode('latin-1')
+
+PREFIX = 'ai_engine'
+
+# Seconds; model calls dominate, so the upper buckets matter most
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[str, ...]
+
+class Counter:
+    """Monotonic count per label set"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, help: str, labelnames: Labels = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Labels, float] = defaultdict(float)
+    
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] += amount
+    
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        for labels, value in self._values.items():
+            yield self.name, labels, value
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+    
+    kind = 'gauge'
+    
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] -= amount
+
+class Histogram:
+    """Bucketed observations per label set, rendered cumulatively"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help: str, labelnames: Labels = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames + ('le',)
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Labels, List[float]] = {}
+    
+    def observe(self, labels: Labels, value: float) -> None:
+        counts = self._values.get(labels)
+        if counts is None:
+            counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+    
+    def totals(self) -> Dict[Labels, Tuple[int, float]]:
+        """Observation count and sum per label set"""
+        return {labels: (int(sum(counts[:-1])), counts[-1]) for labels, counts in self._values.items()}
+    
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        for labels, counts in self._values.items():
+            total = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                total += count
+                yield f"{self.name}_bucket", labels + (str(bound),), total
+            yield f"{self.name}_sum", labels, counts[-1]
+            yield f"{self.name}_count", labels, total
+
+operation_calls = Counter(f'{PREFIX}_operation_calls_total', 'Operation calls started', ('operation',))
+operation_errors = Counter(f'{PREFIX}_operation_errors_total', 'Failed operations by root exception type', ('operation', 'type'))
+operation_in_flight = Gauge(f'{PREFIX}_operation_in_flight', 'Operations currently running', ('operation',))
+operation_seconds = Histogram(f'{PREFIX}_operation_seconds', 'End-to-end operation latency', ('operation',))
+stage_seconds = Histogram(
+    f'{PREFIX}_stage_seconds',
+    'Latency per stage: prompt_build, queue, model_call, parse, first_chunk',
+    ('operation', 'stage')
+)
+# Estimated as characters / CHARS_PER_TOKEN: O(1), unlike counting words
+text_tokens = Counter(f'{PREFIX}_text_tokens_total', 'Estimated tokens of operation input and output text', ('operation', 'direction'))
+model_tokens = Counter(f'{PREFIX}_model_tokens_total', 'Prompt and reply tokens reported by the model API', ('operation', 'direction'))
+model_calls = Counter(f'{PREFIX}_model_calls_total', 'Model calls by result: ok or the root exception type', ('operation', 'result'))
+cache_lookups = Counter(f'{PREFIX}_cache_lookups_total', 'Response cache lookups by result', ('operation', 'result'))
+http_requests = Counter(f'{PREFIX}_http_requests_total', 'HTTP requests', ('method', 'route', 'status'))
+http_in_flight = Gauge(f'{PREFIX}_http_in_flight', 'HTTP requests currently being served')
+http_seconds = Histogram(f'{PREFIX}_http_request_seconds', 'HTTP latency to the end of the response', ('method', 'route'))
+
+_METRICS = (
+    operation_calls, operation_errors, operation_in_flight, operation_seconds, stage_seconds,
+    text_tokens, model_tokens, model_calls, cache_lookups, http_requests, http_in_flight, http_seconds
+)
+
+# name -> (callable returning a stats() dict, label for nested keys)
+_collectors: Dict[str, Tuple[Callable[[], Dict[str, Any]], str]] = {}
+
+class _Span:
+    __slots__ = ('operation', 'mark')
+    
+    def __init__(self, operation: str, mark: float):
+        self.operation = operation
+        # End of the last model call, or the operation start
+        self.mark = mark
+
+_span: contextvars.ContextVar[Optional[_Span]] = contextvars.ContextVar('metrics_span', default=None)
+# (name, seconds) entries for the current request when profiling is on
+_profile: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar('metrics_profile', default=None)
+
+def _operation() -> str:
+    span = _span.get()
+    return span.operation if span is not None else 'other'
+
+def _record_stage(operation: str, stage: str, seconds: float) -> None:
+    stage_seconds.observe((operation, stage), seconds)
+    trace = _profile.get()
+    if trace is not None:
+        trace.append((f"{operation}.{stage}", seconds))
+
+def _text_chars(value: Any) -> int:
+    # Top-level text only: enough for a volume signal without walking results
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(v) for v in value.values() if isinstance(v, str))
+    if isinstance(value, list):
+        return sum(len(v) for v in value if isinstance(v, str))
+    return 0
+
+def _root_cause(error: BaseException) -> BaseException:
+    # API modules re-raise as Exception(f"... Error: ..."); report what went wrong underneath
+    seen = 0
+    while seen < 8:
+        cause = error.__cause__ or error.__context__
+        if cause is None:
+            break
+        error = cause
+        seen += 1
+    return error
+
+def instrument(operation: str) -> Callable:
+    """
+    Decorator recording calls, errors, in-flight count, latency and text
+    size for an async API function or async generator
+    
+    Model calls and parsing inside the function are attributed to
+    `operation` through a context variable. With METRICS_ENABLED=false
+    the function is returned unwrapped.
+    
+    Args:
+        operation: Name used as the 'operation' label, e.g. 'translator.translate'
+    
+    Returns:
+        Decorator
+    """
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        labels = (operation,)
+        
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def stream_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                operation_calls.inc(labels)
+                operation_in_flight.inc(labels)
+                _count_input(labels, args, kwargs)
+                span = _Span(operation, started)
+                chunks = func(*args, **kwargs)
+                first = True
+                out = 0
+                try:
+                    while True:
+                        # Set the span only while the generator body runs, so it
+                        # never leaks into the consumer between chunks
+                        token = _span.set(span)
+                        try:
+                            chunk = await chunks.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            _span.reset(token)
+                        if first:
+                            _record_stage(operation, 'first_chunk', time.perf_counter() - started)
+                            first = False
+                        if isinstance(chunk, str):
+                            out += len(chunk)
+                        yield chunk
+                except BaseException as e:
+                    if isinstance(e, Exception):
+                        operation_errors.inc((operation, type(_root_cause(e)).__name__))
+                    raise
+                finally:
+                    # Closing an abandoned stream runs the body's cleanup (e.g. a
+                    # model stream recording its call), which belongs to the span
+                    token = _span.set(span)
+                    try:
+                        await chunks.aclose()
+                    finally:
+                        _span.reset(token)
+                    text_tokens.inc((operation, 'out'), out // CHARS_PER_TOKEN)
+                    operation_in_flight.dec(labels)
+                    operation_seconds.observe(labels, time.perf_counter() - started)
+            return stream_wrapper
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            operation_calls.inc(labels)
+            operation_in_flight.inc(labels)
+            _count_input(labels, args, kwargs)
+            token = _span.set(_Span(operation, started))
+            try:
+                result = await func(*args, **kwargs)
+                text_tokens.inc((operation, 'out'), _text_chars(result) // CHARS_PER_TOKEN)
+                return result
+            except Exception as e:
+                operation_errors.inc((operation, type(_root_cause(e)).__name__))
+                raise
+            finally:
+                _span.reset(token)
+                operation_in_flight.dec(labels)
+                operation_seconds.observe(labels, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+def _count_input(labels: Labels, args: tuple, kwargs: Dict[str, Any]) -> None:
+    text = args[0] if args else kwargs.get('text', kwargs.get('prompt'))
+    if isinstance(text, str):
+        text_tokens.inc(labels + ('in',), len(text) // CHARS_PER_TOKEN)
+
+def model_call_started() -> float:
+    """
+    Mark the start of a model call
+    
+    Time since the operation started (or since its previous model call
+    ended) is recorded as the 'prompt_build' stage.
+    
+    Returns:
+        perf_counter timestamp to pass to model_call_finished
+    """
+    now = time.perf_counter()
+    if ENABLED:
+        span = _span.get()
+        if span is not None:
+            _record_stage(span.operation, 'prompt_build', now - span.mark)
+    return now
+
+def model_call_finished(started: float, response: Any = None, error: Optional[BaseException] = None) -> None:
+    """
+    Record a finished model call, its result and its token usage
+    
+    Call it for failed calls too, so their latency is not lost.
+    
+    Args:
+        started: Value returned by model_call_started
+        response: Model response; usage_metadata token counts are recorded
+            when present
+        error: What the call raised, if it failed; labels the call with
+            its root exception type instead of 'ok'
+    """
+    if not ENABLED:
+        return
+    now = time.perf_counter()
+    span = _span.get()
+    operation = span.operation if span is not None else 'other'
+    _record_stage(operation, 'model_call', now - started)
+    model_calls.inc((operation, 'ok' if error is None else type(_root_cause(error)).__name__))
+    if span is not None:
+        span.mark = now
+    
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None:
+        model_tokens.inc((operation, 'in'), getattr(usage, 'prompt_token_count', 0) or 0)
+        model_tokens.inc((operation, 'out'), getattr(usage, 'candidates_token_count', 0) or 0)
+
+def record_stage(stage: str, seconds: float) -> None:
+    """
+    Record time spent in a named stage of the current operation
+    
+    Args:
+        stage: Stage name, e.g. 'queue'
+        seconds: Stage duration
+    """
+    if ENABLED:
+        _record_stage(_operation(), stage, seconds)
+
+def record_parse(operation: str, seconds: float) -> None:
+    """
+    Record time spent parsing a model reply
+    
+    Args:
+        operation: Parse operation name (attributed to the enclosing
+            instrumented operation when there is one)
+        seconds: Parse duration
+    """
+    if ENABLED:
+        span = _span.get()
+        _record_stage(span.operation if span is not None else operation, 'parse', seconds)
+
+def record_cache_lookup(hit: bool, near: bool = False) -> None:
+    """
+    Count a response cache lookup against the current operation
+    
+    Args:
+        hit: Whether a cached response was found
+        near: True for a near-duplicate lookup (core.semantic_cache)
+            made after the exact key missed
+    """
+    if ENABLED:
+        cache_lookups.inc((_operation(), ('near_' if near else '') + ('hit' if hit else 'miss')))
+
+def add_collector(name: str, stats: Callable[[], Dict[str, Any]], label: str = 'key') -> None:
+    """
+    Export a module's stats() dict as gauges at scrape time
+    
+    Numeric values become `ai_engine_<name>_<key>`; a dict of dicts (e.g.
+    per-operation counters) becomes one gauge per inner key labelled with
+    the outer key.
+    
+    Args:
+        name: Metric name component
+        stats: Callable returning the stats dict
+        label: Label name for the outer key of nested dicts
+    """
+    _collectors[name] = (stats, label)
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not values:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _collected() -> Iterable[str]:
+    for name, (stats, label) in _collectors.items():
+        try:
+            data = stats()
+        except Exception:
+            continue
+        grouped: Dict[str, List[Tuple[Labels, float]]] = defaultdict(list)
+        for key, value in data.items():
+            if isinstance(value, dict):
+                for inner, number in value.items():
+                    if isinstance(number, (int, float)):
+                        grouped[f"{PREFIX}_{name}_{inner}"].append(((key,), float(number)))
+            elif isinstance(value, (int, float)):
+                grouped[f"{PREFIX}_{name}_{key}"].append(((), float(value)))
+        for metric, samples in grouped.items():
+            yield f"# TYPE {metric} gauge"
+            for labels, value in samples:
+                yield f"{metric}{_format_labels((label,), labels)} {_format_value(value)}"
+
+def render() -> str:
+    """
+    Current metrics in the Prometheus text exposition format (0.0.4)
+    
+    Returns:
+        Exposition text
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in list(metric.samples()):
+            names = metric.labelnames if len(labels) == len(metric.labelnames) else metric.labelnames[:-1]
+            lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+    lines.extend(_collected())
+    return '\n'.join(lines) + '\n'
+
+def _server_timing(trace: List[Tuple[str, float]], total: float) -> bytes:
+    merged: Dict[str, List[float]] = {}
+    for name, seconds in trace:
+        entry = merged.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = [f'{name};dur={seconds * 1000:.2f};desc="x{count}"' for name, (seconds, count) in merged.items()]
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts).encode('latin-1')
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests per route and status
+    
+    A request carrying the profile header (X-Profile: 1 by default) gets a
+    Server-Timing response header with the time spent in each operation
+    stage so far. Streaming responses send headers before the body, so
+    they report only the stages finished by then.
+    """
+    
+    def __init__(self, app: Callable):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        trace = None
+        for name, value in scope['headers']:
+            if name == _PROFILE_HEADER_BYTES and value not in (b'', b'0', b'false'):
+                trace = []
+                break
+        token = _profile.set(trace)
+        status = 500
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if trace is not None:
+                    message['headers'] = list(message.get('headers', [])) + [
+                        (b'server-timing', _server_timing(trace, time.perf_counter() - started))
+                    ]
+            await send(message)
+        
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _profile.reset(token)
+            http_in_flight.dec()
+            # FastAPI leaves the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            method = scope['method']
+            http_requests.inc((method, route, str(status)))
+            http_seconds.observe((method, route), time.perf_counter() - started)
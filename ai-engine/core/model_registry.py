@@ -0,0 +1,209 @@
+"""
+Model Registry - Process-wide cache of configured model clients
+
+Clients come from the backend named by MODEL_BACKEND: 'gemini' (the
+google-generativeai SDK) or 'stub' (core.stub_backend, offline). Any
+object with the GenerativeModel call surface works as a client:
+generate_content(contents, stream=False, **kwargs) and/or an async
+generate_content_async, returning a response with .text (and optionally
+.usage_metadata), or for stream=True an iterable of such chunks.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import google.generativeai as genai
+
+DEFAULT_MODEL = os.getenv('DEFAULT_MODEL', 'gemini-2.0-flash-exp')
+
+# Backend building model clients (see register_backend)
+BACKEND = os.getenv('MODEL_BACKEND', 'gemini').strip().lower()
+
+# Features that can be pointed at a different model with MODEL_<FEATURE>
+FEATURES = (
+    'prompt',
+    'writer',
+    'rewriter',
+    'translator',
+    'summarizer',
+    'proofreader',
+    'ocr',
+    'vision',
+    'voice',
+)
+
+# Generation config for operations whose output should be reproducible
+DETERMINISTIC: Dict[str, Any] = {'temperature': 0}
+
+# Deterministic config that asks the model for a JSON reply
+JSON_OUTPUT: Dict[str, Any] = {'temperature': 0, 'response_mime_type': 'application/json'}
+
+# JSON reply at the model's default temperature, for varied suggestions
+JSON_MODE: Dict[str, Any] = {'response_mime_type': 'application/json'}
+
+# Distinct (model, generation_config) pairs kept alive at once
+MAX_ENTRIES = int(os.getenv('MODEL_REGISTRY_SIZE', '64'))
+
+ModelFactory = Callable[[str, Optional[Dict[str, Any]]], Any]
+
+def _gemini_factory(model_name: str, generation_config: Optional[Dict[str, Any]]) -> Any:
+    return genai.GenerativeModel(model_name, generation_config=generation_config)
+
+def _stub_factory(model_name: str, generation_config: Optional[Dict[str, Any]]) -> Any:
+    from core.stub_backend import StubModel
+    return StubModel.from_env(model_name, generation_config)
+
+_backends: Dict[str, ModelFactory] = {'gemini': _gemini_factory, 'stub': _stub_factory}
+
+def register_backend(name: str, factory: ModelFactory) -> None:
+    """
+    Make a model backend selectable with MODEL_BACKEND or use_backend()
+    
+    Args:
+        name: Backend name
+        factory: Callable taking (model_name, generation_config) and
+                 returning a model client
+    """
+    _backends[name] = factory
+
+def use_backend(name: str) -> None:
+    """
+    Switch every feature to a registered backend
+    
+    Args:
+        name: Backend name ('gemini', 'stub' or a registered one)
+    
+    Raises:
+        ValueError: If no backend has that name
+    """
+    global BACKEND
+    if name not in _backends:
+        raise ValueError(f"Unknown model backend: {name}")
+    BACKEND = name
+    set_factory(None)
+
+def _default_factory(model_name: str, generation_config: Optional[Dict[str, Any]]) -> Any:
+    factory = _backends.get(BACKEND)
+    if factory is None:
+        raise ValueError(f"Unknown model backend: {BACKEND}")
+    return factory(model_name, generation_config)
+
+_factory: ModelFactory = _default_factory
+_models: 'OrderedDict[Tuple[str, Any], Any]' = OrderedDict()
+_model_names: Dict[str, str] = {}
+_lock = threading.Lock()
+
+def model_name_for(feature: str) -> str:
+    """
+    Resolve the model name configured for a feature
+    
+    Args:
+        feature: Feature name (see FEATURES)
+    
+    Returns:
+        MODEL_<FEATURE> if set, otherwise DEFAULT_MODEL
+    """
+    name = _model_names.get(feature)
+    if name is None:
+        name = os.getenv(f'MODEL_{feature.upper()}', DEFAULT_MODEL)
+        _model_names[feature] = name
+    return name
+
+def _config_key(generation_config: Optional[Dict[str, Any]]) -> Any:
+    if not generation_config:
+        return ()
+    try:
+        return tuple(sorted(generation_config.items()))
+    except TypeError:
+        # Unorderable/unhashable values (e.g. nested lists); fall back to text
+        return json.dumps(generation_config, sort_keys=True, default=str)
+
+def get_model(
+    feature: str,
+    generation_config: Optional[Dict[str, Any]] = None
+) -> Any:
+    """
+    Get a shared model client for a feature
+    
+    Clients are built once per (model name, generation config) and reused
+    across requests; the oldest entry is dropped once MAX_ENTRIES is
+    exceeded.
+    
+    Args:
+        feature: Feature name (see FEATURES)
+        generation_config: Optional generation parameters baked into the client
+    
+    Returns:
+        Configured model client
+    """
+    model_name = model_name_for(feature)
+    key = (model_name, _config_key(generation_config))
+    
+    model = _models.get(key)
+    if model is not None:
+        return model
+    
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+        
+        model = _factory(model_name, generation_config or None)
+        _models[key] = model
+        if len(_models) > MAX_ENTRIES:
+            _models.popitem(last=False)
+        return model
+
+def warm_up(features: Iterable[str] = FEATURES) -> int:
+    """
+    Build the default client for each feature ahead of the first request
+    
+    Args:
+        features: Features to warm
+    
+    Returns:
+        Number of cached clients after warming
+    """
+    for feature in features:
+        get_model(feature)
+    return len(_models)
+
+def set_factory(factory: Optional[ModelFactory]) -> None:
+    """
+    Replace the function used to build model clients
+    
+    Clears the registry so every client is rebuilt with the new factory.
+    
+    Args:
+        factory: Callable taking (model_name, generation_config), or None
+                 to restore the MODEL_BACKEND factory
+    """
+    global _factory
+    with _lock:
+        _factory = factory or _default_factory
+        _models.clear()
+        _model_names.clear()
+
+def clear() -> None:
+    """Drop all cached clients and re-read MODEL_<FEATURE> overrides"""
+    with _lock:
+        _models.clear()
+        _model_names.clear()
+
+def stats() -> Dict[str, Any]:
+    """
+    Describe the registry contents
+    
+    Returns:
+        Dict with backend, entry count and cached model names
+    """
+    with _lock:
+        return {
+            'backend': BACKEND if _factory is _default_factory else 'custom',
+            'entries': len(_models),
+            'max_entries': MAX_ENTRIES,
+            'models': sorted({name for name, _ in _models})
+        }
@@ -0,0 +1,326 @@
+"""
+Resilience - Retries, hedging and circuit breaking for model calls
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Error classes
+RETRYABLE = 'retryable'        # transient backend failure; retry, counts against the breaker
+RATE_LIMITED = 'rate_limited'  # upstream 429; retry, but the backend itself is healthy
+FATAL = 'fatal'                # the request itself is bad; retrying cannot help
+
+# HTTP statuses (google.api_core exceptions carry them as .code) worth retrying
+_RETRYABLE_STATUS = {408, 500, 502, 503, 504}
+
+# Total attempts per call, including the first
+RETRY_ATTEMPTS = int(os.getenv('MODEL_RETRY_ATTEMPTS', '3'))
+RETRY_BASE_SECONDS = float(os.getenv('MODEL_RETRY_BASE_SECONDS', '0.5'))
+RETRY_MAX_SECONDS = float(os.getenv('MODEL_RETRY_MAX_SECONDS', '8'))
+
+HEDGE_ENABLED = _env_flag('MODEL_HEDGE_ENABLED', 'true')
+# A hedged call sends a second request once the first has run longer than
+# this quantile of recent hedged-call latencies (never sooner than the floor)
+HEDGE_QUANTILE = float(os.getenv('MODEL_HEDGE_QUANTILE', '0.95'))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv('MODEL_HEDGE_MIN_DELAY_SECONDS', '0.05'))
+HEDGE_WINDOW = 200
+
+_hedged: contextvars.ContextVar[bool] = contextvars.ContextVar('resilience_hedged', default=False)
+
+class ModelUnavailable(Exception):
+    """The circuit breaker is open; the backend is not being called"""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def classify(error: BaseException) -> str:
+    """
+    Classify a model call failure
+    
+    Args:
+        error: Exception raised by the backend
+    
+    Returns:
+        RETRYABLE, RATE_LIMITED or FATAL
+    """
+    status = getattr(error, 'code', None)
+    if status == 429:
+        return RATE_LIMITED
+    if isinstance(status, int) and status in _RETRYABLE_STATUS:
+        return RETRYABLE
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return RETRYABLE
+    return FATAL
+
+def unavailable_error(error: BaseException) -> Optional[ModelUnavailable]:
+    """
+    Find a ModelUnavailable behind the API modules' generic error wrappers
+    
+    Args:
+        error: Exception raised by an API function
+    
+    Returns:
+        The ModelUnavailable in its cause chain, or None
+    """
+    for _ in range(8):
+        if error is None:
+            return None
+        if isinstance(error, ModelUnavailable):
+            return error
+        error = error.__cause__ or error.__context__
+    return None
+
+def backoff(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff
+    
+    Args:
+        attempt: Number of attempts that have failed so far (1 = first retry)
+    
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+
+@contextmanager
+def hedged() -> Iterator[None]:
+    """
+    Hedge model calls made inside the block
+    
+    Meant for short, latency-sensitive calls: a slow call is raced against
+    a duplicate and the first answer wins, at the price of extra quota.
+    """
+    token = _hedged.set(True)
+    try:
+        yield
+    finally:
+        _hedged.reset(token)
+
+class CircuitBreaker:
+    """
+    Fails model calls fast while the backend is unhealthy
+    
+    Closed: calls go through; `failures` consecutive retryable failures
+    open the breaker. Open: calls raise ModelUnavailable for
+    `reset_seconds`. Half-open: one probe call goes through; its success
+    closes the breaker, its failure opens it again.
+    """
+    
+    def __init__(self, enabled: bool = True, failures: int = 5, reset_seconds: float = 30):
+        self.enabled = enabled
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._stats = {'opened': 0, 'rejected': 0}
+    
+    @classmethod
+    def from_env(cls) -> 'CircuitBreaker':
+        return cls(
+            enabled=_env_flag('MODEL_BREAKER_ENABLED', 'true'),
+            failures=int(os.getenv('MODEL_BREAKER_FAILURES', '5')),
+            reset_seconds=float(os.getenv('MODEL_BREAKER_RESET_SECONDS', '30'))
+        )
+    
+    def before_call(self) -> bool:
+        """
+        Admit a call or fail fast
+        
+        Returns:
+            Whether the call is the half-open probe, to pass to record()
+        
+        Raises:
+            ModelUnavailable: While open, or while the half-open probe is out
+        """
+        if not self.enabled or self.state == 'closed':
+            return False
+        now = time.monotonic()
+        if self.state == 'open' and now - self._opened_at >= self.reset_seconds:
+            self.state = 'half_open'
+        if self.state == 'half_open' and not self._probing:
+            self._probing = True
+            return True
+        self._stats['rejected'] += 1
+        raise ModelUnavailable(
+            "Model backend unavailable; failing fast after repeated errors",
+            retry_after=max(0.0, self._opened_at + self.reset_seconds - now)
+        )
+    
+    def record(self, error: Optional[BaseException], probe: bool = False) -> None:
+        """
+        Record the outcome of an admitted call
+        
+        Args:
+            error: The failure, or None on success. Only RETRYABLE errors
+                count against the backend.
+            probe: Value returned by before_call
+        """
+        if not self.enabled:
+            return
+        if probe:
+            self._probing = False
+        if error is None or classify(error) != RETRYABLE:
+            # Any answer from the backend counts as healthy; a call admitted
+            # before the breaker opened does not close it, only the probe does
+            self._consecutive = 0
+            if probe:
+                self.state = 'closed'
+            return
+        self._consecutive += 1
+        if probe or self._consecutive >= self.failures:
+            if self.state != 'open':
+                self._stats['opened'] += 1
+            self.state = 'open'
+            self._opened_at = time.monotonic()
+    
+    def release(self, probe: bool) -> None:
+        """Forget an admitted call that was cancelled before finishing"""
+        if probe:
+            self._probing = False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'open': int(self.state == 'open'),
+            'half_open': int(self.state == 'half_open'),
+            'consecutive_failures': self._consecutive,
+            **self._stats
+        }
+
+class _HedgeDelay:
+    """Rolling latency quantile of hedged calls"""
+    
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+    
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+    
+    def get(self) -> float:
+        if len(self.samples) < 20:
+            # Too little history to know what slow means; wait a generous floor
+            return max(HEDGE_MIN_DELAY_SECONDS, max(self.samples, default=1.0))
+        ordered = sorted(self.samples)
+        return max(HEDGE_MIN_DELAY_SECONDS, ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_QUANTILE))])
+
+breaker = CircuitBreaker.from_env()
+_hedge_delay = _HedgeDelay(HEDGE_WINDOW)
+_stats = {'retries': 0, 'rate_limit_retries': 0, 'hedges': 0, 'hedge_wins': 0, 'gave_up': 0}
+
+async def call(attempt: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run a model call with retries, optional hedging and the circuit breaker
+    
+    Retryable and rate-limited failures are retried up to RETRY_ATTEMPTS
+    times with full-jitter exponential backoff; anything else is raised
+    at once. Inside a hedged() block each attempt is hedged.
+    
+    Args:
+        attempt: Zero-argument coroutine function making one backend call
+    
+    Returns:
+        The first successful result
+    
+    Raises:
+        ModelUnavailable: If the circuit breaker is open
+        Exception: The last failure once retries are exhausted, or the
+            first non-retryable one
+    """
+    hedge = HEDGE_ENABLED and _hedged.get()
+    for number in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            if hedge:
+                return await _hedged_attempt(attempt)
+            return await _guarded(attempt)
+        except ModelUnavailable:
+            raise
+        except Exception as e:
+            kind = classify(e)
+            if kind == FATAL or number == RETRY_ATTEMPTS:
+                if kind != FATAL:
+                    _stats['gave_up'] += 1
+                raise
+            _stats['rate_limit_retries' if kind == RATE_LIMITED else 'retries'] += 1
+            await asyncio.sleep(backoff(number))
+
+async def _guarded(attempt: Callable[[], Awaitable[T]]) -> T:
+    probe = breaker.before_call()
+    try:
+        result = await attempt()
+    except asyncio.CancelledError:
+        breaker.release(probe)
+        raise
+    except Exception as e:
+        breaker.record(e, probe)
+        raise
+    breaker.record(None, probe)
+    return result
+
+async def _hedged_attempt(attempt: Callable[[], Awaitable[T]]) -> T:
+    started = time.perf_counter()
+    first = asyncio.ensure_future(_guarded(attempt))
+    done, _ = await asyncio.wait({first}, timeout=_hedge_delay.get())
+    if done:
+        result = first.result()
+        _hedge_delay.add(time.perf_counter() - started)
+        return result
+    
+    if breaker.enabled and breaker.state != 'closed':
+        # No duplicate load on a backend that is already failing
+        return await first
+    _stats['hedges'] += 1
+    second = asyncio.ensure_future(_guarded(attempt))
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        _stats['hedge_wins'] += 1
+                    # Only the unhedged duration says what a normal call takes
+                    if task is first:
+                        _hedge_delay.add(time.perf_counter() - started)
+                    return task.result()
+        # Both failed; surface the original request's error
+        return first.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+def stats() -> Dict[str, Any]:
+    """
+    Retry, hedging and circuit breaker counters
+    
+    Returns:
+        Dict with retries, rate_limit_retries, hedges, hedge_wins, gave_up
+        (retryable failures surfaced after the last attempt), the current
+        hedge delay and the breaker state
+    """
+    return {
+        **_stats,
+        'hedge_delay_seconds': round(_hedge_delay.get(), 4),
+        **{f'breaker_{key}': value for key, value in breaker.stats().items()}
+    }
+
+def clear() -> None:
+    """Reset counters, hedge history and the circuit breaker"""
+    global breaker
+    for key in _stats:
+        _stats[key] = 0
+    _hedge_delay.samples.clear()
+    breaker = CircuitBreaker.from_env()
@@ -0,0 +1,288 @@
+"""
+Response Cache - Content-addressed cache for deterministic model calls
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core import metrics
+from core.executor import run_blocking
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize input so trivially different encodings share a cache entry
+    
+    Args:
+        text: Raw input text
+    
+    Returns:
+        NFC-normalized text with unified line endings and outer whitespace stripped
+    """
+    text = unicodedata.normalize('NFC', text)
+    return text.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+def make_key(
+    operation: str,
+    text: str,
+    params: Optional[Dict[str, Any]] = None,
+    model: str = '',
+    temperature: float = 0.0,
+    normalize: bool = True
+) -> Optional[str]:
+    """
+    Build the cache key for a model call
+    
+    Args:
+        operation: Operation name, e.g. 'proofreader.auto_fix'
+        text: Input text (normalized before hashing)
+        params: Other arguments that change the output
+        model: Model name serving the call
+        temperature: Sampling temperature of the call
+        normalize: Set False for results that point into the text (character
+            offsets), which only hold for the exact input
+    
+    Returns:
+        Hex digest, or None when the call is not deterministic enough to cache
+    """
+    if temperature > 0:
+        return None
+    
+    payload = json.dumps(
+        [operation, normalize_text(text) if normalize else text, params or {}, model],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class MemoryTier:
+    """LRU cache of JSON-encoded values with TTL and byte-size eviction (UTF-8 bytes)"""
+    
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.evictions = 0
+        # key -> (value, expires_at, UTF-8 size of value)
+        self._entries: 'OrderedDict[str, Tuple[str, float, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: str, expires_at: Optional[float] = None) -> None:
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at or time.time() + self.ttl, size)
+            self.bytes += size
+            
+            while self._entries and (
+                self.bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+class SQLiteTier:
+    """On-disk cache tier shared across restarts and worker processes"""
+    
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            return row
+    
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, time.time() + self.ttl)
+            )
+            self._conn.commit()
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+
+class ResponseCache:
+    """
+    Two-tier response cache: in-memory LRU in front of optional SQLite
+    
+    Values must be JSON-serializable; they are stored encoded so callers
+    can mutate what they get back without corrupting the cache.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl: float = 3600,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        db_path: Optional[str] = None
+    ):
+        self.enabled = enabled
+        self.memory = MemoryTier(max_entries, max_bytes, ttl)
+        self.disk = SQLiteTier(db_path, ttl) if db_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+    
+    @classmethod
+    def from_env(cls) -> 'ResponseCache':
+        return cls(
+            enabled=_env_flag('CACHE_ENABLED', 'true'),
+            ttl=float(os.getenv('CACHE_TTL_SECONDS', '3600')),
+            max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '10000')),
+            max_bytes=int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+            db_path=os.getenv('CACHE_DB_PATH') or None
+        )
+    
+    async def get(self, key: Optional[str], use_cache: bool = True) -> Optional[Any]:
+        """
+        Look up a cached response
+        
+        Args:
+            key: Key from make_key (None means uncacheable)
+            use_cache: False to bypass the cache for this call
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        if not self.enabled or key is None:
+            return None
+        if not use_cache:
+            self.bypassed += 1
+            return None
+        
+        value = await self.read(key)
+        if value is None:
+            self.misses += 1
+            metrics.record_cache_lookup(False)
+            return None
+        
+        self.hits += 1
+        metrics.record_cache_lookup(True)
+        return value
+    
+    async def read(self, key: str) -> Optional[Any]:
+        """
+        Read a stored response without counting a lookup
+        
+        Args:
+            key: Key from make_key
+        
+        Returns:
+            Cached value, or None when absent or expired
+        """
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            row = await run_blocking(self.disk.get, key)
+            if row is not None:
+                value = row[0]
+                self.memory.set(key, value, row[1])
+                self.disk_hits += 1
+        return json.loads(value) if value is not None else None
+    
+    async def set(self, key: Optional[str], value: Any) -> None:
+        """
+        Store a response
+        
+        Args:
+            key: Key from make_key (None means uncacheable)
+            value: JSON-serializable response
+        """
+        if not self.enabled or key is None:
+            return
+        
+        encoded = json.dumps(value, ensure_ascii=False)
+        self.memory.set(key, encoded)
+        if self.disk is not None:
+            await run_blocking(self.disk.set, key, encoded)
+    
+    def clear(self) -> None:
+        """Drop every cached response from both tiers"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report hit/miss counters and tier usage
+        
+        Returns:
+            Dict of cache metrics
+        """
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self.memory),
+            'bytes': self.memory.bytes,
+            'evictions': self.memory.evictions,
+            'disk_enabled': self.disk is not None
+        }
+
+# Process-wide cache used by the API modules
+cache = ResponseCache.from_env()
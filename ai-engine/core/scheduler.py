@@ -0,0 +1,435 @@
+"""
+Scheduler - Rate limiting, priorities and fair queueing for model calls
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from core import metrics
+from core.text_chunking import estimate_tokens
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Priority classes, most urgent first; a class is only served when every
+# class before it has nothing waiting
+PRIORITIES = ('interactive', 'normal', 'batch')
+
+# Token cost charged for a non-text part (Gemini bills an image as 258 tokens)
+MEDIA_PART_TOKENS = 258
+
+# Header identifying the caller for fair sharing; the client address is used without it
+TENANT_HEADER = os.getenv('RATE_LIMIT_TENANT_HEADER', 'X-API-Key').lower()
+_TENANT_HEADER_BYTES = TENANT_HEADER.encode('latin-1')
+
+# Tenants whose share is remembered while they have nothing queued
+MAX_IDLE_TENANTS = 10000
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar('scheduler_priority', default='normal')
+_tenant: contextvars.ContextVar[str] = contextvars.ContextVar('scheduler_tenant', default='default')
+
+class QuotaExceeded(Exception):
+    """A model call could not be admitted before its queueing deadline"""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def quota_error(error: BaseException) -> Optional[QuotaExceeded]:
+    """
+    Find a QuotaExceeded behind the API modules' generic error wrappers
+    
+    Args:
+        error: Exception raised by an API function
+    
+    Returns:
+        The QuotaExceeded in its cause chain, or None
+    """
+    for _ in range(8):
+        if error is None:
+            return None
+        if isinstance(error, QuotaExceeded):
+            return error
+        error = error.__cause__ or error.__context__
+    return None
+
+@contextmanager
+def priority(name: str) -> Iterator[None]:
+    """
+    Run model calls made inside the block at a priority class
+    
+    Args:
+        name: One of PRIORITIES
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority class: {name}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+@contextmanager
+def tenant(name: str) -> Iterator[None]:
+    """
+    Attribute model calls made inside the block to a tenant for fair sharing
+    
+    Args:
+        name: Tenant identifier, e.g. the caller's API key
+    """
+    token = _tenant.set(name)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+def estimate_cost(contents: Any) -> int:
+    """
+    Estimate the prompt tokens of generate_content contents
+    
+    Args:
+        contents: Prompt text or list of parts
+    
+    Returns:
+        Approximate token count
+    """
+    if isinstance(contents, str):
+        return estimate_tokens(contents)
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_cost(part) if isinstance(part, str) else MEDIA_PART_TOKENS for part in contents)
+    return MEDIA_PART_TOKENS
+
+class TokenBucket:
+    """Refills at `rate` per second up to `capacity`; may run into debt"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` (capped at capacity) can be taken"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+    
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= amount
+    
+    def adjust(self, amount: float) -> None:
+        """Refund (positive) or charge (negative) after the real cost is known"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class _Waiter:
+    __slots__ = ('cost', 'tenant', 'priority', 'deadline', 'enqueued', 'future')
+    
+    def __init__(self, cost: int, tenant: str, priority: str, deadline: float, future: asyncio.Future):
+        self.cost = cost
+        self.tenant = tenant
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.future = future
+
+class ModelScheduler:
+    """
+    Admission control in front of the model backend
+    
+    Every call takes one request from a request bucket and its estimated
+    tokens (prompt plus `reply_tokens`) from a token bucket; the estimate
+    is corrected from the response's usage metadata. Each bucket holds
+    `burst_seconds` worth of its limit and refills with the rest, so no
+    `window_seconds` span admits more than the limit.
+    Calls that cannot run yet queue by priority class; within a class,
+    the tenant that has been admitted the fewest tokens goes next. A call
+    whose predicted or actual wait passes its class deadline fails with
+    QuotaExceeded instead of reaching the backend and getting a 429.
+    Limits must be positive; to run without limits, disable the scheduler.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = True,
+        requests_per_window: float = 60,
+        tokens_per_window: float = 1_000_000,
+        window_seconds: float = 60,
+        burst_seconds: float = 5,
+        reply_tokens: int = 256,
+        deadlines: Optional[Dict[str, float]] = None
+    ):
+        for name, value in (
+            ('requests_per_window', requests_per_window),
+            ('tokens_per_window', tokens_per_window),
+            ('window_seconds', window_seconds),
+            ('burst_seconds', burst_seconds)
+        ):
+            if value <= 0:
+                raise ValueError(f"Rate limit {name} must be positive, got {value} (set RATE_LIMIT_ENABLED=false to disable)")
+        self.enabled = enabled
+        self.requests = self._bucket(requests_per_window, window_seconds, burst_seconds)
+        self.tokens = self._bucket(tokens_per_window, window_seconds, burst_seconds)
+        self.reply_tokens = reply_tokens
+        self.deadlines = {'interactive': 5.0, 'normal': 30.0, 'batch': 300.0, **(deadlines or {})}
+        # priority -> tenant -> FIFO of waiters
+        self._queues: Dict[str, 'OrderedDict[str, Deque[_Waiter]]'] = {p: OrderedDict() for p in PRIORITIES}
+        # tenant -> tokens admitted (virtual time for fair sharing)
+        self._served: Dict[str, float] = {}
+        # priority -> tenant -> [waiters, tokens] queued, for wait prediction
+        self._backlog: Dict[str, Dict[str, list]] = {p: {} for p in PRIORITIES}
+        self._waiting = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._stats = {'admitted': 0, 'queued': 0, 'rejected': 0, 'expired': 0, 'wait_seconds': 0.0}
+    
+    @classmethod
+    def from_env(cls) -> 'ModelScheduler':
+        return cls(
+            enabled=_env_flag('RATE_LIMIT_ENABLED', 'false'),
+            requests_per_window=float(os.getenv('REQUESTS_PER_MINUTE', '60')),
+            tokens_per_window=float(os.getenv('TOKENS_PER_MINUTE', '1000000')),
+            window_seconds=60,
+            burst_seconds=float(os.getenv('RATE_LIMIT_BURST_SECONDS', '5')),
+            reply_tokens=int(os.getenv('RATE_LIMIT_REPLY_TOKENS', '256')),
+            deadlines={
+                p: float(os.getenv(f'RATE_LIMIT_{p.upper()}_DEADLINE_SECONDS', default))
+                for p, default in (('interactive', '5'), ('normal', '30'), ('batch', '300'))
+            }
+        )
+    
+    async def acquire(self, contents: Any) -> int:
+        """
+        Wait until a model call may be sent
+        
+        Priority and tenant come from the priority() and tenant() blocks
+        the call is made in.
+        
+        Args:
+            contents: Prompt text or list of parts, for the token estimate
+        
+        Returns:
+            Tokens charged, to pass to settle()
+        
+        Raises:
+            QuotaExceeded: If the call cannot be admitted before its deadline
+        """
+        if not self.enabled:
+            return 0
+        
+        cost = estimate_cost(contents) + self.reply_tokens
+        now = time.monotonic()
+        tenant_name = _tenant.get()
+        if not self._waiting and self._ready(cost, now):
+            self._admit(cost, tenant_name, now)
+            return cost
+        
+        class_name = _priority.get()
+        deadline = now + self.deadlines[class_name]
+        predicted = self._predicted_wait(cost, class_name, tenant_name, now)
+        if now + predicted > deadline:
+            self._stats['rejected'] += 1
+            raise QuotaExceeded(
+                f"Model rate limit reached; {class_name} queue wait would be {predicted:.1f}s",
+                retry_after=predicted
+            )
+        
+        waiter = _Waiter(cost, tenant_name, class_name, deadline, asyncio.get_running_loop().create_future())
+        self._enqueue(waiter)
+        self._stats['queued'] += 1
+        try:
+            # A cancelled (timed out or abandoned) waiter is dropped by the dispatcher
+            await asyncio.wait_for(waiter.future, timeout=deadline - now)
+        except asyncio.TimeoutError:
+            self._stats['expired'] += 1
+            raise QuotaExceeded(
+                f"Model rate limit reached; {class_name} call waited past its deadline",
+                retry_after=self._predicted_wait(cost, class_name, tenant_name, time.monotonic())
+            )
+        waited = time.monotonic() - waiter.enqueued
+        self._stats['wait_seconds'] += waited
+        metrics.record_stage('queue', waited)
+        return cost
+    
+    def settle(self, charged: int, response: Any = None) -> None:
+        """
+        Correct the token bucket with the usage the model reported
+        
+        Args:
+            charged: Value returned by acquire
+            response: Model response (usage_metadata.total_token_count is used)
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        actual = getattr(usage, 'total_token_count', None) if usage is not None else None
+        if charged and actual:
+            self.tokens.adjust(charged - actual)
+    
+    @staticmethod
+    def _bucket(limit: float, window: float, burst_seconds: float) -> TokenBucket:
+        capacity = min(limit, max(1.0, limit * burst_seconds / window))
+        # A limit too small to split keeps the full rate (one extra call per window at worst)
+        refill = limit - capacity if limit > capacity else limit
+        return TokenBucket(refill / window, capacity)
+    
+    def _ready(self, cost: int, now: float) -> bool:
+        return self.requests.wait_time(1, now) <= 0 and self.tokens.wait_time(cost, now) <= 0
+    
+    def _admit(self, cost: int, tenant_name: str, now: float) -> None:
+        self.requests.take(1, now)
+        self.tokens.take(cost, now)
+        self._served[tenant_name] = self._served.get(tenant_name, 0.0) + cost
+        self._stats['admitted'] += 1
+    
+    def _predicted_wait(self, cost: int, class_name: str, tenant_name: str, now: float) -> float:
+        # Everything queued in a more urgent class is served first; within the
+        # class, fair ordering lets each other tenant go at most one call more
+        # than this tenant has queued before this call
+        ahead_requests, ahead_tokens = 1, cost
+        for name in PRIORITIES[:PRIORITIES.index(class_name)]:
+            for count, tokens in self._backlog[name].values():
+                ahead_requests += count
+                ahead_tokens += tokens
+        own = self._backlog[class_name].get(tenant_name, (0, 0))[0]
+        for count, tokens in self._backlog[class_name].values():
+            share = min(count, own + 1)
+            ahead_requests += share
+            ahead_tokens += tokens * share / count
+        self.requests._refill(now)
+        self.tokens._refill(now)
+        return max(
+            (ahead_requests - self.requests.tokens) / self.requests.rate,
+            (ahead_tokens - self.tokens.tokens) / self.tokens.rate,
+            0.0
+        )
+    
+    def _enqueue(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.priority]
+        waiters = queue.get(waiter.tenant)
+        if waiters is None:
+            waiters = queue[waiter.tenant] = deque()
+            # A tenant returning from idle starts level with the busiest
+            # active one instead of spending credit banked while away
+            active = [self._served.get(t, 0.0) for q in self._queues.values() for t in q if t != waiter.tenant]
+            if active:
+                self._served[waiter.tenant] = max(self._served.get(waiter.tenant, 0.0), min(active))
+        waiters.append(waiter)
+        self._waiting += 1
+        backlog = self._backlog[waiter.priority].setdefault(waiter.tenant, [0, 0])
+        backlog[0] += 1
+        backlog[1] += waiter.cost
+        
+        if self._wakeup is None or self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        self._wakeup.set()
+    
+    def _pop(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.priority]
+        waiters = queue[waiter.tenant]
+        waiters.popleft()
+        if not waiters:
+            del queue[waiter.tenant]
+        self._waiting -= 1
+        backlog = self._backlog[waiter.priority][waiter.tenant]
+        backlog[0] -= 1
+        backlog[1] -= waiter.cost
+        if not backlog[0]:
+            del self._backlog[waiter.priority][waiter.tenant]
+    
+    def _next(self) -> Optional[_Waiter]:
+        """Head of line: first non-empty class, least-served tenant, FIFO"""
+        for name in PRIORITIES:
+            queue = self._queues[name]
+            while queue:
+                tenant_name = min(queue, key=lambda t: self._served.get(t, 0.0))
+                waiter = queue[tenant_name][0]
+                if waiter.future.done():
+                    self._pop(waiter)
+                    continue
+                return waiter
+        return None
+    
+    async def _dispatch(self) -> None:
+        while self._waiting:
+            now = time.monotonic()
+            waiter = self._next()
+            if waiter is None:
+                break
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(waiter.cost, now))
+            if wait <= 0:
+                self._pop(waiter)
+                self._admit(waiter.cost, waiter.tenant, now)
+                waiter.future.set_result(None)
+                continue
+            
+            # Sleep until the head can go, its deadline passes, or a new
+            # (possibly more urgent) call arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(wait, waiter.deadline - now))
+            except asyncio.TimeoutError:
+                pass
+        
+        if len(self._served) > MAX_IDLE_TENANTS:
+            self._served = {t: s for t, s in self._served.items() if any(t in q for q in self._queues.values())}
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Admission counters and current queue state
+        
+        Returns:
+            Dict with admitted, queued, rejected (predicted to miss the
+            deadline), expired (missed it while queued), mean queue wait,
+            waiting calls and deadline per class, and bucket levels
+        """
+        queued = self._stats['queued']
+        return {
+            'enabled': self.enabled,
+            **{k: v for k, v in self._stats.items() if k != 'wait_seconds'},
+            'mean_wait_seconds': round(self._stats['wait_seconds'] / queued, 4) if queued else 0.0,
+            'classes': {
+                p: {
+                    'waiting': sum(count for count, _ in self._backlog[p].values()),
+                    'deadline_seconds': self.deadlines[p]
+                }
+                for p in PRIORITIES
+            },
+            'tenants': len(self._served),
+            'request_tokens': round(self.requests.tokens, 2),
+            'model_tokens': round(self.tokens.tokens, 2)
+        }
+
+class TenantMiddleware:
+    """ASGI middleware attributing each request's model calls to its caller"""
+    
+    def __init__(self, app: Any):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        name = None
+        for header, value in scope['headers']:
+            if header == _TENANT_HEADER_BYTES:
+                name = value.decode('latin-1')
+                break
+        if name is None:
+            client = scope.get('client')
+            name = client[0] if client else 'default'
+        
+        with tenant(name):
+            await self.app(scope, receive, send)
+
+# Process-wide scheduler used by core.executor
+model_scheduler = ModelScheduler.from_env()
@@ -0,0 +1,433 @@
+"""
+Semantic Cache - Near-duplicate lookup in front of the response cache
+
+Exact keys (core.response_cache.make_key) miss inputs that differ only by
+case, punctuation, whitespace or a few edited words. This index maps a
+MinHash fingerprint of the input's word shingles to the exact key of an
+earlier call with the same operation, parameters and model, so a
+near-duplicate input reuses that call's cached response.
+
+Fingerprints: the text is NFKC-normalized, casefolded and split into
+words (punctuation dropped); words are hashed with CRC32, every
+SHINGLE_WORDS consecutive word hashes are combined into a shingle hash,
+and the signature keeps the minimum over all shingles under each of
+PERMUTATIONS random multiply-shift hash functions (low 16 bits). The
+share of equal signature positions estimates the Jaccard similarity of
+the two shingle sets.
+
+Index: the signature is cut into BANDS bands of ROWS positions; each
+band is hashed together with the call's scope into a 32-bit key. Keys
+live in per-band NumPy arrays kept sorted for binary search, plus an
+unsorted tail of recent inserts merged in when it fills. Entries sharing
+a band key are candidates (at most MAX_BUCKET per band); a candidate is a hit when its estimated
+similarity reaches the operation's threshold, its word count is within
+max_length_delta of the input's and it has the same numbers and negations
+(a guard hash of the words containing digits and of NEGATIONS): "pay 500"
+and "pay 5000", or "is safe" and "is not safe", are never the same input.
+Operations in NORMALIZED_ONLY additionally require the same words in the
+same order, so only case, punctuation and spacing may differ.
+
+A near hit is another input's response: get() returns it with
+metadata['cache'] set to 'near', and the rest of its metadata (lengths,
+for one) describes that other input.
+
+Entries occupy a ring of max_entries slots; band keys of overwritten
+slots are dropped at the next merge.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from core import metrics
+from core.response_cache import cache
+
+PERMUTATIONS = 64
+BANDS = 8
+ROWS = PERMUTATIONS // BANDS
+SHINGLE_WORDS = 3
+
+# Entries with one band key considered per band
+MAX_BUCKET = 8
+
+# Recent inserts searched linearly before they are merged into the sorted arrays
+TAIL_ENTRIES = 4096
+
+# Minimum estimated Jaccard similarity of word shingles per operation;
+# operations not listed are never served near-duplicates
+THRESHOLDS: Dict[str, float] = {
+    'rewriter.simplify': 0.9,
+    'summarizer.summarize': 0.85,
+    'translator.translate': 0.95,
+}
+
+# Operations served only inputs equal after normalization: one swapped word
+# ("Monday" for "Tuesday") keeps a long text above any useful threshold but
+# makes the cached translation wrong
+NORMALIZED_ONLY = frozenset(('translator.translate',))
+
+# Words that flip a sentence's meaning; 't' is what \w+ leaves of "n't"
+NEGATIONS = frozenset((
+    'not', 'no', 'never', 'none', 'nor', 'neither', 'nothing', 'without', 'cannot', 't',
+    'nicht', 'kein', 'keine', 'keinen', 'keinem', 'keiner', 'nie', 'niemals', 'ohne',
+    'ne', 'pas', 'non', 'jamais', 'sans', 'rien', 'aucun', 'aucune',
+    'nunca', 'sin', 'ni', 'nada', 'ningún', 'ninguna', 'não', 'nem', 'sem',
+    'mai', 'senza', 'niente', 'nessuno', 'niet', 'geen', 'nooit', 'zonder',
+))
+
+_WORD = re.compile(r'\w+')
+_SHIFT = np.uint64(32)
+
+# Fixed seed: signatures stay comparable across restarts and workers
+_rng = np.random.default_rng(0x5E3A)
+_SHINGLE_MULTIPLIERS = _rng.integers(1, 1 << 63, (SHINGLE_WORDS, 1), dtype=np.uint64) | np.uint64(1)
+_A = _rng.integers(1, 1 << 63, PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, PERMUTATIONS, dtype=np.uint64)
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 63, (BANDS, ROWS), dtype=np.uint64) | np.uint64(1)
+_SCOPE_MULTIPLIERS = _rng.integers(1, 1 << 63, BANDS, dtype=np.uint64) | np.uint64(1)
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _threshold_from_env(operation: str, default: float) -> float:
+    name = 'SEMANTIC_CACHE_THRESHOLD_' + re.sub(r'\W', '_', operation).upper()
+    return float(os.getenv(name, str(default)))
+
+def _guard(words: List[str]) -> int:
+    """32-bit hash of the words containing digits and the negations, in order"""
+    kept = [w for w in words if w in NEGATIONS or any(c.isdigit() for c in w)]
+    return zlib.crc32(' '.join(kept).encode('utf-8'))
+
+def signature(text: str) -> Tuple[np.ndarray, int, int, int]:
+    """
+    MinHash signature of a text's word shingles
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        (uint16 signature of PERMUTATIONS values, word count, guard hash
+        of its numbers and negations, 64-bit hash of the normalized words)
+    """
+    words = _WORD.findall(unicodedata.normalize('NFKC', text).casefold())
+    hashes = np.fromiter((zlib.crc32(w.encode('utf-8')) for w in words), np.uint64, len(words))
+    if not len(hashes):
+        hashes = np.zeros(1, np.uint64)
+    # Texts shorter than a shingle are one shingle of all their words
+    width = min(SHINGLE_WORDS, len(hashes))
+    count = len(hashes) - width + 1
+    shingles = sum(hashes[i:i + count] * _SHINGLE_MULTIPLIERS[i] for i in range(width))
+    # Products wrap modulo 2**64; the high half is the hash
+    minima = ((shingles[:, None] * _A + _B) >> _SHIFT).min(axis=0)
+    digest = hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=8).digest()
+    return minima.astype(np.uint16), len(words), _guard(words), int.from_bytes(digest, 'little')
+
+def scope_hash(operation: str, params: Optional[Dict[str, Any]] = None, model: str = '') -> int:
+    """32-bit hash of everything besides the text that changes the output"""
+    return zlib.crc32(repr((operation, sorted((params or {}).items()), model)).encode('utf-8'))
+
+def _band_keys(signatures: np.ndarray, scopes: np.ndarray) -> np.ndarray:
+    """(n, BANDS) uint32 keys for (n, PERMUTATIONS) signatures and n scopes"""
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    mixed = (rows * _BAND_MULTIPLIERS).sum(axis=2) + scopes.astype(np.uint64)[:, None] * _SCOPE_MULTIPLIERS
+    return (mixed >> np.uint64(32)).astype(np.uint32)
+
+class SemanticCache:
+    """
+    MinHash LSH index from near-duplicate inputs to exact cache keys
+    
+    Values stay in core.response_cache; the index only stores fingerprints
+    and the 32-byte exact key, so an entry the response cache has evicted
+    or expired is a miss here too.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 100000,
+        thresholds: Optional[Dict[str, float]] = None,
+        max_length_delta: float = 0.1,
+        normalized_only: Optional[FrozenSet[str]] = None
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.thresholds = dict(THRESHOLDS if thresholds is None else thresholds)
+        self.max_length_delta = max_length_delta
+        self.normalized_only = NORMALIZED_ONLY if normalized_only is None else normalized_only
+        self._lock = threading.Lock()
+        self._reset()
+    
+    @classmethod
+    def from_env(cls) -> 'SemanticCache':
+        return cls(
+            enabled=_env_flag('SEMANTIC_CACHE_ENABLED', 'true'),
+            max_entries=int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '100000')),
+            thresholds={op: _threshold_from_env(op, value) for op, value in THRESHOLDS.items()},
+            max_length_delta=float(os.getenv('SEMANTIC_CACHE_MAX_LENGTH_DELTA', '0.1'))
+        )
+    
+    def _reset(self) -> None:
+        capacity = min(self.max_entries, 1024)
+        self._signatures = np.zeros((capacity, PERMUTATIONS), np.uint16)
+        self._keys = np.zeros((capacity, BANDS), np.uint32)
+        self._scopes = np.zeros(capacity, np.uint32)
+        self._words = np.zeros(capacity, np.int32)
+        self._guards = np.zeros(capacity, np.uint32)
+        self._texts = np.zeros(capacity, np.uint64)
+        self._targets = np.zeros((capacity, 32), np.uint8)
+        self._count = 0
+        self._sorted_keys = [np.zeros(0, np.uint32) for _ in range(BANDS)]
+        self._sorted_slots = [np.zeros(0, np.uint32) for _ in range(BANDS)]
+        self._tail_keys = np.zeros((BANDS, TAIL_ENTRIES), np.uint32)
+        self._tail_slots = np.zeros(TAIL_ENTRIES, np.uint32)
+        self._tail = 0
+        self._overwritten = False
+        self.lookups = 0
+        self.hits = 0
+        self.expired = 0
+        self.length_rejected = 0
+        self.guard_rejected = 0
+        self.edit_rejected = 0
+        self.candidates = 0
+        self.merges = 0
+        self.lookup_seconds = 0.0
+    
+    def lookup(
+        self,
+        operation: str,
+        text: str,
+        params: Optional[Dict[str, Any]] = None,
+        model: str = ''
+    ) -> Optional[str]:
+        """
+        Find the exact cache key of a near-duplicate earlier call
+        
+        Args:
+            operation: Operation name; only those with a threshold are indexed
+            text: Input text
+            params: Other arguments that change the output
+            model: Model name serving the call
+        
+        Returns:
+            Exact cache key of the most similar qualifying entry, or None
+        """
+        threshold = self.thresholds.get(operation)
+        if not self.enabled or threshold is None:
+            return None
+        
+        started = time.perf_counter()
+        query, words, guard, normalized = signature(text)
+        scope = scope_hash(operation, params, model)
+        keys = _band_keys(query[None, :], np.array([scope], np.uint32))[0]
+        
+        with self._lock:
+            found = [self._tail_slots[np.nonzero((self._tail_keys[:, :self._tail] == keys[:, None]).any(axis=0))[0]]]
+            for band in range(BANDS):
+                row = self._sorted_keys[band]
+                low = row.searchsorted(keys[band])
+                found.append(self._sorted_slots[band][low:low + MAX_BUCKET][row[low:low + MAX_BUCKET] == keys[band]])
+            slots = np.unique(np.concatenate(found))
+            # Band keys of overwritten slots may still point at them
+            slots = slots[(self._keys[slots] == keys).any(axis=1) & (self._scopes[slots] == scope)]
+            
+            target = None
+            if len(slots):
+                similarity = (self._signatures[slots] == query).mean(axis=1)
+                close = similarity >= threshold
+                other = self._words[slots]
+                similar_length = np.abs(other - words) <= np.maximum(1, self.max_length_delta * np.maximum(other, words))
+                self.candidates += len(slots)
+                self.length_rejected += int((close & ~similar_length).sum())
+                close &= similar_length
+                same_guard = self._guards[slots] == guard
+                self.guard_rejected += int((close & ~same_guard).sum())
+                close &= same_guard
+                if operation in self.normalized_only:
+                    same_text = self._texts[slots] == np.uint64(normalized)
+                    self.edit_rejected += int((close & ~same_text).sum())
+                    close &= same_text
+                if close.any():
+                    best = slots[np.argmax(np.where(close, similarity, -1.0))]
+                    target = self._targets[best].tobytes().hex()
+            
+            self.lookups += 1
+            self.lookup_seconds += time.perf_counter() - started
+        return target
+    
+    def add(
+        self,
+        operation: str,
+        text: str,
+        key: Optional[str],
+        params: Optional[Dict[str, Any]] = None,
+        model: str = ''
+    ) -> None:
+        """
+        Index a call whose response was stored under an exact key
+        
+        Args:
+            operation: Operation name; ignored unless it has a threshold
+            text: Input text
+            key: Exact cache key from make_key (None means uncacheable)
+            params: Other arguments that change the output
+            model: Model name serving the call
+        """
+        if not self.enabled or key is None or operation not in self.thresholds:
+            return
+        
+        query, words, guard, normalized = signature(text)
+        scope = scope_hash(operation, params, model)
+        keys = _band_keys(query[None, :], np.array([scope], np.uint32))[0]
+        
+        with self._lock:
+            slot = self._count % self.max_entries
+            if slot >= len(self._signatures):
+                self._grow()
+            self._overwritten |= self._count >= self.max_entries
+            self._signatures[slot] = query
+            self._keys[slot] = keys
+            self._scopes[slot] = scope
+            self._words[slot] = words
+            self._guards[slot] = guard
+            self._texts[slot] = normalized
+            self._targets[slot] = np.frombuffer(bytes.fromhex(key), np.uint8)
+            self._count += 1
+            
+            self._tail_keys[:, self._tail] = keys
+            self._tail_slots[self._tail] = slot
+            self._tail += 1
+            if self._tail == TAIL_ENTRIES:
+                self._merge()
+    
+    def _grow(self) -> None:
+        capacity = min(self.max_entries, 2 * len(self._signatures))
+        for name in ('_signatures', '_keys', '_scopes', '_words', '_guards', '_texts', '_targets'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+    
+    def _merge(self) -> None:
+        """Fold the tail into the sorted band arrays, dropping overwritten entries"""
+        tail_keys = self._tail_keys[:, :self._tail]
+        tail_slots = self._tail_slots[:self._tail]
+        for band in range(BANDS):
+            keys, slots = self._sorted_keys[band], self._sorted_slots[band]
+            new_keys, new_slots = tail_keys[band], tail_slots
+            if self._overwritten:
+                live = self._keys[slots, band] == keys
+                keys, slots = keys[live], slots[live]
+                live = self._keys[new_slots, band] == new_keys
+                new_keys, new_slots = new_keys[live], new_slots[live]
+            order = np.argsort(new_keys, kind='stable')
+            at = np.searchsorted(keys, new_keys[order])
+            self._sorted_keys[band] = np.insert(keys, at, new_keys[order])
+            self._sorted_slots[band] = np.insert(slots, at, new_slots[order])
+        self._tail = 0
+        self._overwritten = False
+        self.merges += 1
+    
+    def clear(self) -> None:
+        """Drop every indexed entry and reset the counters"""
+        with self._lock:
+            self._reset()
+    
+    def __len__(self) -> int:
+        return min(self._count, self.max_entries)
+    
+    def memory_bytes(self) -> int:
+        """Bytes held by the index arrays"""
+        arrays = [
+            self._signatures, self._keys, self._scopes, self._words, self._guards, self._texts, self._targets,
+            self._tail_keys, self._tail_slots
+        ]
+        return sum(a.nbytes for a in arrays + self._sorted_keys + self._sorted_slots)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report near-duplicate hits and index size
+        
+        Returns:
+            Dict of index metrics; hits count entries whose response was
+            still cached, expired those it no longer was
+        """
+        return {
+            'enabled': self.enabled,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            'expired': self.expired,
+            'length_rejected': self.length_rejected,
+            'guard_rejected': self.guard_rejected,
+            'edit_rejected': self.edit_rejected,
+            'candidates': self.candidates,
+            'entries': len(self),
+            'index_bytes': self.memory_bytes(),
+            'merges': self.merges,
+            'mean_lookup_us': round(self.lookup_seconds / self.lookups * 1e6, 1) if self.lookups else 0.0
+        }
+
+async def get(
+    operation: str,
+    text: str,
+    key: Optional[str],
+    params: Optional[Dict[str, Any]] = None,
+    model: str = '',
+    use_cache: bool = True
+) -> Optional[Any]:
+    """
+    Serve a call from the cached response of a near-duplicate input
+    
+    Call after the exact lookup missed. A hit is another input's response
+    and is returned with metadata['cache'] = 'near'; it is not stored under
+    the call's own exact key: that tier only holds responses to that exact
+    input, and the near-duplicate entry may expire or be evicted first.
+    
+    Args:
+        operation: Operation name
+        text: Input text
+        key: The call's exact cache key (None means uncacheable)
+        params: Other arguments that change the output
+        model: Model name serving the call
+        use_cache: False to bypass the cache for this call
+    
+    Returns:
+        Cached value (marked as a near hit), or None on a miss
+    """
+    if not cache.enabled or not use_cache or key is None or operation not in index.thresholds:
+        return None
+    
+    target = index.lookup(operation, text, params, model)
+    value = await cache.read(target) if target is not None else None
+    if target is not None and value is None:
+        index.expired += 1
+    if index.enabled:
+        metrics.record_cache_lookup(value is not None, near=True)
+    if value is None:
+        return None
+    
+    index.hits += 1
+    if isinstance(value, dict):
+        value = {**value, 'metadata': {**value.get('metadata', {}), 'cache': 'near'}}
+    return value
+
+def add(
+    operation: str,
+    text: str,
+    key: Optional[str],
+    params: Optional[Dict[str, Any]] = None,
+    model: str = ''
+) -> None:
+    """Index a response just stored under `key` (see SemanticCache.add)"""
+    if cache.enabled:
+        index.add(operation, text, key, params, model)
+
+# Process-wide index used by the API modules
+index = SemanticCache.from_env()
@@ -0,0 +1,203 @@
+"""
+Structured Output - Parse JSON replies from the model into Pydantic schemas
+"""
+
+import json
+import re
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from core import metrics
+
+_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$', re.IGNORECASE)
+_KEY_VALUE = re.compile(r'^\W*([A-Za-z][\w /-]{0,40}?)\W*:\s*(.+)$')
+_LIST_MARKER = re.compile(r'^(?:[-*•]|\d+[.)])\s*')
+
+def parse_json(text: str) -> Any:
+    """
+    Parse a JSON model reply
+    
+    Tolerates Markdown code fences and prose around the JSON value.
+    
+    Args:
+        text: Raw model output
+    
+    Returns:
+        Decoded JSON value
+    
+    Raises:
+        ValueError: If no JSON value can be recovered
+    """
+    cleaned = _FENCE.sub('', text.strip())
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+    
+    # Fall back to the outermost object/array in the reply
+    for opener, closer in (('{', '}'), ('[', ']')):
+        start, end = cleaned.find(opener), cleaned.rfind(closer)
+        if start != -1 and end > start:
+            try:
+                return json.loads(cleaned[start:end + 1])
+            except json.JSONDecodeError:
+                continue
+    
+    raise ValueError("Model reply is not valid JSON")
+
+SchemaT = TypeVar('SchemaT', bound=BaseModel)
+
+class Schema(BaseModel):
+    """Base for model-output schemas: ignores unknown keys, accepts numbers as text"""
+    
+    model_config = ConfigDict(extra='ignore', coerce_numbers_to_str=True)
+    
+    _fallback: bool = PrivateAttr(default=False)
+    
+    @property
+    def parsed_by_fallback(self) -> bool:
+        """True when the reply was not valid JSON and a fallback parser recovered it"""
+        return self._fallback
+
+# operation -> {'calls', 'json', 'fallback', 'failed'}
+_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'calls': 0, 'json': 0, 'fallback': 0, 'failed': 0})
+
+def parse_key_values(text: str) -> Dict[str, str]:
+    """
+    Fallback parser for "Key: value" lines
+    
+    Args:
+        text: Raw model output
+    
+    Returns:
+        Dict keyed by snake_cased keys
+    
+    Raises:
+        ValueError: If no key/value lines are found
+    """
+    data = {}
+    for line in text.splitlines():
+        match = _KEY_VALUE.match(line)
+        if match:
+            key = re.sub(r'\W+', '_', match.group(1).strip().lower()).strip('_')
+            data[key] = match.group(2).strip().strip('",')
+    if not data:
+        raise ValueError("No key/value pairs in model reply")
+    return data
+
+def split_lines(text: str, separator: str = '\n') -> List[str]:
+    """
+    Fallback parser for one-item-per-line (or per-separator) replies
+    
+    Strips bullets and numbering the model adds despite instructions.
+    
+    Args:
+        text: Raw model output
+        separator: Item separator
+    
+    Returns:
+        Non-empty items
+    """
+    items = []
+    for item in text.strip().split(separator):
+        item = _LIST_MARKER.sub('', item.strip()).strip()
+        if item:
+            items.append(item)
+    return items
+
+def parse_model(
+    text: str,
+    schema: Type[SchemaT],
+    operation: str,
+    fallback: Optional[Callable[[str], Any]] = None
+) -> SchemaT:
+    """
+    Parse a model reply into a Pydantic schema
+    
+    Tries JSON first (a bare list is wrapped into the schema's single list
+    field); if that fails, the fallback parser runs on the raw text
+    (parse_key_values by default). Data that contains none of the schema's
+    fields is rejected rather than validated into an empty instance.
+    Results from the fallback have parsed_by_fallback set, so callers can
+    keep them out of caches. Outcomes are counted per operation.
+    
+    Args:
+        text: Raw model output
+        schema: Pydantic model to validate against
+        operation: Name used for parse metrics
+        fallback: Callable turning raw text into data for the schema
+    
+    Returns:
+        Validated schema instance
+    
+    Raises:
+        ValueError: If neither JSON nor the fallback yields valid data
+    """
+    started = time.perf_counter()
+    try:
+        return _parse(text, schema, operation, fallback)
+    finally:
+        metrics.record_parse(operation, time.perf_counter() - started)
+
+def _parse(
+    text: str,
+    schema: Type[SchemaT],
+    operation: str,
+    fallback: Optional[Callable[[str], Any]]
+) -> SchemaT:
+    counters = _stats[operation]
+    counters['calls'] += 1
+    
+    try:
+        result = _validate(schema, parse_json(text))
+        counters['json'] += 1
+        return result
+    except ValueError:
+        pass
+    
+    try:
+        result = _validate(schema, (fallback or parse_key_values)(text))
+        if isinstance(result, Schema):
+            result._fallback = True
+        counters['fallback'] += 1
+        return result
+    except ValueError:
+        counters['failed'] += 1
+        raise ValueError(f"Could not parse {operation} output")
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Parse outcomes per operation
+    
+    Returns:
+        Dict of counters plus 'failure_rate' (replies that were not valid
+        JSON for the schema, whether or not the fallback recovered them)
+    """
+    report = {}
+    for operation, counters in _stats.items():
+        calls = counters['calls']
+        report[operation] = {
+            **counters,
+            'failure_rate': round((counters['fallback'] + counters['failed']) / calls, 4) if calls else 0.0
+        }
+    return report
+
+def _validate(schema: Type[SchemaT], data: Any) -> SchemaT:
+    if isinstance(data, list):
+        data = _wrap_list(schema, data)
+    # Every field may have a default, so an unrelated object would otherwise validate
+    if not isinstance(data, dict) or not data.keys() & schema.model_fields.keys():
+        raise ValueError(f"Reply has none of the {schema.__name__} fields")
+    return schema.model_validate(data)
+
+def _wrap_list(schema: Type[BaseModel], items: List[Any]) -> Dict[str, Any]:
+    list_fields = [
+        name for name, field in schema.model_fields.items()
+        if getattr(field.annotation, '__origin__', None) in (list, List)
+    ]
+    if len(list_fields) != 1:
+        raise ValueError(f"Cannot map a JSON list onto {schema.__name__}")
+    return {list_fields[0]: items}
@@ -0,0 +1,385 @@
+"""
+Stub Backend - Deterministic local stand-in for the Gemini model client
+
+Selected with MODEL_BACKEND=stub (see core.model_registry). Simulates
+latency distributions, streaming chunk timing, token usage and error
+rates without network access or API keys, so the whole engine can be
+load-tested and benchmarked offline.
+
+Replies, latencies and injected errors are derived from a hash of the
+seed, the prompt and how many times that prompt has been sent, so a run
+is reproducible regardless of how concurrent calls interleave, while a
+retried call can still succeed.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from core.scheduler import estimate_cost
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+
+# Words replies are drawn from (about one token each)
+_WORDS = (
+    'the model returns a short deterministic reply built from this list of plain words so that '
+    'benchmarks see realistic text lengths while every run with the same seed and prompt stays '
+    'identical across machines and processes'
+).split()
+
+# Prompts whose attempt counts are remembered before the table is reset
+MAX_TRACKED_PROMPTS = 100000
+
+Reply = Union[str, Callable[[Any], str]]
+
+class StubServerError(Exception):
+    """Injected transient failure (google.api_core.exceptions.ServiceUnavailable)"""
+    
+    code = 503
+
+class StubRateLimitError(Exception):
+    """Injected quota failure (google.api_core.exceptions.ResourceExhausted)"""
+    
+    code = 429
+
+class StubUsage:
+    """usage_metadata as reported by the Gemini SDK"""
+    
+    def __init__(self, prompt_tokens: int, reply_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = reply_tokens
+        self.total_token_count = prompt_tokens + reply_tokens
+
+class StubResponse:
+    """Response or stream chunk exposing .text and .usage_metadata"""
+    
+    def __init__(self, text: str, usage: Optional[StubUsage] = None):
+        self.text = text
+        self.usage_metadata = usage
+
+_stats = {'calls': 0, 'streams': 0, 'errors': 0, 'rate_limited': 0, 'prompt_tokens': 0, 'reply_tokens': 0}
+
+class StubModel:
+    """
+    Model client with the GenerativeModel call surface
+    
+    Offers both generate_content (blocking) and generate_content_async,
+    each with stream=True support. Time to first token follows
+    `distribution` around the median `latency` (lognormal spread
+    `sigma`) plus `prefill_seconds_per_token` for every prompt token,
+    then every reply token takes `seconds_per_token`; streams
+    deliver `chunk_tokens` tokens per chunk at that pace. A `slow_rate`
+    fraction of calls waits `slow_latency` for the first token instead.
+    `error_rate` and `rate_limit_rate` of calls fail with a 503 or 429
+    after the first-token latency. With `quota_requests` or
+    `quota_tokens` set, calls beyond that many requests or tokens (prompt
+    plus reply) per sliding `quota_window` seconds fail at once with a
+    429; `meter_rejected` counts rejected calls against the request quota,
+    as on APIs that meter every attempt. A prompt ending in a JSON example ('Respond in JSON: {...}')
+    or a field list ('JSON with fields: a, b (list)') gets a reply of that
+    shape, other JSON-mode calls an object with a 'text' field, and
+    everything else `reply_tokens` words, unless `reply` is given.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = 'stub',
+        generation_config: Optional[Dict[str, Any]] = None,
+        latency: float = 0.2,
+        distribution: str = 'lognormal',
+        sigma: float = 0.5,
+        seconds_per_token: float = 0.002,
+        prefill_seconds_per_token: float = 0.0,
+        reply_tokens: int = 128,
+        chunk_tokens: int = 16,
+        slow_rate: float = 0.0,
+        slow_latency: float = 1.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        quota_requests: int = 0,
+        quota_tokens: int = 0,
+        quota_window: float = 60.0,
+        meter_rejected: bool = True,
+        seed: int = 0,
+        reply: Optional[Reply] = None
+    ):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.latency = latency
+        self.distribution = distribution
+        self.sigma = sigma
+        self.seconds_per_token = seconds_per_token
+        self.prefill_seconds_per_token = prefill_seconds_per_token
+        self.reply_tokens = reply_tokens
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.quota_requests = quota_requests
+        self.quota_tokens = quota_tokens
+        self.quota_window = quota_window
+        self.meter_rejected = meter_rejected
+        self.seed = seed
+        self.reply = reply
+        self.calls = 0
+        self.prompt_chars = 0
+        self._attempts: Dict[bytes, int] = defaultdict(int)
+        self._quota_log: deque = deque()  # (time, tokens, admitted)
+    
+    @classmethod
+    def from_env(cls, model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> 'StubModel':
+        """Model factory for core.model_registry, configured from STUB_* settings"""
+        return cls(
+            model_name,
+            generation_config,
+            latency=float(os.getenv('STUB_LATENCY_SECONDS', '0.2')),
+            distribution=os.getenv('STUB_LATENCY_DISTRIBUTION', 'lognormal'),
+            sigma=float(os.getenv('STUB_LATENCY_SIGMA', '0.5')),
+            seconds_per_token=float(os.getenv('STUB_SECONDS_PER_TOKEN', '0.002')),
+            prefill_seconds_per_token=float(os.getenv('STUB_PREFILL_SECONDS_PER_TOKEN', '0')),
+            reply_tokens=int(os.getenv('STUB_REPLY_TOKENS', '128')),
+            chunk_tokens=int(os.getenv('STUB_CHUNK_TOKENS', '16')),
+            slow_rate=float(os.getenv('STUB_SLOW_RATE', '0')),
+            slow_latency=float(os.getenv('STUB_SLOW_LATENCY_SECONDS', '1.0')),
+            error_rate=float(os.getenv('STUB_ERROR_RATE', '0')),
+            rate_limit_rate=float(os.getenv('STUB_RATE_LIMIT_RATE', '0')),
+            quota_requests=int(os.getenv('STUB_QUOTA_REQUESTS', '0')),
+            quota_tokens=int(os.getenv('STUB_QUOTA_TOKENS', '0')),
+            quota_window=float(os.getenv('STUB_QUOTA_WINDOW_SECONDS', '60')),
+            seed=int(os.getenv('STUB_SEED', '0'))
+        )
+    
+    def generate_content(self, contents: Any, stream: bool = False, **kwargs) -> Any:
+        plan = self._plan(contents, stream)
+        time.sleep(plan['first_token'])
+        self._fail(plan)
+        if stream:
+            return self._chunks_blocking(plan)
+        time.sleep(plan['rest'])
+        return StubResponse(plan['text'], plan['usage'])
+    
+    async def generate_content_async(self, contents: Any, stream: bool = False, **kwargs) -> Any:
+        plan = self._plan(contents, stream)
+        await asyncio.sleep(plan['first_token'])
+        self._fail(plan)
+        if stream:
+            return self._chunks(plan)
+        await asyncio.sleep(plan['rest'])
+        return StubResponse(plan['text'], plan['usage'])
+    
+    def _plan(self, contents: Any, stream: bool) -> Dict[str, Any]:
+        digest = _digest(contents)
+        if len(self._attempts) > MAX_TRACKED_PROMPTS:
+            self._attempts.clear()
+        attempt = self._attempts[digest]
+        self._attempts[digest] += 1
+        rng = random.Random(f"{self.seed}:{self.model_name}:{digest.hex()}:{attempt}")
+        
+        prompt_tokens = estimate_cost(contents)
+        text = self._reply_text(contents, rng)
+        reply_tokens = max(1, len(text.split()))
+        roll = rng.random()
+        admitted = self._admit(prompt_tokens + reply_tokens)
+        failure = None
+        if not admitted:
+            failure = StubRateLimitError("429 Resource has been exhausted (e.g. check quota)")
+        elif roll < self.error_rate:
+            failure = StubServerError("503 The service is currently unavailable")
+        elif roll < self.error_rate + self.rate_limit_rate:
+            failure = StubRateLimitError("429 Resource has been exhausted (e.g. check quota)")
+        
+        self.calls += 1
+        self.prompt_chars += len(contents) if isinstance(contents, str) else 0
+        _stats['calls'] += 1
+        _stats['streams'] += stream
+        if failure is None:
+            _stats['prompt_tokens'] += prompt_tokens
+            _stats['reply_tokens'] += reply_tokens
+        return {
+            'first_token': self._sample_latency(rng) + prompt_tokens * self.prefill_seconds_per_token if admitted else 0.0,
+            'rest': reply_tokens * self.seconds_per_token,
+            'text': text,
+            'usage': StubUsage(prompt_tokens, reply_tokens),
+            'failure': failure
+        }
+    
+    def _admit(self, tokens: int) -> bool:
+        """Record a call against the sliding-window quota; False when it is over"""
+        if not (self.quota_requests or self.quota_tokens):
+            return True
+        now = time.monotonic()
+        log = self._quota_log
+        while log and log[0][0] <= now - self.quota_window:
+            log.popleft()
+        requests = sum(1 for _, _, ok in log if ok or self.meter_rejected)
+        used = sum(t for _, t, ok in log if ok)
+        admitted = (not self.quota_requests or requests < self.quota_requests) and \
+            (not self.quota_tokens or used + tokens <= self.quota_tokens)
+        if admitted or self.meter_rejected:
+            log.append((now, tokens, admitted))
+        return admitted
+    
+    def _sample_latency(self, rng: random.Random) -> float:
+        if self.slow_rate and rng.random() < self.slow_rate:
+            return self.slow_latency
+        if self.distribution == 'fixed':
+            return self.latency
+        if self.distribution == 'uniform':
+            return rng.uniform(0, 2 * self.latency)
+        # Median `latency`, tail set by sigma (0.5: p99 is about 3.2x the median)
+        return self.latency * math.exp(rng.gauss(0, self.sigma))
+    
+    def _reply_text(self, contents: Any, rng: random.Random) -> str:
+        if self.reply is not None:
+            return self.reply(contents) if callable(self.reply) else self.reply
+        prompt = contents if isinstance(contents, str) else ' '.join(p for p in contents if isinstance(p, str)) \
+            if isinstance(contents, (list, tuple)) else ''
+        template = _json_template(prompt)
+        if template is None:
+            template = _field_template(prompt)
+        if template is not None:
+            return json.dumps(_fill(template, rng))
+        words = ' '.join(rng.choice(_WORDS) for _ in range(self.reply_tokens))
+        if self.generation_config.get('response_mime_type') == 'application/json':
+            return json.dumps({'text': words})
+        return words
+    
+    def _fail(self, plan: Dict[str, Any]) -> None:
+        failure = plan['failure']
+        if failure is not None:
+            _stats['rate_limited' if isinstance(failure, StubRateLimitError) else 'errors'] += 1
+            raise failure
+    
+    def _pieces(self, plan: Dict[str, Any]) -> Iterator[str]:
+        words = plan['text'].split(' ')
+        for start in range(0, len(words), self.chunk_tokens):
+            piece = ' '.join(words[start:start + self.chunk_tokens])
+            yield piece if start + self.chunk_tokens >= len(words) else piece + ' '
+    
+    async def _chunks(self, plan: Dict[str, Any]) -> AsyncIterator[StubResponse]:
+        for piece in self._pieces(plan):
+            await asyncio.sleep(self.chunk_tokens * self.seconds_per_token)
+            yield StubResponse(piece)
+    
+    def _chunks_blocking(self, plan: Dict[str, Any]) -> Iterator[StubResponse]:
+        for piece in self._pieces(plan):
+            time.sleep(self.chunk_tokens * self.seconds_per_token)
+            yield StubResponse(piece)
+
+def _json_template(prompt: str) -> Any:
+    """The reply shape a prompt asks for ('Respond in JSON: {...}'), if any"""
+    at = prompt.rfind('JSON')
+    start = prompt.find('{', at) if at >= 0 else -1
+    if start < 0:
+        return None
+    depth = 0
+    for end in range(start, len(prompt)):
+        depth += {'{': 1, '}': -1}.get(prompt[end], 0)
+        if depth == 0:
+            break
+    else:
+        return None
+    # Prompts describe values loosely: "a" | "b" choices and 0-100 ranges
+    text = _CHOICES.sub(r'\1', prompt[start:end + 1])
+    text = _RANGE.sub(r': \1', text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+def _field_template(prompt: str) -> Optional[Dict[str, Any]]:
+    """The reply shape a prompt lists ('JSON with fields: a, b (list), c (0-100)'), if any"""
+    at = prompt.rfind('JSON')
+    start = prompt.find('fields:', at) if at >= 0 else -1
+    if start < 0:
+        return None
+    fields, _ = _parse_fields(prompt[start + len('fields:'):].split('\n', 1)[0], 0)
+    return fields or None
+
+def _parse_fields(text: str, pos: int) -> Tuple[Dict[str, Any], int]:
+    """Parse 'name (note), ...' up to a closing parenthesis; notes: list, a range, nested fields"""
+    fields: Dict[str, Any] = {}
+    while True:
+        match = _FIELD.match(text, pos)
+        if not match:
+            return fields, pos
+        name, pos = match.group(1), match.end()
+        value: Any = '...'
+        if text.startswith('(', pos):
+            nested = _NESTED.match(text, pos)
+            if nested:
+                value, pos = _parse_fields(text, nested.end())
+            else:
+                end = text.find(')', pos)
+                end = len(text) if end < 0 else end
+                note = text[pos + 1:end]
+                top = _RANGE_NOTE.search(note)
+                if 'list' in note:
+                    value = ['...']
+                elif top:
+                    value = int(top.group(1))
+                pos = end
+            pos += 1
+        fields[name] = value
+        comma = _COMMA.match(text, pos)
+        if not comma:
+            return fields, pos
+        pos = comma.end()
+
+_FIELD = re.compile(r'\s*([A-Za-z_]+)\s*')
+_NESTED = re.compile(r'\(\s*object with fields:')
+_RANGE_NOTE = re.compile(r'\d+\s*-\s*(\d+)')
+_COMMA = re.compile(r'\s*,')
+_CHOICES = re.compile(r'("[^"]*")(?:\s*\|\s*"[^"]*")+')
+_RANGE = re.compile(r':\s*\d+\s*-\s*(\d+)')
+
+def _fill(template: Any, rng: random.Random) -> Any:
+    """Stub words for placeholder and descriptive strings; enum-like words are kept"""
+    if isinstance(template, dict):
+        return {key: _fill(value, rng) for key, value in template.items()}
+    if isinstance(template, list):
+        items = template or ['...']
+        return [_fill(items[i % len(items)], rng) for i in range(3)]
+    if isinstance(template, str) and (template == '...' or ' ' in template):
+        return ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(3, 12)))
+    return template
+
+def _digest(contents: Any) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in contents if isinstance(contents, (list, tuple)) else (contents,):
+        if isinstance(part, str):
+            h.update(part.encode('utf-8'))
+        elif isinstance(part, dict) and isinstance(part.get('data'), (bytes, bytearray)):
+            h.update(bytes(part['data']))
+        elif isinstance(part, (bytes, bytearray)):
+            h.update(bytes(part))
+        else:
+            # Images and other parts: type and size are enough to vary the reply
+            h.update(f"{type(part).__name__}:{getattr(part, 'size', '')}".encode())
+        h.update(b'\x00')
+    return h.digest()
+
+def stats() -> Dict[str, Any]:
+    """
+    Calls served by stub models in this process
+    
+    Returns:
+        Dict with calls, streams, injected errors and rate limits, and
+        simulated prompt and reply tokens
+    """
+    return dict(_stats)
+
+def clear() -> None:
+    """Reset the call counters"""
+    for key in _stats:
+        _stats[key] = 0
@@ -0,0 +1,192 @@
+"""
+Text Chunking - Sentence/paragraph splitting and token-budgeted chunks
+"""
+
+import re
+from typing import List, Tuple
+
+# Rough chars-per-token ratio for Gemini tokenizers on English prose
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+# Sentence end: terminal punctuation (plus closing quotes/brackets) then whitespace
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+')
+
+# Words whose trailing period does not end a sentence
+_ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e',
+    'fig', 'no', 'vol', 'inc', 'ltd', 'co', 'corp', 'dept', 'approx', 'est',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+})
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text without calling a tokenizer
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        Approximate number of tokens
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Split text on blank lines
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        Non-empty paragraphs, stripped
+    """
+    return [p.strip() for p in _PARAGRAPH_BREAK.split(text) if p.strip()]
+
+def paragraph_spans(text: str) -> List[Tuple[int, str]]:
+    """
+    Split text on blank lines, keeping each paragraph's position
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        (start offset in text, stripped paragraph) for each non-empty paragraph
+    """
+    spans: List[Tuple[int, str]] = []
+    position = 0
+    breaks = [m.span() for m in _PARAGRAPH_BREAK.finditer(text)] + [(len(text), len(text))]
+    for break_start, break_end in breaks:
+        raw = text[position:break_start]
+        stripped = raw.strip()
+        if stripped:
+            spans.append((position + len(raw) - len(raw.lstrip()), stripped))
+        position = break_end
+    return spans
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences
+    
+    Breaks on terminal punctuation and blank lines, but not after common
+    abbreviations ("Dr.", "e.g.") or initials, and not before a fragment
+    that starts in lower case.
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        Non-empty sentences, stripped
+    """
+    sentences: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        glue = False
+        for part in _SENTENCE_END.split(paragraph):
+            part = part.strip()
+            if not part:
+                continue
+            if glue or (sentences and part[0].islower() and sentences[-1][-1] == '.'):
+                sentences[-1] = f"{sentences[-1]} {part}"
+            else:
+                sentences.append(part)
+            glue = _ends_with_abbreviation(sentences[-1])
+    return sentences
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Locate sentences in text, keeping the original text between them
+    
+    Uses the same rules as split_sentences; replacing each span and
+    keeping the gaps reassembles text with its spacing and line breaks.
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        (start, end) offsets of each sentence, stripped, in order
+    """
+    spans: List[Tuple[int, int]] = []
+    boundaries = [m.span() for m in _PARAGRAPH_BREAK.finditer(text)] + [(len(text), len(text))]
+    position = 0
+    for break_start, break_end in boundaries:
+        glue = False
+        part_start = position
+        ends = [m.span() for m in _SENTENCE_END.finditer(text, position, break_start)] + [(break_start, break_start)]
+        for end_start, end_end in ends:
+            raw = text[part_start:end_start]
+            start = part_start + len(raw) - len(raw.lstrip())
+            end = part_start + len(raw.rstrip())
+            part_start = end_end
+            if start >= end:
+                continue
+            previous = text[spans[-1][0]:spans[-1][1]] if spans else ''
+            if glue or (previous and text[start].islower() and previous[-1] == '.'):
+                spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+            glue = _ends_with_abbreviation(text[spans[-1][0]:spans[-1][1]])
+        position = break_end
+    return spans
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Pack text into chunks of at most max_tokens estimated tokens
+    
+    Paragraphs are kept whole where they fit; oversized paragraphs are
+    split at sentence boundaries, and oversized sentences at word
+    boundaries as a last resort.
+    
+    Args:
+        text: Input text
+        max_tokens: Token budget per chunk
+    
+    Returns:
+        List of chunks in document order
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    
+    pieces: List[str] = []
+    for paragraph in split_paragraphs(text):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in split_sentences(paragraph):
+            if len(sentence) <= max_chars:
+                pieces.append(sentence)
+            else:
+                pieces.extend(_split_words(sentence, max_chars))
+    
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for piece in pieces:
+        # +2 for the separator between pieces
+        if current and current_len + len(piece) + 2 > max_chars:
+            chunks.append('\n\n'.join(current))
+            current, current_len = [], 0
+        current.append(piece)
+        current_len += len(piece) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+    
+    return chunks
+
+def _ends_with_abbreviation(sentence: str) -> bool:
+    if not sentence.endswith('.'):
+        return False
+    last = sentence.rsplit(None, 1)[-1].rstrip('.').lstrip('("\'').lower()
+    return last in _ABBREVIATIONS or (len(last) == 1 and last.isalpha())
+
+def _split_words(text: str, max_chars: int) -> List[str]:
+    parts: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for word in text.split():
+        if current and current_len + len(word) + 1 > max_chars:
+            parts.append(' '.join(current))
+            current, current_len = [], 0
+        current.append(word)
+        current_len += len(word) + 1
+    if current:
+        parts.append(' '.join(current))
+    return parts
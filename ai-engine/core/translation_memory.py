@@ -0,0 +1,254 @@
+"""
+Translation Memory - Sentence-level store of earlier translations
+
+Translated segments are kept in SQLite, keyed by (segment, source
+language, target language, model), so a document that repeats sentences
+already translated elsewhere only sends the new ones to the model.
+Callers normalize segments (core.response_cache.normalize_text) first.
+The store is a file (translation_memory.sqlite3 by default) and keeps at
+most max_segments rows, dropping the least recently used first.
+
+Unseen segments are also scored against stored segments of similar
+length (difflib ratio over words) to report the fuzzy-match bands translation
+tools use; fuzzy matches are counted, not reused.
+"""
+
+import difflib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# Fuzzy-match bands reported per request: (label, lowest similarity)
+FUZZY_BANDS = (('95-99', 0.95), ('85-94', 0.85), ('75-84', 0.75))
+
+# Host parameters per SELECT ... IN (...) query
+_BATCH = 500
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def fuzzy_band(similarity: float) -> Optional[str]:
+    """Band label of a fuzzy-match similarity, or None below the lowest band"""
+    for label, lowest in FUZZY_BANDS:
+        if similarity >= lowest:
+            return label
+    return None
+
+class TranslationMemory:
+    """
+    SQLite store of translated segments
+    
+    Methods block on SQLite; call them through core.executor.run_blocking
+    from async code. updated_at is when a segment was last stored or reused.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = True,
+        path: str = 'translation_memory.sqlite3',
+        max_segments: int = 100000,
+        fuzzy_candidates: int = 200,
+        fuzzy_length_delta: float = 0.25
+    ):
+        self.enabled = enabled
+        self.path = path
+        self.max_segments = max_segments
+        self.fuzzy_candidates = fuzzy_candidates
+        self.fuzzy_length_delta = fuzzy_length_delta
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.requests = 0
+        self.segments = 0
+        self.exact = 0
+        self.new = 0
+        self.fallbacks = 0
+        self.fuzzy = {label: 0 for label, _ in FUZZY_BANDS}
+        self.source_tokens = 0
+        self.sent_tokens = 0
+    
+    def _db(self) -> sqlite3.Connection:
+        """The store, opened on first use so importing the module creates no file (hold _lock)"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS segments ('
+                'source TEXT NOT NULL, source_language TEXT NOT NULL, target_language TEXT NOT NULL, '
+                'model TEXT NOT NULL, translation TEXT NOT NULL, length INTEGER NOT NULL, '
+                'uses INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL, '
+                'PRIMARY KEY (source, source_language, target_language, model))'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS segments_by_length '
+                'ON segments (source_language, target_language, model, length)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS segments_by_use ON segments (updated_at)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    @classmethod
+    def from_env(cls) -> 'TranslationMemory':
+        return cls(
+            enabled=_env_flag('TRANSLATION_MEMORY_ENABLED', 'true'),
+            path=os.getenv('TRANSLATION_MEMORY_PATH') or 'translation_memory.sqlite3',
+            max_segments=int(os.getenv('TRANSLATION_MEMORY_MAX_SEGMENTS', '100000')),
+            fuzzy_candidates=int(os.getenv('TRANSLATION_MEMORY_FUZZY_CANDIDATES', '200'))
+        )
+    
+    def lookup(self, segments: Iterable[str], source_language: str, target_language: str, model: str) -> Dict[str, str]:
+        """
+        Find stored translations
+        
+        Args:
+            segments: Normalized source segments
+            source_language: Source language as given to the translator
+            target_language: Target language
+            model: Model name serving the translator
+        
+        Returns:
+            {segment: translation} for the segments in memory
+        """
+        segments = list(dict.fromkeys(segments))
+        found: Dict[str, str] = {}
+        with self._lock:
+            conn = self._db()
+            for start in range(0, len(segments), _BATCH):
+                batch = segments[start:start + _BATCH]
+                rows = conn.execute(
+                    'SELECT source, translation FROM segments '
+                    'WHERE source_language = ? AND target_language = ? AND model = ? '
+                    f"AND source IN ({','.join('?' * len(batch))})",
+                    (source_language, target_language, model, *batch)
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    'UPDATE segments SET uses = uses + 1, updated_at = ? WHERE source = ? AND source_language = ? '
+                    'AND target_language = ? AND model = ?',
+                    [(now, s, source_language, target_language, model) for s in found]
+                )
+                conn.commit()
+        return found
+    
+    def best_fuzzy(self, segments: Iterable[str], source_language: str, target_language: str, model: str) -> List[float]:
+        """
+        Similarity of the closest stored segment of similar length
+        
+        Args:
+            segments: Normalized source segments not in memory
+            source_language: Source language as given to the translator
+            target_language: Target language
+            model: Model name serving the translator
+        
+        Returns:
+            Per segment, the best word-level difflib ratio (0-1) among up to
+            fuzzy_candidates stored segments within fuzzy_length_delta of
+            its length; 0.0 when none reaches the lowest fuzzy band
+        """
+        lowest = FUZZY_BANDS[-1][1]
+        scores = []
+        for segment in segments:
+            low = int(len(segment) * (1 - self.fuzzy_length_delta))
+            high = int(len(segment) * (1 + self.fuzzy_length_delta)) + 1
+            with self._lock:
+                rows = self._db().execute(
+                    'SELECT source FROM segments WHERE source_language = ? AND target_language = ? '
+                    'AND model = ? AND length BETWEEN ? AND ? ORDER BY ABS(length - ?) LIMIT ?',
+                    (source_language, target_language, model, low, high, len(segment), self.fuzzy_candidates)
+                ).fetchall()
+            best = 0.0
+            # Word sequences: the cheap bounds below reject unrelated
+            # sentences, which share most of their characters anyway
+            matcher = difflib.SequenceMatcher(None, b=segment.split(), autojunk=False)
+            for (source,) in rows:
+                matcher.set_seq1(source.split())
+                # Cheap upper bounds first; ratio() is quadratic
+                floor = max(best, lowest)
+                if matcher.real_quick_ratio() > floor and matcher.quick_ratio() > floor:
+                    best = max(best, matcher.ratio())
+            scores.append(best if best >= lowest else 0.0)
+        return scores
+    
+    def store(self, translations: Dict[str, str], source_language: str, target_language: str, model: str) -> None:
+        """
+        Add or replace translated segments, dropping the least recently
+        used beyond max_segments
+        
+        Args:
+            translations: {normalized segment: translation}
+            source_language: Source language as given to the translator
+            target_language: Target language
+            model: Model name serving the translator
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            conn.executemany(
+                'INSERT OR REPLACE INTO segments '
+                '(source, source_language, target_language, model, translation, length, uses, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, 0, ?)',
+                [(s, source_language, target_language, model, t, len(s), now) for s, t in translations.items()]
+            )
+            stored = conn.execute('SELECT COUNT(*) FROM segments').fetchone()[0]
+            if stored > self.max_segments:
+                conn.execute(
+                    'DELETE FROM segments WHERE rowid IN '
+                    '(SELECT rowid FROM segments ORDER BY updated_at LIMIT ?)',
+                    (stored - self.max_segments,)
+                )
+            conn.commit()
+    
+    def record(self, report: Dict[str, Any]) -> None:
+        """Add one request's report (see translator_api) to the totals"""
+        self.requests += 1
+        self.segments += report['segments']
+        self.exact += report['exact']
+        self.new += report['new']
+        self.fallbacks += report['fallback']
+        for label, count in report['fuzzy'].items():
+            self.fuzzy[label] += count
+        self.source_tokens += report['source_tokens']
+        self.sent_tokens += report['sent_tokens']
+    
+    def clear(self) -> None:
+        """Drop every stored segment"""
+        with self._lock:
+            conn = self._db()
+            conn.execute('DELETE FROM segments')
+            conn.commit()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db().execute('SELECT COUNT(*) FROM segments').fetchone()[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report segment reuse since startup
+        
+        Counts stored segments in SQLite; call through
+        core.executor.run_blocking from async code.
+        
+        Returns:
+            Dict of request, segment and token counters
+        """
+        return {
+            'enabled': self.enabled,
+            'requests': self.requests,
+            'segments': self.segments,
+            'exact': self.exact,
+            'new': self.new,
+            'fallbacks': self.fallbacks,
+            **{f"fuzzy_{label.replace('-', '_')}": count for label, count in self.fuzzy.items()},
+            'exact_rate': round(self.exact / self.segments, 4) if self.segments else 0.0,
+            'tokens_saved_pct': round(100 * max(0.0, 1 - self.sent_tokens / self.source_tokens), 1) if self.source_tokens else 0.0,
+            'stored_segments': len(self),
+            'max_segments': self.max_segments,
+            'persistent': self.path != ':memory:'
+        }
+
+# Process-wide memory used by the translator
+memory = TranslationMemory.from_env()
@@ -1,24 +1,54 @@
 """
 Neurify AI Engine - Simplified for Deployment
 """
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+import json
+import math
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from core import (
+    executor, metrics, model_registry, resilience, response_cache, scheduler, semantic_cache, structured_output,
+    stub_backend, translation_memory
+)
+from neural_networks import (
+    prompt_api,
+    writer_api,
+    rewriter_api,
+    translator_api,
+    summarizer_api,
+    proofreader_api,
+    batch_api,
+    language_id
+)
+
 load_dotenv()
 
-# Configure Gemini API
+# Configure Gemini API (MODEL_BACKEND=stub runs offline without a key)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-genai.configure(api_key=GEMINI_API_KEY)
+if model_registry.BACKEND == 'gemini':
+    genai.configure(api_key=GEMINI_API_KEY)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build shared model clients before the first request
+    model_registry.warm_up()
+    yield
+    # Release model-call worker threads
+    executor.shutdown(wait=False)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Neurify AI Engine",
     description="AI processing engine with Gemini API integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -30,6 +60,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if scheduler.model_scheduler.enabled:
+    app.add_middleware(scheduler.TenantMiddleware)
+
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.add_collector('response_cache', response_cache.cache.stats)
+    metrics.add_collector('semantic_cache', semantic_cache.index.stats)
+    metrics.add_collector('translation_memory', translation_memory.memory.stats)
+    metrics.add_collector('language_id', language_id.stats)
+    metrics.add_collector('parse', structured_output.stats, label='operation')
+    metrics.add_collector('scheduler', scheduler.model_scheduler.stats, label='priority')
+    metrics.add_collector('resilience', resilience.stats)
+    if model_registry.BACKEND == 'stub':
+        metrics.add_collector('stub_backend', stub_backend.stats)
+
 class TextRequest(BaseModel):
     text: str
     feature_id: str = "generate"
@@ -38,6 +83,78 @@ class AIResponse(BaseModel):
     success: bool
     data: str
 
+class WriteRequest(BaseModel):
+    prompt: str
+    style: Optional[str] = None
+    tone: Optional[str] = None
+    word_count: Optional[int] = None
+
+class ExpandRequest(BaseModel):
+    text: str
+    target_length: int = 500
+
+class TranslateRequest(BaseModel):
+    text: str
+    target_language: str
+    source_language: str = "auto"
+
+class SummarizeRequest(BaseModel):
+    text: str
+    length: str = "medium"
+    style: str = "paragraph"
+
+class IncrementalProofreadRequest(BaseModel):
+    document_id: str
+    text: str
+
+class BatchItem(BaseModel):
+    operation: str
+    params: Dict[str, Any] = {}
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    # Return NDJSON lines as items complete instead of one ordered response
+    stream: bool = False
+
+def _http_error(error: Exception) -> HTTPException:
+    """
+    429 when the model scheduler turned the call away, 503 while the circuit
+    breaker is open (both with Retry-After), else 500
+    """
+    for status, found in ((429, scheduler.quota_error(error)), (503, resilience.unavailable_error(error))):
+        if found is not None:
+            return HTTPException(
+                status_code=status,
+                detail=str(error),
+                headers={"Retry-After": str(max(1, math.ceil(found.retry_after)))}
+            )
+    return HTTPException(status_code=500, detail=str(error))
+
+async def _sse(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Frame text chunks as Server-Sent Events
+    
+    Each chunk is sent as `data: {"text": ...}`, followed by a final
+    `done` event, or an `error` event if generation fails mid-stream.
+    When the client disconnects Starlette cancels this generator, which
+    closes `chunks` and stops the upstream model stream.
+    """
+    try:
+        async for chunk in chunks:
+            yield f"data: {json.dumps({'text': chunk})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    finally:
+        await chunks.aclose()
+
+def _stream_response(chunks: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        _sse(chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/")
 async def root():
     return {
@@ -50,15 +167,120 @@ async def root():
 async def health_check():
     return {"status": "healthy", "ai_engine": "operational"}
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss metrics"""
+    return response_cache.cache.stats()
+
+@app.get("/api/cache/semantic/stats")
+async def semantic_cache_stats():
+    """Near-duplicate cache hit rate and index memory"""
+    return semantic_cache.index.stats()
+
+@app.get("/api/translation-memory/stats")
+async def translation_memory_stats():
+    """Sentence reuse, fuzzy matches and tokens saved by the translation memory"""
+    return await executor.run_blocking(translation_memory.memory.stats)
+
+@app.get("/api/language-id/stats")
+async def language_id_stats():
+    """Language detections answered locally vs left to the model"""
+    return language_id.stats()
+
+@app.get("/api/parse/stats")
+async def parse_stats():
+    """Structured-output parse outcomes and failure rates per operation"""
+    return structured_output.stats()
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Request, stage latency, token, cache and error metrics in Prometheus text format"""
+    # Collectors such as the translation memory's query SQLite
+    text = await executor.run_blocking(metrics.render)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
 @app.post("/api/generate", response_model=AIResponse)
+@metrics.instrument('api.generate')
 async def generate(request: TextRequest):
     """Generate AI response"""
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        response = model.generate_content(request.text)
+        model = model_registry.get_model('prompt')
+        response = await executor.generate_content(model, request.text)
         return AIResponse(success=True, data=response.text)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
+
+@app.post("/api/proofread")
+async def proofread(request: TextRequest):
+    """Grammar, spelling, punctuation and style findings from one model call"""
+    try:
+        return await proofreader_api.check_all(request.text)
+    except Exception as e:
+        raise _http_error(e)
+
+@app.post("/api/proofread/incremental")
+async def proofread_incremental(request: IncrementalProofreadRequest):
+    """Proofread an edited document, re-checking only changed paragraphs"""
+    try:
+        return await proofreader_api.check_incremental(request.document_id, request.text)
+    except Exception as e:
+        raise _http_error(e)
+
+@app.delete("/api/proofread/incremental/{document_id}")
+async def proofread_forget(document_id: str):
+    """Release the stored state of an incrementally checked document"""
+    return {"success": True, "forgotten": proofreader_api.forget_document(document_id)}
+
+@app.post("/api/stream/generate")
+async def stream_generate(request: TextRequest):
+    """Stream an AI response as Server-Sent Events"""
+    return _stream_response(prompt_api.stream_generate(request.text))
+
+@app.post("/api/stream/write")
+async def stream_write(request: WriteRequest):
+    """Stream generated content as Server-Sent Events"""
+    return _stream_response(writer_api.stream_generate(
+        request.prompt, request.style, request.tone, request.word_count
+    ))
+
+@app.post("/api/stream/expand")
+async def stream_expand(request: ExpandRequest):
+    """Stream expanded text as Server-Sent Events"""
+    return _stream_response(writer_api.stream_expand(request.text, request.target_length))
+
+@app.post("/api/stream/rewrite")
+async def stream_rewrite(request: TextRequest):
+    """Stream rewritten text as Server-Sent Events"""
+    return _stream_response(rewriter_api.stream_rewrite(request.text))
+
+@app.post("/api/stream/translate")
+async def stream_translate(request: TranslateRequest):
+    """Stream a translation as Server-Sent Events"""
+    return _stream_response(translator_api.stream_translate(
+        request.text, request.target_language, request.source_language
+    ))
+
+@app.post("/api/stream/summarize")
+async def stream_summarize(request: SummarizeRequest):
+    """Stream a summary as Server-Sent Events"""
+    return _stream_response(summarizer_api.stream_summarize(
+        request.text, request.length, request.style
+    ))
+
+@app.post("/api/batch")
+async def batch(request: BatchRequest):
+    """Run many text operations with bounded concurrency"""
+    items = [item.model_dump() for item in request.items]
+    if len(items) > batch_api.MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {batch_api.MAX_ITEMS} items)")
+    
+    if request.stream:
+        async def lines():
+            async for result in batch_api.stream_batch(items):
+                yield json.dumps(result) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    return await batch_api.run_batch(items)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,7 @@
 """
 Neurify AI Engine - Simplified for Deployment
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -8,17 +9,28 @@ import os
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from core import executor, model_registry
+
 load_dotenv()
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 genai.configure(api_key=GEMINI_API_KEY)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build shared model clients before the first request
+    model_registry.warm_up()
+    yield
+    # Release model-call worker threads
+    executor.shutdown(wait=False)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Neurify AI Engine",
     description="AI processing engine with Gemini API integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -54,8 +66,8 @@ async def health_check():
 async def generate(request: TextRequest):
     """Generate AI response"""
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        response = model.generate_content(request.text)
+        model = model_registry.get_model('prompt')
+        response = await executor.generate_content(model, request.text)
         return AIResponse(success=True, data=response.text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
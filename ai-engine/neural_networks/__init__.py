@@ -9,6 +9,10 @@ from . import writer_api
 from . import rewriter_api
 from . import translator_api
 from . import proofreader_api
+from . import readability
+from . import language_id
+from . import batch_api
+from . import schemas
 
 __all__ = [
     'prompt_api',
@@ -16,5 +20,9 @@ __all__ = [
     'writer_api',
     'rewriter_api',
     'translator_api',
-    'proofreader_api'
+    'proofreader_api',
+    'readability',
+    'language_id',
+    'batch_api',
+    'schemas'
 ]
@@ -0,0 +1,138 @@
+"""
+Batch API - Run many text operations in one request
+"""
+
+import asyncio
+import json
+import os
+from typing import Dict, Any, List, AsyncIterator, Callable, Tuple
+
+from core.metrics import instrument
+from core.scheduler import priority
+from . import proofreader_api
+from . import rewriter_api
+from . import summarizer_api
+from . import translator_api
+
+# Operations a batch item may name, mapped to the function that serves it
+OPERATIONS: Dict[str, Callable] = {
+    'auto_fix': proofreader_api.auto_fix,
+    'check_all': proofreader_api.check_all,
+    'check_spelling': proofreader_api.check_spelling,
+    'check_grammar': proofreader_api.check_grammar,
+    'translate': translator_api.translate,
+    'detect_language': translator_api.detect_language,
+    'detect_languages': translator_api.detect_languages,
+    'adjust_tone': rewriter_api.adjust_tone,
+    'simplify': rewriter_api.simplify,
+    'paraphrase': rewriter_api.paraphrase,
+    'summarize': summarizer_api.summarize,
+}
+
+# Items processed at once within one batch
+MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '16'))
+# Largest batch accepted in one request
+MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '500'))
+
+def _group(items: List[Dict[str, Any]]) -> Dict[str, Tuple[Dict[str, Any], List[int]]]:
+    """Map each distinct (operation, params) to the item indices that requested it"""
+    groups: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+    for index, item in enumerate(items):
+        key = json.dumps(
+            [item.get('operation'), item.get('params') or {}],
+            sort_keys=True,
+            default=str
+        )
+        if key in groups:
+            groups[key][1].append(index)
+        else:
+            groups[key] = (item, [index])
+    return groups
+
+async def _run_item(item: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    operation = item.get('operation')
+    func = OPERATIONS.get(operation)
+    if func is None:
+        return {'success': False, 'result': None, 'error': f"Unknown operation: {operation}"}
+    
+    # Batch items queue behind interactive and normal model calls
+    async with semaphore:
+        try:
+            with priority('batch'):
+                result = await func(**(item.get('params') or {}))
+            return {'success': True, 'result': result, 'error': None}
+        except TypeError as e:
+            return {'success': False, 'result': None, 'error': f"Invalid parameters: {str(e)}"}
+        except Exception as e:
+            return {'success': False, 'result': None, 'error': str(e)}
+
+@instrument('batch.stream_batch')
+async def stream_batch(
+    items: List[Dict[str, Any]],
+    max_concurrency: int = MAX_CONCURRENCY
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run batch items and yield each result as soon as it is ready
+    
+    Identical items (same operation and params) run once and the result
+    is yielded for every index that asked for it.
+    
+    Args:
+        items: Dicts with 'operation' and 'params'
+        max_concurrency: Items run at once
+    
+    Yields:
+        Dicts with 'index', 'operation', 'success', 'result', 'error'
+    """
+    if len(items) > MAX_ITEMS:
+        raise ValueError(f"Batch too large: {len(items)} items (max {MAX_ITEMS})")
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = {}
+    for item, indices in _group(items).values():
+        task = asyncio.ensure_future(_run_item(item, semaphore))
+        tasks[task] = (item.get('operation'), indices)
+    
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                operation, indices = tasks[task]
+                outcome = task.result()
+                for index in indices:
+                    yield {'index': index, 'operation': operation, **outcome}
+    finally:
+        # Client went away or the consumer stopped early
+        for task in tasks:
+            task.cancel()
+
+@instrument('batch.run_batch')
+async def run_batch(
+    items: List[Dict[str, Any]],
+    max_concurrency: int = MAX_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Run batch items and return all results in input order
+    
+    Args:
+        items: Dicts with 'operation' and 'params'
+        max_concurrency: Items run at once
+    
+    Returns:
+        Dict with ordered 'results' and batch 'metadata'
+    """
+    results: List[Dict[str, Any]] = [None] * len(items)
+    async for result in stream_batch(items, max_concurrency):
+        results[result['index']] = result
+    
+    failed = sum(1 for r in results if not r['success'])
+    return {
+        'results': results,
+        'metadata': {
+            'total': len(items),
+            'unique': len(_group(items)),
+            'succeeded': len(items) - failed,
+            'failed': failed
+        }
+    }
@@ -0,0 +1,310 @@
+"""
+Language ID - Local language detection (no model call)
+
+Identifies the languages listed by translator_api.get_supported_languages
+from the text alone:
+
+- Script: code points are mapped to Unicode scripts with one binary
+  search over range boundaries. A script only one supported language
+  uses (Hangul, kana, Han, Arabic, Devanagari, Bengali, Thai, Cyrillic)
+  decides directly, with the script's share of the letters as the
+  confidence.
+- Letters only unsupported languages of a script use (Ukrainian і,
+  Serbian ј, Persian گ, Danish ø, Czech ř, ...) drop the confidence to
+  zero. Scripts unsupported languages also write (Cyrillic: Bulgarian;
+  Arabic: Persian; Devanagari: Marathi; Han: Japanese kanji) keep at most
+  SHARED_SCRIPT_CONFIDENCE unless a letter only the supported language
+  uses appears (Russian ы, Arabic ة, simplified Chinese 们, ...).
+- Latin script: character trigrams, padded at word boundaries and hashed
+  into PROFILE_BUCKETS buckets, are scored against per-language
+  log-probability profiles. The profiles include unsupported Latin
+  languages (Danish, Finnish, Catalan, ...), so the naive Bayes posterior
+  is calibrated against them and a text closest to one is unidentified.
+  The confidence is the posterior of the best language, scaled down for
+  texts shorter than FULL_CONFIDENCE_TRIGRAMS trigrams or that fit every
+  profile poorly.
+
+Profiles are built on first use from data/language_samples.tsv into one
+float32 (languages x buckets) array. Detection is vectorized in NumPy;
+detect_many scores a list of texts in a single pass. Callers use a
+result when accept() finds it confident enough and ask the model
+otherwise.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Detect locally before asking the model
+ENABLED = _env_flag('LANGUAGE_DETECT_LOCAL', 'true')
+# Lowest local confidence (0-1) used without asking the model
+MIN_CONFIDENCE = float(os.getenv('LANGUAGE_DETECT_MIN_CONFIDENCE', '0.9'))
+
+SAMPLES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'language_samples.tsv')
+
+LANGUAGES = {
+    'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German', 'it': 'Italian',
+    'pt': 'Portuguese', 'ru': 'Russian', 'ja': 'Japanese', 'ko': 'Korean', 'zh': 'Chinese',
+    'ar': 'Arabic', 'hi': 'Hindi', 'bn': 'Bengali', 'tr': 'Turkish', 'vi': 'Vietnamese',
+    'th': 'Thai', 'pl': 'Polish', 'nl': 'Dutch', 'sv': 'Swedish', 'id': 'Indonesian',
+}
+
+# Trigram hash buckets per language profile (2 ** PROFILE_BITS)
+PROFILE_BITS = 13
+PROFILE_BUCKETS = 1 << PROFILE_BITS
+# Add-k smoothing of trigram counts
+SMOOTHING = 0.5
+
+# Every letter is the middle, start and end of three overlapping trigrams;
+# scores are divided by this before the posterior so it counts once
+TRIGRAM_OVERLAP = 3
+# Latin texts with fewer trigrams get proportionally less confidence
+FULL_CONFIDENCE_TRIGRAMS = 16
+# Mean trigram log-probability gain over a uniform profile below which a
+# Latin text fits no profile well (another language, names, code)
+MIN_FIT = 0.6
+
+# Texts with fewer letters are not identified locally
+MIN_LETTERS = 3
+
+# Highest confidence of a script shared with unsupported languages when
+# no letter only the supported language uses appears; below MIN_CONFIDENCE
+# so such texts go to the model
+SHARED_SCRIPT_CONFIDENCE = 0.5
+
+# (first, last code point, script); 'unsupported' marks letters of scripts
+# no supported language uses
+_SCRIPT_RANGES = (
+    (0x0041, 0x005A, 'latin'), (0x0061, 0x007A, 'latin'), (0x00C0, 0x024F, 'latin'), (0x1E00, 0x1EFF, 'latin'),
+    (0x0370, 0x03FF, 'unsupported'), (0x0400, 0x04FF, 'cyrillic'), (0x0530, 0x05FF, 'unsupported'),
+    (0x0600, 0x06FF, 'arabic'), (0x0750, 0x077F, 'arabic'),
+    (0x0900, 0x097F, 'devanagari'), (0x0980, 0x09FF, 'bengali'), (0x0A00, 0x0DFF, 'unsupported'),
+    (0x0E00, 0x0E7F, 'thai'), (0x10A0, 0x10FF, 'unsupported'), (0x1100, 0x11FF, 'hangul'),
+    (0x1200, 0x137F, 'unsupported'), (0x3040, 0x30FF, 'kana'), (0x3130, 0x318F, 'hangul'),
+    (0x31F0, 0x31FF, 'kana'), (0x3400, 0x4DBF, 'han'), (0x4E00, 0x9FFF, 'han'),
+    (0xAC00, 0xD7AF, 'hangul'), (0xF900, 0xFAFF, 'han'), (0xFB50, 0xFDFF, 'arabic'),
+    (0xFE70, 0xFEFF, 'arabic'), (0xFF66, 0xFF9F, 'kana'),
+)
+SCRIPTS = ('other', 'latin', 'cyrillic', 'arabic', 'devanagari', 'bengali', 'thai', 'hangul', 'kana', 'han', 'unsupported')
+
+# Scripts that identify a supported language on their own (kana and Han: see detect_many)
+_SCRIPT_LANGUAGE = {
+    'cyrillic': 'ru', 'arabic': 'ar', 'devanagari': 'hi', 'bengali': 'bn', 'thai': 'th', 'hangul': 'ko',
+}
+
+# Letters of unsupported languages written in the same script that no
+# supported language uses
+_FOREIGN_LETTERS = {
+    'latin': 'æøřůěőűþðșțţ',  # Danish, Norwegian, Czech, Hungarian, Icelandic, Romanian
+    'cyrillic': 'іїєґўјљњћђџѓќѕәғқңөұүһҗӣӯҳҷ',  # Ukrainian, Belarusian, Serbian, Macedonian, Central Asian
+    'arabic': 'پچژگکیٹڈڑںےھەۆێڵڕۇۈېڭټډړښږځڅ',  # Persian, Urdu, Kurdish, Uyghur, Pashto
+    'bengali': 'ৰৱ',  # Assamese
+}
+
+# Scripts unsupported languages share with a supported one, and letters
+# only that supported language writes (Chinese: simplified and traditional
+# characters Japanese does not use)
+_NATIVE_LETTERS = {
+    'cyrillic': 'ыэё',  # not Bulgarian, Serbian, Macedonian
+    'arabic': 'ةيك',  # Persian and Urdu write ی and ک
+    'devanagari': '',  # Hindi, Marathi and Nepali share every letter
+    'han': '们这个说时对发么吗呢还给让从过为开关东车长门问间见话语请谢钱书买卖电脑网应该办经們說對發麼嗎沒讓從關聽樣點裡吧啊',
+}
+
+_NON_LETTER = re.compile(r'[\W\d_]+')
+_SPACE = ord(' ')
+_MULTIPLIERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], np.uint64)
+
+_stats = {'local': 0, 'fallback': 0}
+
+_FIRSTS = np.array([r[0] for r in _SCRIPT_RANGES], np.uint64)
+_LASTS = np.array([r[1] for r in _SCRIPT_RANGES], np.uint64)
+_RANGE_SCRIPTS = np.array([SCRIPTS.index(r[2]) for r in _SCRIPT_RANGES], np.int64)
+_LATIN, _KANA, _HAN = SCRIPTS.index('latin'), SCRIPTS.index('kana'), SCRIPTS.index('han')
+_SHARED = np.array([name in _NATIVE_LETTERS for name in SCRIPTS])
+_FOREIGN_CODES = np.array(sorted(ord(c) for letters in _FOREIGN_LETTERS.values() for c in letters), np.uint64)
+_NATIVE_CODES = np.array(sorted(ord(c) for letters in _NATIVE_LETTERS.values() for c in letters), np.uint64)
+
+def _count_in(codes: np.ndarray, cells: np.ndarray, members: np.ndarray, size: int) -> np.ndarray:
+    """Occurrences of the sorted code points members per cell"""
+    found = members[np.searchsorted(members[:-1], codes)] == codes
+    return np.bincount(cells[found], minlength=size)
+
+def _encode(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Code points of the cleaned texts, joined
+    
+    Each text is lowercased, non-letters become single spaces and it is
+    padded with a space on both sides.
+    
+    Returns:
+        (uint64 code points, owning text index per code point, letters,
+        _FOREIGN_LETTERS and _NATIVE_LETTERS per text and script as
+        (n, len(SCRIPTS)) arrays)
+    """
+    cleaned = [f" {_NON_LETTER.sub(' ', text.lower()).strip()} " for text in texts]
+    codes = np.frombuffer(''.join(cleaned).encode('utf-32-le'), np.uint32).astype(np.uint64)
+    owner = np.repeat(np.arange(len(cleaned)), [len(c) for c in cleaned])
+    
+    index = np.searchsorted(_FIRSTS, codes, 'right') - 1
+    inside = (index >= 0) & (codes <= _LASTS[np.maximum(index, 0)])
+    script = np.where(inside, _RANGE_SCRIPTS[np.maximum(index, 0)], 0)
+    cells = owner * len(SCRIPTS) + script
+    size = len(cleaned) * len(SCRIPTS)
+    shape = (len(cleaned), len(SCRIPTS))
+    letters = np.bincount(cells, minlength=size).reshape(shape)
+    foreign = _count_in(codes, cells, _FOREIGN_CODES, size).reshape(shape)
+    native = _count_in(codes, cells, _NATIVE_CODES, size).reshape(shape)
+    return codes, owner, letters, foreign, native
+
+def _trigrams(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Bucket of every trigram centred on a letter, and that letter's position"""
+    middle = np.nonzero(codes[1:-1] != _SPACE)[0] + 1
+    mixed = codes[middle - 1] * _MULTIPLIERS[0] + codes[middle] * _MULTIPLIERS[1] + codes[middle + 1] * _MULTIPLIERS[2]
+    return (mixed >> np.uint64(64 - PROFILE_BITS)).astype(np.intp), middle
+
+@lru_cache(maxsize=1)
+def _profiles() -> Tuple[Tuple[str, ...], np.ndarray]:
+    """
+    Latin-script language codes and their (languages x buckets) log-probabilities
+    
+    Codes missing from LANGUAGES are unsupported languages.
+    """
+    samples: Dict[str, List[str]] = {}
+    with open(SAMPLES_PATH, encoding='utf-8') as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                code, text = line.rstrip('\n').split('\t', 1)
+                samples.setdefault(code, []).append(text)
+    codes = tuple(samples)
+    counts = np.zeros((len(codes), PROFILE_BUCKETS), np.float64)
+    for row, code in enumerate(codes):
+        buckets, _ = _trigrams(_encode(samples[code])[0])
+        counts[row] = np.bincount(buckets, minlength=PROFILE_BUCKETS)
+    smoothed = counts + SMOOTHING
+    # Relative to a uniform profile, so a sum over trigrams also measures fit
+    log_probs = np.log(smoothed / smoothed.sum(axis=1, keepdims=True)) + np.log(PROFILE_BUCKETS)
+    return codes, log_probs.astype(np.float32)
+
+def detect(text: str) -> Dict[str, Any]:
+    """
+    Detect the language of a text locally
+    
+    Args:
+        text: Text to analyze
+    
+    Returns:
+        Dict with code and language (None when unidentified), confidence
+        (0-1) and the dominant script
+    """
+    return detect_many([text])[0]
+
+def detect_many(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Detect the language of each text in one vectorized pass
+    
+    Args:
+        texts: Texts to analyze
+    
+    Returns:
+        One result per text, as from detect()
+    """
+    if not texts:
+        return []
+    latin_codes, log_probs = _profiles()
+    codes, owner, letters, foreign, native = _encode(texts)
+    rows = np.arange(len(texts))
+    
+    buckets, positions = _trigrams(codes)
+    text_of = owner[positions]
+    trigrams = np.bincount(text_of, minlength=len(texts))
+    scores = np.zeros((len(texts), len(latin_codes)), np.float32)
+    present = np.nonzero(trigrams)[0]
+    if len(present):
+        starts = np.searchsorted(text_of, present)
+        scores[present] = np.add.reduceat(log_probs[:, buckets], starts, axis=1).T
+    
+    total = letters[:, 1:].sum(axis=1)
+    script = np.where(total > 0, letters[:, 1:].argmax(axis=1) + 1, 0)
+    share = letters[rows, script] / np.maximum(total, 1)
+    
+    # Latin: naive Bayes posterior over supported and unsupported languages,
+    # damped for short or poorly fitting texts
+    best = scores.argmax(axis=1)
+    top = scores[rows, best]
+    posterior = 1.0 / np.exp((scores - top[:, None]) / TRIGRAM_OVERLAP).sum(axis=1)
+    fit = np.clip(top / np.maximum(trigrams, 1) / MIN_FIT, 0.0, 1.0)
+    latin = posterior * share * np.minimum(1.0, trigrams / FULL_CONFIDENCE_TRIGRAMS) * fit
+    
+    # Japanese mixes kana into Han text; Chinese has none
+    kana, han = letters[:, _KANA], letters[:, _HAN]
+    japanese = kana >= 0.05 * (kana + han)
+    cjk = (kana + han) / np.maximum(total, 1)
+    
+    confidence = np.where(script == _LATIN, latin, np.where((script == _KANA) | (script == _HAN), cjk, share))
+    shared = _SHARED[script] & (native[rows, script] == 0) & ~((script == _HAN) & japanese)
+    confidence[shared] = np.minimum(confidence[shared], SHARED_SCRIPT_CONFIDENCE)
+    confidence[(total < MIN_LETTERS) | (foreign[rows, script] > 0)] = 0.0
+    
+    results = []
+    for i in range(len(texts)):
+        name = SCRIPTS[script[i]]
+        if total[i] < MIN_LETTERS:
+            code = None
+        elif name == 'latin':
+            code = latin_codes[best[i]] if latin_codes[best[i]] in LANGUAGES else None
+        elif name in ('kana', 'han'):
+            code = 'ja' if japanese[i] else 'zh'
+        else:
+            code = _SCRIPT_LANGUAGE.get(name)
+        results.append({
+            'code': code,
+            'language': LANGUAGES.get(code),
+            'confidence': round(float(confidence[i]), 4) if code else 0.0,
+            'script': name,
+        })
+    return results
+
+def accept(result: Dict[str, Any]) -> bool:
+    """
+    Whether a local result is confident enough to use without the model
+    
+    Counts the decision for stats().
+    
+    Args:
+        result: Result from detect() or detect_many()
+    
+    Returns:
+        True when local detection is enabled and the result names a
+        language with at least MIN_CONFIDENCE
+    """
+    accepted = ENABLED and result['code'] is not None and result['confidence'] >= MIN_CONFIDENCE
+    _stats['local' if accepted else 'fallback'] += 1
+    return accepted
+
+def stats() -> Dict[str, Any]:
+    """
+    Local detection decisions since startup
+    
+    Returns:
+        Dict with local (answered without the model), fallback and the
+        local rate
+    """
+    total = _stats['local'] + _stats['fallback']
+    return {
+        'enabled': ENABLED,
+        'min_confidence': MIN_CONFIDENCE,
+        **_stats,
+        'local_rate': round(_stats['local'] / total, 4) if total else 0.0
+    }
+
+def clear() -> None:
+    """Reset the counters"""
+    for key in _stats:
+        _stats[key] = 0
@@ -2,9 +2,15 @@
 Prompt API - Generate responses from user prompts
 """
 
-import google.generativeai as genai
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 
+from core.executor import generate_content, stream_content
+from core.metrics import instrument
+from core.model_registry import JSON_OUTPUT, get_model, model_name_for
+from core.structured_output import parse_model
+from .schemas import IntentAnalysis
+
+@instrument('prompt.generate')
 async def generate(
     prompt: str,
     context: Optional[str] = None,
@@ -24,7 +30,7 @@ async def generate(
         Dict with 'text' and 'metadata'
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('prompt')
         
         # Combine prompt with context if provided
         full_prompt = f"{context}\n\n{prompt}" if context else prompt
@@ -35,7 +41,8 @@ async def generate(
             'max_output_tokens': max_tokens,
         }
         
-        response = model.generate_content(
+        response = await generate_content(
+            model,
             full_prompt,
             generation_config=generation_config
         )
@@ -43,7 +50,7 @@ async def generate(
         return {
             'text': response.text,
             'metadata': {
-                'model': 'gemini-2.0-flash-exp',
+                'model': model_name_for('prompt'),
                 'temperature': temperature,
                 'prompt_tokens': len(full_prompt.split()),
                 'completion_tokens': len(response.text.split())
@@ -52,6 +59,41 @@ async def generate(
     except Exception as e:
         raise Exception(f"Prompt API Error: {str(e)}")
 
+@instrument('prompt.stream_generate')
+async def stream_generate(
+    prompt: str,
+    context: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024
+) -> AsyncIterator[str]:
+    """
+    Stream a response from Gemini Prompt API
+    
+    Args:
+        prompt: User's prompt text
+        context: Optional context for the prompt
+        temperature: Creativity level (0-1)
+        max_tokens: Maximum response length
+    
+    Yields:
+        Chunks of generated text
+    """
+    try:
+        model = get_model('prompt')
+        
+        full_prompt = f"{context}\n\n{prompt}" if context else prompt
+        
+        generation_config = {
+            'temperature': temperature,
+            'max_output_tokens': max_tokens,
+        }
+        
+        async for chunk in stream_content(model, full_prompt, generation_config=generation_config):
+            yield chunk
+    except Exception as e:
+        raise Exception(f"Prompt API Error: {str(e)}")
+
+@instrument('prompt.analyze_intent')
 async def analyze_intent(text: str) -> Dict[str, Any]:
     """
     Analyze user intent from text
@@ -63,7 +105,7 @@ async def analyze_intent(text: str) -> Dict[str, Any]:
         Dict with intent analysis
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('prompt', JSON_OUTPUT)
         
         prompt = f"""Analyze the intent of this text and provide:
 1. Primary intent (e.g., question, request, statement, command)
@@ -73,13 +115,14 @@ async def analyze_intent(text: str) -> Dict[str, Any]:
 
 Text: "{text}"
 
-Respond in JSON format."""
+Respond in JSON with fields: primary_intent, topic, sentiment, urgency"""
         
-        response = model.generate_content(prompt)
+        response = await generate_content(model, prompt)
+        analysis = parse_model(response.text, IntentAnalysis, 'prompt.analyze_intent')
         
         return {
             'success': True,
-            'intent_analysis': response.text,
+            'intent_analysis': analysis.model_dump(),
             'original_text': text
         }
     except Exception as e:
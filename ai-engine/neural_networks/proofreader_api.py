@@ -2,21 +2,215 @@
 Proofreader API - Grammar, spelling, and style checking
 """
 
-import google.generativeai as genai
-from typing import Dict, Any, List
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 
-async def check(text: str) -> Dict[str, Any]:
+from core.executor import generate_content
+from core.metrics import instrument
+from core.model_registry import DETERMINISTIC, JSON_OUTPUT, get_model, model_name_for
+from core.response_cache import cache, make_key
+from core.structured_output import parse_model
+from core.text_chunking import paragraph_spans
+from . import readability
+from .schemas import Finding, FindingsReport, GrammarReport, ProofreadingReport, SpellingReport
+
+# Finding categories reported by check_all
+CATEGORIES = ('grammar', 'spelling', 'punctuation', 'style')
+
+# Documents whose last checked version is kept for incremental checks
+MAX_TRACKED_DOCUMENTS = int(os.getenv('PROOFREAD_MAX_DOCUMENTS', '1000'))
+# Changed paragraphs re-checked at once per document
+PARAGRAPH_CONCURRENCY = int(os.getenv('PROOFREAD_PARAGRAPH_CONCURRENCY', '8'))
+
+# document_id -> {paragraph text: check_all result for that paragraph}
+_documents: 'OrderedDict[str, Dict[str, Dict[str, Any]]]' = OrderedDict()
+_documents_lock = threading.Lock()
+
+@instrument('proofreader.check_all')
+async def check_all(text: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Grammar, spelling, punctuation and style check in one model call
+    
+    Each category is also cached on its own, so later check, check_grammar
+    and check_spelling calls on the same text are served without another
+    model round trip.
+    
+    Args:
+        text: Text to check
+        use_cache: Set False to skip the response cache
+    
+    Returns:
+        Dict with 'findings' (category, text, correction, explanation and
+        character offsets), the same findings grouped by 'categories',
+        'overall_quality_score' and local 'readability' metrics
+    """
+    cache_key = _check_all_key(text)
+    cached = await cache.get(cache_key, use_cache)
+    if cached is not None:
+        return cached
+    
+    try:
+        model = get_model('proofreader', JSON_OUTPUT)
+        
+        prompt = f"""Proofread this text. Report every grammar, spelling, punctuation and style issue.
+
+Respond with JSON of this shape:
+{{"findings": [{{"category": "grammar" | "spelling" | "punctuation" | "style", "type": "short error type", "text": "the exact text as written, copied verbatim", "correction": "replacement text", "explanation": "brief reason"}}], "overall_quality_score": 0-100}}
+
+Text: {text}"""
+        
+        response = await generate_content(model, prompt)
+        report = parse_model(response.text, FindingsReport, 'proofreader.check_all')
+        
+        findings = _locate_findings(text, report.findings)
+        categories = {
+            category: [f for f in findings if f['category'] == category]
+            for category in CATEGORIES
+        }
+        
+        result = {
+            'success': True,
+            'findings': findings,
+            'categories': categories,
+            'overall_quality_score': report.overall_quality_score,
+            'readability': readability.score(text),
+            'text_length': len(text.split())
+        }
+        
+        # A reply recovered by the fallback parser may have lost findings
+        if not report.parsed_by_fallback:
+            await cache.set(cache_key, result)
+            for category, items in categories.items():
+                await cache.set(_category_key(category, text), items)
+        return result
+    except Exception as e:
+        raise Exception(f"Proofreader API Error: {str(e)}")
+
+@instrument('proofreader.check_incremental')
+async def check_incremental(document_id: str, text: str) -> Dict[str, Any]:
+    """
+    Proofread an edited document, re-checking only changed paragraphs
+    
+    The text is diffed paragraph by paragraph against the last version
+    checked under the same document_id. Paragraphs whose text is
+    unchanged (even if moved) keep their findings with offsets shifted
+    to their new position; new or edited paragraphs go through
+    check_all. State is held per process.
+    
+    Args:
+        document_id: Stable client-side identifier of the document
+        text: Full current text of the document
+    
+    Returns:
+        Dict like check_all's with document-wide offsets, plus
+        'document_id' and 'metadata' on how much was re-checked
+    """
+    try:
+        with _documents_lock:
+            previous = _documents.get(document_id, {})
+        
+        spans = paragraph_spans(text)
+        changed = list({paragraph for _, paragraph in spans if paragraph not in previous})
+        
+        semaphore = asyncio.Semaphore(PARAGRAPH_CONCURRENCY)
+        
+        async def check_paragraph(paragraph: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await check_all(paragraph)
+        
+        fresh = dict(zip(changed, await asyncio.gather(*(check_paragraph(p) for p in changed))))
+        
+        current: Dict[str, Dict[str, Any]] = {}
+        findings: List[Dict[str, Any]] = []
+        weighted_score = scored_chars = 0
+        for start, paragraph in spans:
+            result = fresh.get(paragraph) or previous[paragraph]
+            current[paragraph] = result
+            for finding in result['findings']:
+                shifted = dict(finding)
+                if shifted['start'] is not None:
+                    shifted['start'] += start
+                    shifted['end'] += start
+                findings.append(shifted)
+            if isinstance(result.get('overall_quality_score'), (int, float)):
+                weighted_score += result['overall_quality_score'] * len(paragraph)
+                scored_chars += len(paragraph)
+        
+        with _documents_lock:
+            _documents[document_id] = current
+            _documents.move_to_end(document_id)
+            while len(_documents) > MAX_TRACKED_DOCUMENTS:
+                _documents.popitem(last=False)
+        
+        total_chars = sum(len(p) for _, p in spans)
+        checked_chars = sum(len(p) for p in changed)
+        return {
+            'success': True,
+            'document_id': document_id,
+            'findings': findings,
+            'categories': {
+                category: [f for f in findings if f['category'] == category]
+                for category in CATEGORIES
+            },
+            'overall_quality_score': round(weighted_score / scored_chars) if scored_chars else None,
+            'readability': readability.score(text),
+            'text_length': len(text.split()),
+            'metadata': {
+                'paragraphs': len(spans),
+                'rechecked_paragraphs': len(changed),
+                'reused_paragraphs': len(spans) - len(changed),
+                'checked_chars': checked_chars,
+                'total_chars': total_chars
+            }
+        }
+    except Exception as e:
+        raise Exception(f"Incremental Proofreading Error: {str(e)}")
+
+def forget_document(document_id: str) -> bool:
+    """
+    Drop the stored state of an incrementally checked document
+    
+    Args:
+        document_id: Identifier passed to check_incremental
+    
+    Returns:
+        True if the document was tracked
+    """
+    with _documents_lock:
+        return _documents.pop(document_id, None) is not None
+
+@instrument('proofreader.check')
+async def check(text: str, use_cache: bool = True) -> Dict[str, Any]:
     """
     Comprehensive grammar and style check
     
     Args:
         text: Text to check
+        use_cache: Set False to skip the response cache
     
     Returns:
         Dict with all errors and suggestions
     """
+    combined = await cache.get(_check_all_key(text), use_cache)
+    if combined is not None:
+        categories = combined['categories']
+        return {
+            'success': True,
+            'analysis': ProofreadingReport(
+                grammar_errors=categories['grammar'],
+                spelling_errors=categories['spelling'],
+                punctuation_issues=categories['punctuation'],
+                style_suggestions=categories['style'],
+                overall_quality_score=combined['overall_quality_score']
+            ).model_dump(),
+            'text_length': combined['text_length']
+        }
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('proofreader', JSON_OUTPUT)
         
         prompt = f"""Perform a comprehensive proofreading check on this text. Identify:
 1. Grammar errors
@@ -27,30 +221,45 @@ async def check(text: str) -> Dict[str, Any]:
 
 Text: {text}
 
-Provide a detailed analysis in JSON format with fields: grammar_errors, spelling_errors, punctuation_issues, style_suggestions, overall_quality_score (0-100)"""
+Provide a detailed analysis in JSON format with fields: grammar_errors (list), spelling_errors (list), punctuation_issues (list), style_suggestions (list), clarity_suggestions (list), overall_quality_score (0-100)"""
         
-        response = model.generate_content(prompt)
+        response = await generate_content(model, prompt)
+        report = parse_model(response.text, ProofreadingReport, 'proofreader.check')
         
         return {
             'success': True,
-            'analysis': response.text,
+            'analysis': report.model_dump(),
             'text_length': len(text.split())
         }
     except Exception as e:
         raise Exception(f"Proofreader API Error: {str(e)}")
 
-async def check_grammar(text: str) -> List[Dict[str, Any]]:
+@instrument('proofreader.check_grammar')
+async def check_grammar(text: str, use_cache: bool = True) -> List[Dict[str, Any]]:
     """
     Check grammar errors
     
     Args:
         text: Text to check
+        use_cache: Set False to skip the response cache
     
     Returns:
         List of grammar errors with suggestions
     """
+    findings = await cache.get(_category_key('grammar', text), use_cache)
+    if findings is not None:
+        return [
+            {
+                'error': f['text'],
+                'type': f['type'],
+                'correction': f['correction'],
+                'explanation': f['explanation']
+            }
+            for f in findings
+        ]
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('proofreader', JSON_OUTPUT)
         
         prompt = f"""Identify all grammar errors in this text. For each error, provide:
 - The incorrect text
@@ -60,38 +269,43 @@ async def check_grammar(text: str) -> List[Dict[str, Any]]:
 
 Text: {text}
 
-List each error on a new line in this format: ERROR | TYPE | CORRECTION | EXPLANATION"""
-        
-        response = model.generate_content(prompt)
+Respond in JSON: {{"errors": [{{"error": "...", "type": "...", "correction": "...", "explanation": "..."}}]}}"""
         
-        errors = []
-        for line in response.text.strip().split('\n'):
-            if '|' in line:
-                parts = [p.strip() for p in line.split('|')]
-                if len(parts) >= 4:
-                    errors.append({
-                        'error': parts[0],
-                        'type': parts[1],
-                        'correction': parts[2],
-                        'explanation': parts[3]
-                    })
+        response = await generate_content(model, prompt)
+        report = parse_model(
+            response.text,
+            GrammarReport,
+            'proofreader.check_grammar',
+            fallback=lambda raw: _split_pipes(raw, ('error', 'type', 'correction', 'explanation'))
+        )
         
-        return errors
+        return [error.model_dump() for error in report.errors]
     except Exception as e:
         raise Exception(f"Grammar Check Error: {str(e)}")
 
-async def check_spelling(text: str) -> List[Dict[str, str]]:
+@instrument('proofreader.check_spelling')
+async def check_spelling(text: str, use_cache: bool = True) -> List[Dict[str, str]]:
     """
     Check spelling errors
     
     Args:
         text: Text to check
+        use_cache: Set False to skip the response cache
     
     Returns:
         List of spelling errors with corrections
     """
+    cache_key = make_key('proofreader.check_spelling', text, model=model_name_for('proofreader'))
+    cached = await cache.get(cache_key, use_cache)
+    if cached is not None:
+        return cached
+    
+    findings = await cache.get(_category_key('spelling', text), use_cache)
+    if findings is not None:
+        return [{'misspelled': f['text'], 'correction': f['correction']} for f in findings]
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('proofreader', JSON_OUTPUT)
         
         prompt = f"""Identify all spelling errors in this text. For each error, provide:
 - The misspelled word
@@ -99,78 +313,87 @@ async def check_spelling(text: str) -> List[Dict[str, str]]:
 
 Text: {text}
 
-List each error on a new line in this format: MISSPELLED | CORRECT"""
-        
-        response = model.generate_content(prompt)
+Respond in JSON: {{"errors": [{{"misspelled": "...", "correction": "..."}}]}}"""
         
-        errors = []
-        for line in response.text.strip().split('\n'):
-            if '|' in line:
-                parts = [p.strip() for p in line.split('|')]
-                if len(parts) >= 2:
-                    errors.append({
-                        'misspelled': parts[0],
-                        'correction': parts[1]
-                    })
+        response = await generate_content(model, prompt)
+        report = parse_model(
+            response.text,
+            SpellingReport,
+            'proofreader.check_spelling',
+            fallback=lambda raw: _split_pipes(raw, ('misspelled', 'correction'))
+        )
+        errors = [error.model_dump() for error in report.errors]
         
+        if not report.parsed_by_fallback:
+            await cache.set(cache_key, errors)
         return errors
     except Exception as e:
         raise Exception(f"Spelling Check Error: {str(e)}")
 
-async def get_readability_score(text: str) -> Dict[str, Any]:
+@instrument('proofreader.get_readability_score')
+async def get_readability_score(text: str, include_suggestions: bool = False) -> Dict[str, Any]:
     """
     Calculate readability score
     
+    Scores are computed locally; the model is only called when
+    improvement suggestions are requested.
+    
     Args:
         text: Text to analyze
+        include_suggestions: Ask the model for improvement suggestions
     
     Returns:
         Dict with readability metrics
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        scores = readability.score(text)
         
-        prompt = f"""Analyze the readability of this text and provide:
-1. Overall readability score (0-100, where 100 is easiest to read)
-2. Reading level (e.g., "8th grade", "college", "professional")
-3. Average sentence length
-4. Vocabulary complexity (simple/moderate/complex)
-5. Suggestions for improvement
+        suggestions = None
+        if include_suggestions:
+            model = get_model('proofreader')
+            
+            prompt = f"""This text has a Flesch reading ease of {scores['flesch_reading_ease']} ({scores['reading_level']} level), an average sentence length of {scores['avg_sentence_length']} words and {scores['vocabulary_complexity']} vocabulary.
+Suggest specific, concrete improvements that would make it easier to read.
 
 Text: {text}
 
-Respond in JSON format."""
-        
-        response = model.generate_content(prompt)
-        
-        word_count = len(text.split())
-        sentence_count = text.count('.') + text.count('!') + text.count('?')
-        avg_words_per_sentence = word_count / max(sentence_count, 1)
+Suggestions:"""
+            
+            response = await generate_content(model, prompt)
+            suggestions = response.text
         
         return {
             'success': True,
-            'analysis': response.text,
+            'analysis': scores,
+            'suggestions': suggestions,
             'metrics': {
-                'word_count': word_count,
-                'sentence_count': sentence_count,
-                'avg_words_per_sentence': round(avg_words_per_sentence, 1)
+                'word_count': scores['word_count'],
+                'sentence_count': scores['sentence_count'],
+                'avg_words_per_sentence': scores['avg_sentence_length']
             }
         }
     except Exception as e:
         raise Exception(f"Readability Analysis Error: {str(e)}")
 
-async def auto_fix(text: str) -> str:
+@instrument('proofreader.auto_fix')
+async def auto_fix(text: str, use_cache: bool = True) -> str:
     """
     Automatically fix all errors
     
     Args:
         text: Text to fix
+        use_cache: Set False to skip the response cache
     
     Returns:
         Corrected text
     """
+    cache_key = make_key('proofreader.auto_fix', text, model=model_name_for('proofreader'))
+    cached = await cache.get(cache_key, use_cache)
+    if cached is not None:
+        return cached
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('proofreader', DETERMINISTIC)
         
         prompt = f"""Fix all grammar, spelling, punctuation, and style errors in this text. 
 Return ONLY the corrected text without explanations or formatting.
@@ -179,8 +402,62 @@ Original text: {text}
 
 Corrected text:"""
         
-        response = model.generate_content(prompt)
+        response = await generate_content(model, prompt)
         
-        return response.text.strip()
+        fixed = response.text.strip()
+        await cache.set(cache_key, fixed)
+        return fixed
     except Exception as e:
         raise Exception(f"Auto-fix Error: {str(e)}")
+
+def _split_pipes(text: str, fields: tuple) -> List[Dict[str, str]]:
+    """Fallback parser for the older "A | B | C" one-error-per-line format"""
+    rows = []
+    for line in text.strip().split('\n'):
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) >= len(fields):
+            rows.append(dict(zip(fields, parts)))
+    return rows
+
+# Findings carry character offsets, so their entries are keyed on the exact
+# text: surrounding whitespace or other line endings would shift them
+def _check_all_key(text: str) -> Optional[str]:
+    return make_key('proofreader.check_all', text, model=model_name_for('proofreader'), normalize=False)
+
+def _category_key(category: str, text: str) -> Optional[str]:
+    return make_key(
+        f'proofreader.findings.{category}', text, model=model_name_for('proofreader'), normalize=False
+    )
+
+def _locate_findings(text: str, raw_findings: List[Finding]) -> List[Dict[str, Any]]:
+    """Normalize model findings and attach character offsets into text"""
+    findings = []
+    # Next search position per snippet, so repeated snippets map to successive occurrences
+    search_from: Dict[str, int] = {}
+    
+    for item in raw_findings:
+        category = item.category.lower()
+        if category not in CATEGORIES:
+            category = 'style'
+        
+        snippet = item.text
+        start = -1
+        if snippet:
+            start = text.find(snippet, search_from.get(snippet, 0))
+            if start == -1:
+                start = text.find(snippet)
+            if start != -1:
+                search_from[snippet] = start + len(snippet)
+        
+        findings.append({
+            'category': category,
+            'type': item.type or category,
+            'text': snippet,
+            'correction': item.correction,
+            'explanation': item.explanation,
+            'start': start if start != -1 else None,
+            'end': start + len(snippet) if start != -1 else None
+        })
+    
+    findings.sort(key=lambda f: (f['start'] is None, f['start'] or 0))
+    return findings
@@ -0,0 +1,140 @@
+"""
+Readability - Local readability metrics (no model call)
+
+Flesch Reading Ease, Flesch-Kincaid Grade, Gunning Fog and SMOG computed
+from sentence, word and syllable counts.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Dict, Any, List
+
+from core.text_chunking import split_sentences
+
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+_VOWEL_GROUP = re.compile(r'[aeiouy]+')
+# Silent endings: "-es"/"-e" after a consonant, "-ed" except after t/d
+_SILENT_SUFFIX = re.compile(r'(?:[^laeiouy]es|[^laeiouytd]ed|[^laeiouy]e)$')
+
+# Share of 3+ syllable words above which vocabulary counts as harder
+MODERATE_VOCABULARY = 0.10
+COMPLEX_VOCABULARY = 0.20
+
+@lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
+    """
+    Estimate the syllables in an English word
+    
+    Args:
+        word: Single word
+    
+    Returns:
+        Syllable count (at least 1)
+    """
+    word = word.lower()
+    if len(word) <= 3:
+        return 1
+    word = _SILENT_SUFFIX.sub('', word)
+    if word.startswith('y'):
+        word = word[1:]
+    return max(1, len(_VOWEL_GROUP.findall(word)))
+
+def _counts(text: str) -> List[int]:
+    """Return [sentences, words, syllables, polysyllabic words] for text"""
+    sentences = len(split_sentences(text))
+    words = syllables = polysyllables = 0
+    for word in _WORD.findall(text):
+        n = count_syllables(word)
+        words += 1
+        syllables += n
+        if n >= 3:
+            polysyllables += 1
+    return [sentences, words, syllables, polysyllables]
+
+def _reading_level(grade: float) -> str:
+    grade = round(grade)
+    if grade <= 1:
+        return "1st grade"
+    if grade <= 12:
+        suffix = {2: 'nd', 3: 'rd'}.get(grade, 'th')
+        return f"{grade}{suffix} grade"
+    if grade <= 16:
+        return "college"
+    return "professional"
+
+def score_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Compute readability metrics for many documents
+    
+    Counting runs once per document; the formulas are then applied
+    column-wise over the count vectors. Syllable counts are memoized
+    across the whole batch.
+    
+    Args:
+        texts: Documents to score
+    
+    Returns:
+        One metrics dict per document, in input order
+    """
+    counts = [_counts(text) for text in texts]
+    
+    sentences = [max(c[0], 1) for c in counts]
+    words = [max(c[1], 1) for c in counts]
+    words_per_sentence = [w / s for w, s in zip(words, sentences)]
+    syllables_per_word = [c[2] / w for c, w in zip(counts, words)]
+    complex_ratio = [c[3] / w for c, w in zip(counts, words)]
+    
+    reading_ease = [
+        206.835 - 1.015 * wps - 84.6 * spw
+        for wps, spw in zip(words_per_sentence, syllables_per_word)
+    ]
+    grade = [
+        0.39 * wps + 11.8 * spw - 15.59
+        for wps, spw in zip(words_per_sentence, syllables_per_word)
+    ]
+    fog = [0.4 * (wps + 100 * ratio) for wps, ratio in zip(words_per_sentence, complex_ratio)]
+    smog = [
+        1.0430 * math.sqrt(c[3] * 30 / s) + 3.1291
+        for c, s in zip(counts, sentences)
+    ]
+    
+    results = []
+    for i, (sentence_count, word_count, syllable_count, polysyllables) in enumerate(counts):
+        ratio = complex_ratio[i]
+        if ratio < MODERATE_VOCABULARY:
+            vocabulary = 'simple'
+        elif ratio < COMPLEX_VOCABULARY:
+            vocabulary = 'moderate'
+        else:
+            vocabulary = 'complex'
+        
+        results.append({
+            'readability_score': round(min(max(reading_ease[i], 0.0), 100.0), 1),
+            'reading_level': _reading_level(grade[i]),
+            'flesch_reading_ease': round(reading_ease[i], 1),
+            'flesch_kincaid_grade': round(grade[i], 1),
+            'gunning_fog': round(fog[i], 1),
+            'smog_index': round(smog[i], 1),
+            'avg_sentence_length': round(words_per_sentence[i], 1),
+            'avg_syllables_per_word': round(syllables_per_word[i], 2),
+            'vocabulary_complexity': vocabulary,
+            'complex_word_ratio': round(ratio, 3),
+            'word_count': word_count,
+            'sentence_count': sentence_count,
+            'syllable_count': syllable_count
+        })
+    
+    return results
+
+def score(text: str) -> Dict[str, Any]:
+    """
+    Compute readability metrics for one document
+    
+    Args:
+        text: Text to score
+    
+    Returns:
+        Metrics dict (see score_batch)
+    """
+    return score_batch([text])[0]
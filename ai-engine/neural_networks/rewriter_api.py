@@ -2,9 +2,17 @@
 Rewriter API - Text rewriting and transformation
 """
 
-import google.generativeai as genai
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 
+from core.executor import generate_content, stream_content
+from core.metrics import instrument
+from core import semantic_cache
+from core.model_registry import DETERMINISTIC, JSON_MODE, get_model, model_name_for
+from core.response_cache import cache, make_key
+from core.structured_output import parse_model, split_lines
+from .schemas import Paraphrases
+
+@instrument('rewriter.rewrite')
 async def rewrite(
     text: str,
     style: Optional[str] = None,
@@ -24,7 +32,7 @@ async def rewrite(
         Dict with rewritten text and metadata
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('rewriter')
         
         prompt = f"Rewrite the following text"
         
@@ -41,12 +49,12 @@ async def rewrite(
 Original text: {text}
 
 Rewritten version:"""
-        
+
         generation_config = {
             'temperature': creativity_level,
         }
         
-        response = model.generate_content(prompt, generation_config=generation_config)
+        response = await generate_content(model, prompt, generation_config=generation_config)
         
         return {
             'text': response.text,
@@ -60,6 +68,7 @@ Rewritten version:"""
     except Exception as e:
         raise Exception(f"Rewriter API Error: {str(e)}")
 
+@instrument('rewriter.paraphrase')
 async def paraphrase(text: str, num_variations: int = 3) -> List[str]:
     """
     Generate paraphrase variations
@@ -72,37 +81,54 @@ async def paraphrase(text: str, num_variations: int = 3) -> List[str]:
         List of paraphrased variations
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('rewriter', JSON_MODE)
         
         prompt = f"""Generate {num_variations} different paraphrased versions of this text. 
 Each version should convey the same meaning but use different words and sentence structures.
-Provide each version on a new line, separated by "---".
 
 Original: {text}
 
-Paraphrased versions:"""
-        
-        response = model.generate_content(prompt)
+Respond in JSON: {{"variations": ["...", "..."]}}"""
+
+        response = await generate_content(model, prompt)
         
-        # Split variations
-        variations = [v.strip() for v in response.text.split('---') if v.strip()]
+        parsed = parse_model(
+            response.text,
+            Paraphrases,
+            'rewriter.paraphrase',
+            # Older prompt format: versions separated by "---"
+            fallback=lambda raw: split_lines(raw, '---')
+        )
         
-        return variations[:num_variations]
+        return parsed.variations[:num_variations]
     except Exception as e:
         raise Exception(f"Paraphrase Error: {str(e)}")
 
-async def simplify(text: str) -> Dict[str, Any]:
+@instrument('rewriter.simplify')
+async def simplify(text: str, use_cache: bool = True) -> Dict[str, Any]:
     """
     Simplify complex text
     
+    Runs deterministically so results can be cached; near-duplicate
+    inputs are served from core.semantic_cache.
+    
     Args:
         text: Text to simplify
+        use_cache: Set False to skip the response cache
     
     Returns:
         Dict with simplified text and metadata
     """
+    model_name = model_name_for('rewriter')
+    cache_key = make_key('rewriter.simplify', text, model=model_name)
+    cached = await cache.get(cache_key, use_cache)
+    if cached is None:
+        cached = await semantic_cache.get('rewriter.simplify', text, cache_key, model=model_name, use_cache=use_cache)
+    if cached is not None:
+        return cached
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('rewriter', DETERMINISTIC)
         
         prompt = f"""Simplify this text to make it easier to understand. 
 Use simpler words, shorter sentences, and clearer structure while maintaining the core message.
@@ -110,19 +136,24 @@ Use simpler words, shorter sentences, and clearer structure while maintaining th
 Original text: {text}
 
 Simplified version:"""
+
+        response = await generate_content(model, prompt)
         
-        response = model.generate_content(prompt)
-        
-        return {
+        result = {
             'text': response.text,
             'metadata': {
                 'original_length': len(text.split()),
                 'simplified_length': len(response.text.split())
             }
         }
+        
+        await cache.set(cache_key, result)
+        semantic_cache.add('rewriter.simplify', text, cache_key, model=model_name)
+        return result
     except Exception as e:
         raise Exception(f"Simplification Error: {str(e)}")
 
+@instrument('rewriter.humanize')
 async def humanize(text: str, options: Dict[str, bool]) -> Dict[str, Any]:
     """
     Humanize AI-generated text
@@ -135,7 +166,7 @@ async def humanize(text: str, options: Dict[str, bool]) -> Dict[str, Any]:
         Dict with humanized text and metadata
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('rewriter')
         
         humanization_instructions = []
         
@@ -158,8 +189,8 @@ Apply these techniques: {instructions}.
 Original text: {text}
 
 Humanized version:"""
-        
-        response = model.generate_content(prompt)
+
+        response = await generate_content(model, prompt)
         
         return {
             'text': response.text,
@@ -172,6 +203,7 @@ Humanized version:"""
     except Exception as e:
         raise Exception(f"Humanization Error: {str(e)}")
 
+@instrument('rewriter.adjust_tone')
 async def adjust_tone(text: str, tone: str, intensity: int = 50) -> Dict[str, Any]:
     """
     Adjust text tone
@@ -185,7 +217,7 @@ async def adjust_tone(text: str, tone: str, intensity: int = 50) -> Dict[str, An
         Dict with tone-adjusted text and metadata
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('rewriter')
         
         intensity_desc = "subtly" if intensity < 40 else "moderately" if intensity < 70 else "strongly"
         
@@ -194,8 +226,8 @@ async def adjust_tone(text: str, tone: str, intensity: int = 50) -> Dict[str, An
 Original text: {text}
 
 Rewritten with {tone} tone:"""
-        
-        response = model.generate_content(prompt)
+
+        response = await generate_content(model, prompt)
         
         return {
             'text': response.text,
@@ -209,7 +241,8 @@ Rewritten with {tone} tone:"""
     except Exception as e:
         raise Exception(f"Tone Adjustment Error: {str(e)}")
 
-async def stream_rewrite(text: str):
+@instrument('rewriter.stream_rewrite')
+async def stream_rewrite(text: str) -> AsyncIterator[str]:
     """
     Stream rewritten text in real-time
     
@@ -220,14 +253,11 @@ async def stream_rewrite(text: str):
         Chunks of rewritten text
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('rewriter')
         
         prompt = f"Rewrite this text with improved clarity and flow:\n\n{text}"
         
-        response = model.generate_content(prompt, stream=True)
-        
-        for chunk in response:
-            if chunk.text:
-                yield chunk.text
+        async for chunk in stream_content(model, prompt):
+            yield chunk
     except Exception as e:
-        yield f"Error: {str(e)}"
+        raise Exception(f"Stream Rewrite Error: {str(e)}")
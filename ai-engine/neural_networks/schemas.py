@@ -0,0 +1,62 @@
+"""
+Schemas - Pydantic models for structured model replies
+"""
+
+from typing import Any, List, Optional
+
+from core.structured_output import Schema
+
+class GrammarError(Schema):
+    error: str
+    type: str = ''
+    correction: str = ''
+    explanation: str = ''
+
+class GrammarReport(Schema):
+    errors: List[GrammarError]
+
+class SpellingError(Schema):
+    misspelled: str
+    correction: str = ''
+
+class SpellingReport(Schema):
+    errors: List[SpellingError]
+
+class Finding(Schema):
+    category: str = 'style'
+    type: str = ''
+    text: str = ''
+    correction: str = ''
+    explanation: str = ''
+
+class FindingsReport(Schema):
+    findings: List[Finding]
+    overall_quality_score: Optional[float] = None
+
+class ProofreadingReport(Schema):
+    grammar_errors: List[Any] = []
+    spelling_errors: List[Any] = []
+    punctuation_issues: List[Any] = []
+    style_suggestions: List[Any] = []
+    clarity_suggestions: List[Any] = []
+    overall_quality_score: Optional[float] = None
+
+class Paraphrases(Schema):
+    variations: List[str]
+
+class Completions(Schema):
+    completions: List[str]
+
+class KeyPoints(Schema):
+    points: List[str]
+
+class LanguageDetection(Schema):
+    language: str
+    code: str = ''
+    confidence: str = ''
+
+class IntentAnalysis(Schema):
+    primary_intent: str
+    topic: str = ''
+    sentiment: str = ''
+    urgency: str = ''
@@ -2,85 +2,263 @@
 Summarizer API - Text summarization capabilities
 """
 
-import google.generativeai as genai
-from typing import Optional, Dict, Any, List
+import asyncio
+import os
+import re
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 
+from core import semantic_cache
+from core.executor import generate_content, stream_content
+from core.metrics import instrument
+from core.model_registry import DETERMINISTIC, JSON_OUTPUT, get_model, model_name_for
+from core.response_cache import cache, make_key
+from core.structured_output import parse_model, split_lines
+from core.text_chunking import chunk_text, estimate_tokens
+from .schemas import KeyPoints
+
+# Inputs above this many estimated tokens are summarized chunk by chunk
+LONG_DOCUMENT_TOKENS = int(os.getenv('SUMMARY_LONG_DOCUMENT_TOKENS', '8000'))
+# Token budget of each chunk sent to the model in long-document mode
+CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '3000'))
+# Chunk requests in flight at once per document
+MAX_CONCURRENCY = int(os.getenv('SUMMARY_MAX_CONCURRENCY', '8'))
+
+LENGTH_INSTRUCTIONS = {
+    'short': 'in 2-3 sentences',
+    'medium': 'in 1 paragraph (4-6 sentences)',
+    'long': 'in 2-3 paragraphs'
+}
+
+STYLE_INSTRUCTIONS = {
+    'bullets': 'as bullet points',
+    'paragraph': 'as a cohesive paragraph',
+    'key-points': 'highlighting the key points'
+}
+
+@instrument('summarizer.summarize')
 async def summarize(
     text: str,
     length: str = 'medium',
-    style: str = 'paragraph'
+    style: str = 'paragraph',
+    use_cache: bool = True,
+    chunked: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Summarize text using Gemini
     
+    Long documents are split into chunks that are summarized concurrently
+    and then reduced hierarchically before the final summary pass.
+    
     Args:
         text: Text to summarize
         length: 'short', 'medium', or 'long'
         style: 'bullets', 'paragraph', or 'key-points'
+        use_cache: Set False to skip the response cache
+        chunked: Force (True) or disable (False) long-document mode;
+                 None picks it when the text exceeds LONG_DOCUMENT_TOKENS
     
     Returns:
         Dict with summary and metadata
     """
+    if chunked is None:
+        chunked = estimate_tokens(text) > LONG_DOCUMENT_TOKENS
+    
+    params = {'length': length, 'style': style, 'chunked': chunked}
+    model_name = model_name_for('summarizer')
+    cache_key = make_key('summarizer.summarize', text, params, model=model_name)
+    cached = await cache.get(cache_key, use_cache)
+    if cached is None:
+        cached = await semantic_cache.get('summarizer.summarize', text, cache_key, params, model_name, use_cache)
+    if cached is not None:
+        return cached
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        length_instructions = {
-            'short': 'in 2-3 sentences',
-            'medium': 'in 1 paragraph (4-6 sentences)',
-            'long': 'in 2-3 paragraphs'
-        }
-        
-        style_instructions = {
-            'bullets': 'as bullet points',
-            'paragraph': 'as a cohesive paragraph',
-            'key-points': 'highlighting the key points'
-        }
-        
-        prompt = f"""Summarize the following text {length_instructions.get(length, 'in 1 paragraph')} {style_instructions.get(style, 'as a paragraph')}.
-
-Text: {text}
-
-Summary:"""
+        source, chunk_count = text, 1
+        if chunked:
+            source, chunk_count = await _reduce_to_fit(text, use_cache)
         
-        response = model.generate_content(prompt)
+        summary = await _generate(_summary_prompt(source, length, style))
         
-        return {
-            'summary': response.text,
+        result = {
+            'summary': summary,
             'metadata': {
                 'original_length': len(text.split()),
-                'summary_length': len(response.text.split()),
-                'compression_ratio': round(len(response.text.split()) / len(text.split()), 2),
+                'summary_length': len(summary.split()),
+                'compression_ratio': round(len(summary.split()) / len(text.split()), 2),
                 'style': style,
-                'length': length
+                'length': length,
+                'chunks': chunk_count
             }
         }
+        
+        await cache.set(cache_key, result)
+        semantic_cache.add('summarizer.summarize', text, cache_key, params, model_name)
+        return result
+    except Exception as e:
+        raise Exception(f"Summarizer API Error: {str(e)}")
+
+@instrument('summarizer.stream_summarize')
+async def stream_summarize(
+    text: str,
+    length: str = 'medium',
+    style: str = 'paragraph',
+    chunked: Optional[bool] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a summary
+    
+    In long-document mode the chunk summaries are produced first; only
+    the final summary pass is streamed.
+    
+    Args:
+        text: Text to summarize
+        length: 'short', 'medium', or 'long'
+        style: 'bullets', 'paragraph', or 'key-points'
+        chunked: Force (True) or disable (False) long-document mode;
+                 None picks it when the text exceeds LONG_DOCUMENT_TOKENS
+    
+    Yields:
+        Chunks of summary text
+    """
+    try:
+        if chunked is None:
+            chunked = estimate_tokens(text) > LONG_DOCUMENT_TOKENS
+        
+        source = text
+        if chunked:
+            source, _ = await _reduce_to_fit(text, True)
+        
+        model = get_model('summarizer', DETERMINISTIC)
+        async for chunk in stream_content(model, _summary_prompt(source, length, style)):
+            yield chunk
     except Exception as e:
         raise Exception(f"Summarizer API Error: {str(e)}")
 
-async def extract_key_points(text: str) -> List[str]:
+@instrument('summarizer.extract_key_points')
+async def extract_key_points(text: str, chunked: Optional[bool] = None) -> List[str]:
     """
     Extract key points from text
     
+    Long documents are processed chunk by chunk in parallel and the
+    points are de-duplicated across chunks.
+    
     Args:
         text: Input text
+        chunked: Force (True) or disable (False) long-document mode;
+                 None picks it when the text exceeds LONG_DOCUMENT_TOKENS
     
     Returns:
         List of key points
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        if chunked is None:
+            chunked = estimate_tokens(text) > LONG_DOCUMENT_TOKENS
+        chunks = chunk_text(text, CHUNK_TOKENS) if chunked else [text]
         
-        prompt = f"""Extract the main key points from this text. List only the most important points, one per line, without numbering or bullets.
+        responses = await _gather_limited([
+            _generate(f"""Extract the main key points from this text. List only the most important points.
 
-Text: {text}
+Text: {chunk}
 
-Key Points:"""
-        
-        response = model.generate_content(prompt)
+Respond in JSON: {{"points": ["...", "..."]}}""", JSON_OUTPUT)
+            for chunk in chunks
+        ])
         
-        # Split response into individual points
-        points = [point.strip() for point in response.text.strip().split('\n') if point.strip()]
+        points = [
+            point.strip()
+            for response in responses
+            for point in parse_model(
+                response, KeyPoints, 'summarizer.extract_key_points', fallback=split_lines
+            ).points
+            if point.strip()
+        ]
         
-        return points
+        return dedupe_points(points) if len(chunks) > 1 else points
     except Exception as e:
         raise Exception(f"Key Points Extraction Error: {str(e)}")
+
+def dedupe_points(points: List[str], threshold: float = 0.8) -> List[str]:
+    """
+    Drop repeated key points, keeping the first occurrence
+    
+    Points match when their normalized word sets overlap by at least
+    `threshold` (Jaccard similarity), which catches the same fact phrased
+    slightly differently by two chunks.
+    
+    Args:
+        points: Key points in document order
+        threshold: Jaccard similarity treated as a duplicate
+    
+    Returns:
+        De-duplicated key points
+    """
+    kept: List[str] = []
+    kept_words: List[set] = []
+    for point in points:
+        # Strip bullets/numbering the model adds despite instructions
+        cleaned = re.sub(r'^[\s\-\*•\d.)]+', '', point).strip()
+        if not cleaned:
+            continue
+        words = set(re.findall(r'\w+', cleaned.casefold()))
+        if any(
+            len(words & other) / max(len(words | other), 1) >= threshold
+            for other in kept_words
+        ):
+            continue
+        kept.append(cleaned)
+        kept_words.append(words)
+    return kept
+
+def _summary_prompt(text: str, length: str, style: str) -> str:
+    return f"""Summarize the following text {LENGTH_INSTRUCTIONS.get(length, 'in 1 paragraph')} {STYLE_INSTRUCTIONS.get(style, 'as a paragraph')}.
+
+Text: {text}
+
+Summary:"""
+
+async def _generate(prompt: str, generation_config: Dict[str, Any] = DETERMINISTIC) -> str:
+    model = get_model('summarizer', generation_config)
+    response = await generate_content(model, prompt)
+    return response.text
+
+async def _gather_limited(coroutines: List) -> List[Any]:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+    
+    return await asyncio.gather(*(run(c) for c in coroutines))
+
+async def _summarize_section(chunk: str, use_cache: bool) -> str:
+    # Sections are cached on their own so an edited document only
+    # re-summarizes the chunks that changed
+    cache_key = make_key('summarizer.section', chunk, model=model_name_for('summarizer'))
+    cached = await cache.get(cache_key, use_cache)
+    if cached is not None:
+        return cached
+    
+    summary = await _generate(f"""Summarize this section of a longer document in a few sentences. Keep every key fact, name and number.
+
+Section: {chunk}
+
+Summary:""")
+
+    await cache.set(cache_key, summary)
+    return summary
+
+async def _reduce_to_fit(text: str, use_cache: bool) -> Tuple[str, int]:
+    """Map-reduce text into section summaries that fit one chunk"""
+    chunks = chunk_text(text, CHUNK_TOKENS)
+    chunk_count = len(chunks)
+    
+    while len(chunks) > 1:
+        partials = await _gather_limited([_summarize_section(c, use_cache) for c in chunks])
+        joined = '\n\n'.join(p.strip() for p in partials)
+        reduced = chunk_text(joined, CHUNK_TOKENS)
+        if len(reduced) >= len(chunks):
+            # Summaries are not shrinking; stop rather than loop forever
+            return joined, chunk_count
+        chunks = reduced
+    
+    return chunks[0] if chunks else text, chunk_count
@@ -2,59 +2,334 @@
 Translator API - Multi-language translation
 """
 
-import google.generativeai as genai
-from typing import Optional, Dict, Any, List
+import asyncio
+import re
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
 
+from core import semantic_cache
+from core.executor import generate_content, run_blocking, stream_content
+from core.metrics import instrument
+from core.model_registry import DETERMINISTIC, JSON_OUTPUT, get_model, model_name_for
+from core.response_cache import cache, make_key, normalize_text
+from core.structured_output import parse_model
+from core.text_chunking import estimate_tokens, sentence_spans
+from core.translation_memory import FUZZY_BANDS, fuzzy_band, memory
+from . import language_id
+from .schemas import LanguageDetection
+
+@instrument('translator.translate')
 async def translate(
     text: str,
     target_language: str,
-    source_language: str = 'auto'
+    source_language: str = 'auto',
+    use_cache: bool = True
 ) -> Dict[str, Any]:
     """
     Translate text using Gemini
     
+    With the translation memory enabled the text is split into sentences;
+    sentences translated before are reused and only the others are sent,
+    in one numbered prompt. metadata['translation_memory'] reports the
+    exact and fuzzy matches and the share of source tokens not sent.
+    
     Args:
         text: Text to translate
         target_language: Target language
-        source_language: Source language (auto-detect if 'auto')
+        source_language: Source language (auto-detect if 'auto'; detected
+            locally when confident, see language_id)
+        use_cache: Set False to skip the response cache
     
     Returns:
         Dict with translation and metadata
     """
+    cache_key = _translate_cache_key(text, target_language, source_language)
+    cached = await cache.get(cache_key, use_cache)
+    if cached is None:
+        cached = await _near_duplicate(text, cache_key, target_language, source_language, use_cache)
+    if cached is not None:
+        return cached
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('translator', DETERMINISTIC)
+        source = _resolve_source(text, source_language)
         
-        if source_language == 'auto':
-            prompt = f"Translate this text to {target_language}:\n\n{text}\n\nTranslation:"
+        if memory.enabled:
+            translation, report = await _translate_segments(model, text, target_language, source)
         else:
-            prompt = f"Translate this text from {source_language} to {target_language}:\n\n{text}\n\nTranslation:"
+            response = await generate_content(model, _translate_prompt(text, target_language, source))
+            translation, report = response.text, None
         
-        response = model.generate_content(prompt)
+        result = _translation_result(text, translation, target_language, source)
+        if report is not None:
+            result['metadata']['translation_memory'] = report
         
-        return {
-            'translation': response.text,
-            'metadata': {
-                'source_language': source_language,
-                'target_language': target_language,
-                'original_length': len(text.split()),
-                'translated_length': len(response.text.split())
-            }
-        }
+        await _store(text, cache_key, result, target_language, source_language)
+        return result
     except Exception as e:
         raise Exception(f"Translator API Error: {str(e)}")
 
-async def detect_language(text: str) -> Dict[str, Any]:
+@instrument('translator.stream_translate')
+async def stream_translate(
+    text: str,
+    target_language: str,
+    source_language: str = 'auto',
+    use_cache: bool = True
+) -> AsyncIterator[str]:
+    """
+    Stream a translation
+    
+    A cached translation is yielded as a single chunk; a fresh one is
+    cached once the stream completes.
+    
+    Args:
+        text: Text to translate
+        target_language: Target language
+        source_language: Source language (auto-detect if 'auto'; detected
+            locally when confident, see language_id)
+        use_cache: Set False to skip the response cache
+    
+    Yields:
+        Chunks of translated text
+    """
+    cache_key = _translate_cache_key(text, target_language, source_language)
+    cached = await cache.get(cache_key, use_cache)
+    if cached is None:
+        cached = await _near_duplicate(text, cache_key, target_language, source_language, use_cache)
+    if cached is not None:
+        yield cached['translation']
+        return
+    
+    try:
+        model = get_model('translator', DETERMINISTIC)
+        source = _resolve_source(text, source_language)
+        
+        parts = []
+        async for chunk in stream_content(model, _translate_prompt(text, target_language, source)):
+            parts.append(chunk)
+            yield chunk
+        
+        translation = ''.join(parts)
+        result = _translation_result(text, translation, target_language, source)
+        await _store(text, cache_key, result, target_language, source_language)
+    except Exception as e:
+        raise Exception(f"Translator API Error: {str(e)}")
+
+def _translate_cache_key(text: str, target_language: str, source_language: str) -> Optional[str]:
+    return make_key(
+        'translator.translate',
+        text,
+        {'target_language': target_language, 'source_language': source_language},
+        model=model_name_for('translator')
+    )
+
+async def _near_duplicate(
+    text: str,
+    cache_key: Optional[str],
+    target_language: str,
+    source_language: str,
+    use_cache: bool
+) -> Optional[Dict[str, Any]]:
+    params = {'target_language': target_language, 'source_language': source_language}
+    return await semantic_cache.get(
+        'translator.translate', text, cache_key, params, model_name_for('translator'), use_cache
+    )
+
+async def _store(
+    text: str,
+    cache_key: Optional[str],
+    result: Dict[str, Any],
+    target_language: str,
+    source_language: str
+) -> None:
+    await cache.set(cache_key, result)
+    params = {'target_language': target_language, 'source_language': source_language}
+    semantic_cache.add('translator.translate', text, cache_key, params, model_name_for('translator'))
+
+def _resolve_source(text: str, source_language: str) -> str:
+    """Source language name for prompts and the memory; 'auto' stays 'auto' unless detected locally"""
+    if source_language != 'auto':
+        return source_language
+    detected = language_id.detect(text)
+    return detected['language'] if language_id.accept(detected) else 'auto'
+
+def _translate_prompt(text: str, target_language: str, source_language: str) -> str:
+    if source_language == 'auto':
+        return f"Translate this text to {target_language}:\n\n{text}\n\nTranslation:"
+    return f"Translate this text from {source_language} to {target_language}:\n\n{text}\n\nTranslation:"
+
+async def _translate_segments(
+    model: Any,
+    text: str,
+    target_language: str,
+    source_language: str
+) -> Tuple[str, Dict[str, Any]]:
+    spans = sentence_spans(text)
+    segments = [normalize_text(text[start:end]) for start, end in spans]
+    model_name = model_name_for('translator')
+    known = await run_blocking(memory.lookup, segments, source_language, target_language, model_name)
+    unseen = [s for s in dict.fromkeys(segments) if s not in known]
+    
+    fuzzy = {label: 0 for label, _ in FUZZY_BANDS}
+    for score in await run_blocking(memory.best_fuzzy, unseen, source_language, target_language, model_name):
+        band = fuzzy_band(score)
+        if band is not None:
+            fuzzy[band] += 1
+    
+    report = {
+        'segments': len(segments),
+        'exact': sum(s in known for s in segments),
+        'new': len(unseen),
+        'fuzzy': fuzzy,
+        'fallback': False,
+        'source_tokens': estimate_tokens(text),
+        'sent_tokens': sum(estimate_tokens(s) for s in unseen),
+    }
+    
+    if unseen:
+        prompt = _segments_prompt(unseen, target_language, source_language)
+        response = await generate_content(model, prompt)
+        translated = _parse_segments(response.text, len(unseen))
+        if translated is None:
+            # The reply lost the numbering; translate the text whole and store nothing
+            response = await generate_content(model, _translate_prompt(text, target_language, source_language))
+            report.update(fallback=True, sent_tokens=report['source_tokens'] + report['sent_tokens'])
+            _finish_report(report)
+            return response.text, report
+        translated = dict(zip(unseen, translated))
+        await run_blocking(memory.store, translated, source_language, target_language, model_name)
+        known.update(translated)
+    
+    # Keep the original spacing and line breaks between sentences
+    parts, position = [], 0
+    for (start, end), segment in zip(spans, segments):
+        parts.append(text[position:start])
+        parts.append(known[segment])
+        position = end
+    parts.append(text[position:])
+    _finish_report(report)
+    return ''.join(parts), report
+
+def _finish_report(report: Dict[str, Any]) -> None:
+    source = report['source_tokens']
+    report['tokens_saved_pct'] = round(100 * max(0.0, 1 - report['sent_tokens'] / source), 1) if source else 0.0
+    memory.record(report)
+
+def _segments_prompt(segments: List[str], target_language: str, source_language: str) -> str:
+    source = '' if source_language == 'auto' else f" from {source_language}"
+    numbered = '\n'.join(f"[[{i}]] {segment}" for i, segment in enumerate(segments, 1))
+    return (
+        f"Translate each numbered segment{source} to {target_language}. "
+        f"Reply with every marker ([[1]] to [[{len(segments)}]]) in order, each followed by "
+        f"the translation of its segment only, and nothing else.\n\n{numbered}"
+    )
+
+_SEGMENT_MARKER = re.compile(r'\[\[(\d+)\]\]')
+
+def _parse_segments(reply: str, count: int) -> Optional[List[str]]:
+    """Translations in marker order, or None unless markers 1..count each appear once in order"""
+    pieces = _SEGMENT_MARKER.split(reply)
+    numbers = [int(n) for n in pieces[1::2]]
+    if numbers != list(range(1, count + 1)):
+        return None
+    translations = [piece.strip() for piece in pieces[2::2]]
+    return translations if all(translations) else None
+
+def _translation_result(
+    text: str,
+    translation: str,
+    target_language: str,
+    source_language: str
+) -> Dict[str, Any]:
+    return {
+        'translation': translation,
+        'metadata': {
+            'source_language': source_language,
+            'target_language': target_language,
+            'original_length': len(text.split()),
+            'translated_length': len(translation.split())
+        }
+    }
+
+@instrument('translator.detect_language')
+async def detect_language(text: str, use_cache: bool = True) -> Dict[str, Any]:
     """
     Detect language of text
     
+    Confident local detections (language_id) are returned without a model
+    call; 'method' says which answered.
+    
     Args:
         text: Text to analyze
+        use_cache: Set False to skip the response cache
     
     Returns:
         Dict with detected language info
     """
+    local = language_id.detect(text)
+    if language_id.accept(local):
+        return _local_detection(text, local)
+    return await _detect_with_model(text, use_cache)
+
+@instrument('translator.detect_languages')
+async def detect_languages(texts: List[str], use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Detect the language of many texts
+    
+    All texts are detected locally in one pass; only the ones that are
+    not confident go to the model, concurrently.
+    
+    Args:
+        texts: Texts to analyze
+        use_cache: Set False to skip the response cache
+    
+    Returns:
+        Dict with one detect_language result per text, in order, and
+        local/model counts
+    """
+    detections: List[Optional[Dict[str, Any]]] = []
+    escalated = []
+    for index, (text, local) in enumerate(zip(texts, language_id.detect_many(texts))):
+        if language_id.accept(local):
+            detections.append(_local_detection(text, local))
+        else:
+            detections.append(None)
+            escalated.append(index)
+    
+    for index, result in zip(escalated, await asyncio.gather(
+        *(_detect_with_model(texts[index], use_cache) for index in escalated)
+    )):
+        detections[index] = result
+    
+    return {
+        'success': True,
+        'detections': detections,
+        'metadata': {
+            'total': len(texts),
+            'local': len(texts) - len(escalated),
+            'model': len(escalated)
+        }
+    }
+
+def _local_detection(text: str, local: Dict[str, Any]) -> Dict[str, Any]:
+    score = local['confidence']
+    confidence = 'high' if score >= 0.95 else 'medium' if score >= 0.7 else 'low'
+    detection = LanguageDetection(language=local['language'], code=local['code'], confidence=confidence)
+    return {
+        'success': True,
+        'detection': detection.model_dump(),
+        'text_sample': text[:100],
+        'method': 'local',
+        'score': score
+    }
+
+async def _detect_with_model(text: str, use_cache: bool) -> Dict[str, Any]:
+    cache_key = make_key('translator.detect_language', text, model=model_name_for('translator'))
+    cached = await cache.get(cache_key, use_cache)
+    if cached is not None:
+        return cached
+    
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('translator', JSON_OUTPUT)
         
         prompt = f"""Detect the language of this text and provide:
 1. Language name
@@ -64,14 +339,20 @@ async def detect_language(text: str) -> Dict[str, Any]:
 Text: {text}
 
 Respond in JSON format with fields: language, code, confidence"""
+
+        response = await generate_content(model, prompt)
+        detection = parse_model(response.text, LanguageDetection, 'translator.detect_language')
         
-        response = model.generate_content(prompt)
-        
-        return {
+        result = {
             'success': True,
-            'detection': response.text,
-            'text_sample': text[:100]
+            'detection': detection.model_dump(),
+            'text_sample': text[:100],
+            'method': 'model'
         }
+        
+        if not detection.parsed_by_fallback:
+            await cache.set(cache_key, result)
+        return result
     except Exception as e:
         raise Exception(f"Language Detection Error: {str(e)}")
 
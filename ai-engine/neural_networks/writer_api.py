@@ -2,9 +2,17 @@
 Writer API - Content generation capabilities
 """
 
-import google.generativeai as genai
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 
+from core.executor import generate_content, stream_content
+from core.metrics import instrument
+from core.model_registry import JSON_MODE, get_model
+from core.resilience import hedged
+from core.scheduler import priority
+from core.structured_output import parse_model, split_lines
+from .schemas import Completions
+
+@instrument('writer.generate')
 async def generate(
     prompt: str,
     style: Optional[str] = None,
@@ -24,21 +32,9 @@ async def generate(
         Dict with generated text and metadata
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        # Build enhanced prompt
-        enhanced_prompt = f"Write content based on this prompt: {prompt}"
-        
-        if style:
-            enhanced_prompt += f"\nStyle: {style}"
-        if tone:
-            enhanced_prompt += f"\nTone: {tone}"
-        if word_count:
-            enhanced_prompt += f"\nTarget length: approximately {word_count} words"
-        
-        enhanced_prompt += "\n\nGenerate the content:"
+        model = get_model('writer')
         
-        response = model.generate_content(enhanced_prompt)
+        response = await generate_content(model, _generate_prompt(prompt, style, tone, word_count))
         
         return {
             'text': response.text,
@@ -52,6 +48,52 @@ async def generate(
     except Exception as e:
         raise Exception(f"Writer API Error: {str(e)}")
 
+@instrument('writer.stream_generate')
+async def stream_generate(
+    prompt: str,
+    style: Optional[str] = None,
+    tone: Optional[str] = None,
+    word_count: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Stream generated content
+    
+    Args:
+        prompt: Content generation prompt
+        style: Writing style (e.g., 'creative', 'technical', 'academic')
+        tone: Writing tone (e.g., 'formal', 'casual', 'professional')
+        word_count: Target word count
+    
+    Yields:
+        Chunks of generated text
+    """
+    try:
+        model = get_model('writer')
+        
+        async for chunk in stream_content(model, _generate_prompt(prompt, style, tone, word_count)):
+            yield chunk
+    except Exception as e:
+        raise Exception(f"Writer API Error: {str(e)}")
+
+def _generate_prompt(
+    prompt: str,
+    style: Optional[str],
+    tone: Optional[str],
+    word_count: Optional[int]
+) -> str:
+    # Build enhanced prompt
+    enhanced_prompt = f"Write content based on this prompt: {prompt}"
+    
+    if style:
+        enhanced_prompt += f"\nStyle: {style}"
+    if tone:
+        enhanced_prompt += f"\nTone: {tone}"
+    if word_count:
+        enhanced_prompt += f"\nTarget length: approximately {word_count} words"
+    
+    return enhanced_prompt + "\n\nGenerate the content:"
+
+@instrument('writer.complete')
 async def complete(text: str, num_completions: int = 3) -> List[str]:
     """
     Generate text completions
@@ -64,24 +106,27 @@ async def complete(text: str, num_completions: int = 3) -> List[str]:
         List of completion suggestions
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('writer', JSON_MODE)
         
         prompt = f"""Given this incomplete text, provide {num_completions} different ways to complete it. 
-Provide only the completion text for each option, separated by newlines.
+Provide only the completion text for each option.
 
 Incomplete text: "{text}"
 
-Completions:"""
-        
-        response = model.generate_content(prompt)
+Respond in JSON: {{"completions": ["...", "..."]}}"""
+
+        # Autocomplete is typed against; it goes ahead of other queued calls,
+        # and a slow reply is raced against a duplicate request
+        with priority('interactive'), hedged():
+            response = await generate_content(model, prompt)
         
-        # Parse completions
-        completions = [c.strip() for c in response.text.strip().split('\n') if c.strip()]
+        parsed = parse_model(response.text, Completions, 'writer.complete', fallback=split_lines)
         
-        return completions[:num_completions]
+        return parsed.completions[:num_completions]
     except Exception as e:
         raise Exception(f"Text Completion Error: {str(e)}")
 
+@instrument('writer.expand')
 async def expand(text: str, target_length: int = 500) -> Dict[str, Any]:
     """
     Expand text to target length
@@ -94,18 +139,11 @@ async def expand(text: str, target_length: int = 500) -> Dict[str, Any]:
         Dict with expanded text and metadata
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('writer')
         
         current_length = len(text.split())
         
-        prompt = f"""Expand the following text from {current_length} words to approximately {target_length} words. 
-Add relevant details, examples, and elaboration while maintaining the original meaning and style.
-
-Original text: {text}
-
-Expanded version:"""
-        
-        response = model.generate_content(prompt)
+        response = await generate_content(model, _expand_prompt(text, target_length))
         
         return {
             'text': response.text,
@@ -118,3 +156,31 @@ Expanded version:"""
         }
     except Exception as e:
         raise Exception(f"Text Expansion Error: {str(e)}")
+
+@instrument('writer.stream_expand')
+async def stream_expand(text: str, target_length: int = 500) -> AsyncIterator[str]:
+    """
+    Stream text expanded to target length
+    
+    Args:
+        text: Text to expand
+        target_length: Target word count
+    
+    Yields:
+        Chunks of expanded text
+    """
+    try:
+        model = get_model('writer')
+        
+        async for chunk in stream_content(model, _expand_prompt(text, target_length)):
+            yield chunk
+    except Exception as e:
+        raise Exception(f"Text Expansion Error: {str(e)}")
+
+def _expand_prompt(text: str, target_length: int) -> str:
+    return f"""Expand the following text from {len(text.split())} words to approximately {target_length} words. 
+Add relevant details, examples, and elaboration while maintaining the original meaning and style.
+
+Original text: {text}
+
+Expanded version:"""
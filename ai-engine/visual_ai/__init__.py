@@ -5,5 +5,7 @@ OCR and image analysis capabilities
 
 from . import ocr_processor
 from . import image_analyzer
+from . import image_preprocessor
+from . import schemas
 
-__all__ = ['ocr_processor', 'image_analyzer']
+__all__ = ['ocr_processor', 'image_analyzer', 'image_preprocessor', 'schemas']
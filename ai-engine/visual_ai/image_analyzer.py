@@ -2,91 +2,173 @@
 Image Analyzer - Analyze and describe images using Gemini Vision
 """
 
-import google.generativeai as genai
-from typing import Dict, Any, List
-from PIL import Image
-import io
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
 
-async def describe_image(image_data: bytes) -> Dict[str, Any]:
+from core.executor import generate_content
+from core.metrics import instrument
+from core.model_registry import JSON_OUTPUT, get_model, model_name_for
+from core.structured_output import parse_model
+from .image_preprocessor import prepare_image
+from .schemas import ImageAnalysis
+
+# How long one combined analysis serves describe/detect/scene for an image
+ANALYSIS_TTL_SECONDS = float(os.getenv('IMAGE_ANALYSIS_TTL_SECONDS', '300'))
+ANALYSIS_MAX_ENTRIES = int(os.getenv('IMAGE_ANALYSIS_MAX_ENTRIES', '256'))
+
+# prepared-image hash -> (expires at, in-flight or finished analysis)
+_analyses: 'OrderedDict[str, Tuple[float, asyncio.Future]]' = OrderedDict()
+_stats = {'calls': 0, 'model_calls': 0}
+
+ANALYSIS_PROMPT = """Analyze this image and provide:
+1. A detailed description, including objects, people, setting, colors, and mood
+2. All objects visible in the image, as short names
+3. The scene: type (indoor/outdoor, location type), main subjects, composition quality, lighting conditions, and mood/atmosphere
+
+Respond in JSON with fields: description, objects (list), scene (object with fields: scene_type, main_subjects (list), composition_quality, lighting, mood)"""
+
+async def _run_analysis(image: Dict[str, Any]) -> ImageAnalysis:
+    model = get_model('vision', JSON_OUTPUT)
+    _stats['model_calls'] += 1
+    response = await generate_content(model, [ANALYSIS_PROMPT, image])
+    return parse_model(response.text, ImageAnalysis, 'vision.analyze_image')
+
+async def _analysis(image_data: bytes, use_cache: bool = True) -> ImageAnalysis:
+    """
+    One combined vision call per image, shared by concurrent and repeated callers
+    
+    Keyed by the prepared image bytes. Failures and replies recovered by
+    the fallback parser are not cached.
+    """
+    image = await prepare_image(image_data, 'vision')
+    _stats['calls'] += 1
+    if not use_cache:
+        return await _run_analysis(image)
+    
+    key = f"{model_name_for('vision')}:{hashlib.sha256(image['data']).hexdigest()}"
+    now = time.monotonic()
+    entry = _analyses.get(key)
+    if entry is not None and entry[0] > now:
+        _analyses.move_to_end(key)
+        task = entry[1]
+    else:
+        task = asyncio.ensure_future(_run_analysis(image))
+        _analyses[key] = (now + ANALYSIS_TTL_SECONDS, task)
+        while len(_analyses) > ANALYSIS_MAX_ENTRIES:
+            _analyses.popitem(last=False)
+    
+    try:
+        # Shielded: one caller going away must not cancel the others' result
+        analysis = await asyncio.shield(task)
+        if analysis.parsed_by_fallback and key in _analyses and _analyses[key][1] is task:
+            del _analyses[key]
+        return analysis
+    except Exception:
+        if key in _analyses and _analyses[key][1] is task:
+            del _analyses[key]
+        raise
+
+@instrument('vision.analyze_image')
+async def analyze_image(image_data: bytes, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Describe an image, list its objects and analyze its scene in one call
+    
+    describe_image, detect_objects and analyze_scene are served from the
+    same analysis for IMAGE_ANALYSIS_TTL_SECONDS.
+    
+    Args:
+        image_data: Image file bytes
+        use_cache: Reuse a recent analysis of the same image
+    
+    Returns:
+        Dict with description, objects and scene
+    """
+    try:
+        analysis = await _analysis(image_data, use_cache)
+        
+        return {
+            'success': True,
+            **analysis.model_dump()
+        }
+    except Exception as e:
+        raise Exception(f"Image Analysis Error: {str(e)}")
+
+@instrument('vision.describe_image')
+async def describe_image(image_data: bytes, use_cache: bool = True) -> Dict[str, Any]:
     """
     Generate detailed description of image
     
     Args:
         image_data: Image file bytes
+        use_cache: Reuse a recent analysis of the same image
     
     Returns:
         Dict with image description
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        image = Image.open(io.BytesIO(image_data))
-        
-        prompt = "Provide a detailed description of this image, including objects, people, setting, colors, and mood."
-        
-        response = model.generate_content([prompt, image])
+        analysis = await _analysis(image_data, use_cache)
         
         return {
             'success': True,
-            'description': response.text
+            'description': analysis.description
         }
     except Exception as e:
         raise Exception(f"Image Description Error: {str(e)}")
 
-async def detect_objects(image_data: bytes) -> List[str]:
+@instrument('vision.detect_objects')
+async def detect_objects(image_data: bytes, use_cache: bool = True) -> List[str]:
     """
     Detect objects in image
     
     Args:
         image_data: Image file bytes
+        use_cache: Reuse a recent analysis of the same image
     
     Returns:
         List of detected objects
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        image = Image.open(io.BytesIO(image_data))
-        
-        prompt = "List all objects visible in this image. Provide only the object names, one per line."
-        
-        response = model.generate_content([prompt, image])
+        analysis = await _analysis(image_data, use_cache)
         
-        objects = [obj.strip() for obj in response.text.strip().split('\n') if obj.strip()]
-        
-        return objects
+        return [obj.strip() for obj in analysis.objects if obj.strip()]
     except Exception as e:
         raise Exception(f"Object Detection Error: {str(e)}")
 
-async def analyze_scene(image_data: bytes) -> Dict[str, Any]:
+@instrument('vision.analyze_scene')
+async def analyze_scene(image_data: bytes, use_cache: bool = True) -> Dict[str, Any]:
     """
     Analyze scene context and composition
     
     Args:
         image_data: Image file bytes
+        use_cache: Reuse a recent analysis of the same image
     
     Returns:
         Dict with scene analysis
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        image = Image.open(io.BytesIO(image_data))
-        
-        prompt = """Analyze this image and provide:
-1. Scene type (indoor/outdoor, location type)
-2. Main subjects
-3. Composition quality
-4. Lighting conditions
-5. Mood/atmosphere
-
-Respond in JSON format."""
-        
-        response = model.generate_content([prompt, image])
+        analysis = await _analysis(image_data, use_cache)
         
         return {
             'success': True,
-            'analysis': response.text
+            'analysis': analysis.scene.model_dump()
         }
     except Exception as e:
         raise Exception(f"Scene Analysis Error: {str(e)}")
+
+def clear() -> None:
+    """Drop all cached analyses"""
+    _analyses.clear()
+
+def stats() -> Dict[str, Any]:
+    """
+    Combined-analysis cache counters
+    
+    Returns:
+        Dict with calls served, model calls made and cached entries
+    """
+    return {**_stats, 'entries': len(_analyses)}
@@ -0,0 +1,245 @@
+"""
+Image Preprocessor - Downscale, normalize and recompress images before model calls
+"""
+
+import asyncio
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Union
+
+from PIL import Image, ImageOps, ImageSequence
+
+from core.executor import run_blocking
+
+# Longest side sent to the model per purpose; larger images only add tokens
+MAX_SIDE = {
+    'vision': int(os.getenv('VISION_MAX_SIDE', '1536')),
+    'ocr': int(os.getenv('OCR_MAX_SIDE', '2048')),
+}
+# Encoder settings per purpose: OCR keeps more quality so small text survives.
+# WebP is ~half the bytes but ~15x the encode time of JPEG at these sizes.
+ENCODING = {
+    'vision': ('JPEG', 'image/jpeg', {'quality': 85}),
+    'ocr': ('JPEG', 'image/jpeg', {'quality': 90, 'optimize': True}),
+    # Black-and-white scans: lossless and ~20x smaller than grayscale JPEG
+    'bilevel': ('PNG', 'image/png', {}),
+    # Flat synthetic images (screenshots, diagrams) the JPEG settings inflate
+    'lossless': ('PNG', 'image/png', {'optimize': True}),
+}
+# Total bytes of prepared images kept in memory
+CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Uploads in these formats can be sent as-is when re-encoding does not shrink them
+PASSTHROUGH = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp'}
+
+_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+# content cache key -> decode in progress
+_inflight: Dict[str, asyncio.Future] = {}
+_stats = {'hits': 0, 'misses': 0, 'kept_original': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+def _decode(image_data: bytes, purpose: str) -> Image.Image:
+    """Decode at reduced resolution, upright, in the purpose's color mode"""
+    max_side = MAX_SIDE[purpose]
+    mode = 'L' if purpose == 'ocr' else 'RGB'
+    
+    image = Image.open(io.BytesIO(image_data))
+    width, height = image.size
+    if max(width, height) > max_side:
+        # JPEG only: let the decoder downscale by 1/2..1/8 in the DCT domain.
+        # Allow landing up to 10% under max_side so e.g. a 4000px photo can
+        # still be halved for a 2048px target.
+        scale = 0.9 * max_side / max(width, height)
+        image.draft(mode, (math.ceil(width * scale), math.ceil(height * scale)))
+    return _normalize(image, purpose)
+
+def _normalize(image: Image.Image, purpose: str) -> Image.Image:
+    """Upright, flattened copy of a decoded image/frame, no larger than max_side"""
+    max_side = MAX_SIDE[purpose]
+    mode = 'L' if purpose == 'ocr' else 'RGB'
+    
+    # Always returns a new image, so frames of a multi-page file stay intact
+    image = ImageOps.exif_transpose(image)
+    bilevel = image.mode == '1' and purpose == 'ocr'
+    if bilevel and max(image.size) <= max_side:
+        return image
+    
+    if 'A' in image.mode or 'transparency' in image.info:
+        # Flatten transparency onto white so text/edges stay visible
+        rgba = image.convert('RGBA')
+        background = Image.new('RGBA', rgba.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, rgba)
+    if image.mode != mode:
+        image = image.convert(mode)
+    
+    longest = max(image.size)
+    if longest > max_side:
+        # Cheap integer box reduction first, then an exact high-quality resize
+        factor = longest // max_side
+        if factor >= 2:
+            image = image.reduce(factor)
+        if max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), Image.BICUBIC)
+        if bilevel:
+            # Resized in grayscale; threshold back to black and white
+            image = image.convert('1', dither=Image.Dither.NONE)
+    return image
+
+def _prepare(image_data: bytes, purpose: str) -> Dict[str, Any]:
+    image = _decode(image_data, purpose)
+    prepared = _encode(image, purpose)
+    if len(prepared['data']) < len(image_data):
+        return prepared
+    
+    # Re-encoding grew the upload (typically a PNG screenshot)
+    mime_type = _passthrough_type(image_data, image)
+    if mime_type is not None:
+        _stats['kept_original'] += 1
+        return {'mime_type': mime_type, 'data': image_data}
+    return min(prepared, _encode(image, 'lossless'), key=lambda p: len(p['data']))
+
+def _passthrough_type(image_data: bytes, prepared: Image.Image) -> Optional[str]:
+    """MIME type to send the upload as-is, or None when it differs from the prepared image"""
+    with Image.open(io.BytesIO(image_data)) as original:
+        same = (
+            original.format in PASSTHROUGH
+            and original.size == prepared.size
+            and original.getexif().get(0x0112, 1) == 1
+            and original.mode in ('1', 'L', 'P', 'RGB')
+            and 'transparency' not in original.info
+        )
+        return PASSTHROUGH[original.format] if same else None
+
+def _encode(image: Image.Image, purpose: str) -> Dict[str, Any]:
+    encoder, mime_type, options = ENCODING['bilevel' if image.mode == '1' else purpose]
+    
+    buffer = io.BytesIO()
+    image.save(buffer, format=encoder, **options)
+    
+    return {'mime_type': mime_type, 'data': buffer.getvalue()}
+
+def _store(key: str, prepared: Dict[str, Any], purpose: str) -> None:
+    global _cache_bytes
+    with _lock:
+        if key in _cache:
+            return
+        _cache[key] = prepared
+        _cache_bytes += len(prepared['data'])
+        while _cache_bytes > CACHE_MAX_BYTES and _cache:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted['data'])
+
+async def prepare_image(image_data: bytes, purpose: str = 'vision') -> Dict[str, Any]:
+    """
+    Prepare uploaded image bytes for a model call
+    
+    Decodes at reduced resolution (JPEG draft mode plus reduce()), applies
+    the EXIF orientation, converts to grayscale for OCR and recompresses
+    (JPEG, grayscale at higher quality for OCR, or PNG when smaller). An
+    upload that needed no changes and would only grow is sent as-is.
+    Results are cached by content hash.
+    
+    Args:
+        image_data: Uploaded image bytes
+        purpose: 'vision' or 'ocr'
+    
+    Returns:
+        Blob dict ({'mime_type', 'data'}) accepted by generate_content
+    """
+    if purpose not in MAX_SIDE:
+        raise ValueError(f"Unknown image purpose: {purpose}")
+    
+    key = f"{purpose}:{hashlib.sha256(image_data).hexdigest()}"
+    with _lock:
+        prepared = _cache.get(key)
+        if prepared is not None:
+            _cache.move_to_end(key)
+            _stats['hits'] += 1
+            return {'mime_type': prepared['mime_type'], 'data': prepared['data']}
+    
+    # Concurrent requests for the same upload share one decode
+    pending = _inflight.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_prepare_and_store(key, image_data, purpose))
+        _inflight[key] = pending
+        pending.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        _stats['hits'] += 1
+    prepared = await asyncio.shield(pending)
+    return {'mime_type': prepared['mime_type'], 'data': prepared['data']}
+
+async def _prepare_and_store(key: str, image_data: bytes, purpose: str) -> Dict[str, Any]:
+    # Decoding and encoding are CPU-bound; keep them off the event loop
+    prepared = await run_blocking(_prepare, image_data, purpose)
+    _stats['misses'] += 1
+    
+    _store(key, prepared, purpose)
+    _stats['bytes_in'] += len(image_data)
+    _stats['bytes_out'] += len(prepared['data'])
+    return prepared
+
+def iter_frames(source: Union[bytes, str], purpose: str = 'ocr') -> Iterator[Image.Image]:
+    """
+    Decode the pages of a multi-page image one at a time
+    
+    Only the current frame is held by the iterator, so memory does not grow
+    with the page count. Single-frame images yield one page.
+    
+    Args:
+        source: Image bytes or a file path (a path avoids holding the
+            whole upload in memory)
+        purpose: 'vision' or 'ocr'
+    
+    Yields:
+        Independent decoded frames, in page order; pass each to prepare_frame
+    """
+    if purpose not in MAX_SIDE:
+        raise ValueError(f"Unknown image purpose: {purpose}")
+    
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as document:
+        if getattr(document, 'n_frames', 1) == 1 and isinstance(source, bytes):
+            # Single image: the draft-mode decode path applies
+            yield _decode(source, purpose)
+            return
+        
+        for frame in ImageSequence.Iterator(document):
+            # Copy so the frame survives the iterator seeking to the next page
+            yield frame.copy()
+
+def prepare_frame(frame: Image.Image, purpose: str = 'ocr') -> Dict[str, Any]:
+    """
+    Downscale and recompress one decoded frame (blocking; not cached)
+    
+    Frames are independent, so several can be prepared in parallel threads.
+    
+    Args:
+        frame: Frame from iter_frames
+        purpose: 'vision' or 'ocr'
+    
+    Returns:
+        Blob dict ({'mime_type', 'data'}) accepted by generate_content
+    """
+    prepared = _encode(_normalize(frame, purpose), purpose)
+    return {'mime_type': prepared['mime_type'], 'data': prepared['data']}
+
+def clear() -> None:
+    """Drop all prepared images"""
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+def stats() -> Dict[str, Any]:
+    """
+    Preprocessing cache and size-reduction counters
+    
+    Returns:
+        Dict of counters
+    """
+    with _lock:
+        return {**_stats, 'entries': len(_cache), 'cache_bytes': _cache_bytes}
@@ -2,11 +2,21 @@
 OCR Processor - Extract text from images using Gemini Vision
 """
 
-import google.generativeai as genai
-from typing import Dict, Any
-from PIL import Image
-import io
+import asyncio
+import os
+from typing import Dict, Any, AsyncIterator, Union
 
+from core.executor import generate_content, run_blocking
+from core.metrics import instrument
+from core.model_registry import get_model
+from .image_preprocessor import iter_frames, prepare_frame, prepare_image
+
+# Pages decoded or awaiting the model at once for one document
+PAGE_CONCURRENCY = int(os.getenv('OCR_PAGE_CONCURRENCY', '8'))
+
+EXTRACT_PROMPT = "Extract all text from this image. Return only the extracted text without any additional commentary."
+
+@instrument('ocr.extract_text')
 async def extract_text(image_data: bytes) -> str:
     """
     Extract text from image using Gemini Vision API
@@ -18,20 +28,19 @@ async def extract_text(image_data: bytes) -> str:
         Extracted text
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('ocr')
         
-        # Convert bytes to PIL Image
-        image = Image.open(io.BytesIO(image_data))
+        # Downscaled, recompressed copy of the upload
+        image = await prepare_image(image_data, 'ocr')
         
         # Use Gemini Vision to extract text
-        prompt = "Extract all text from this image. Return only the extracted text without any additional commentary."
-        
-        response = model.generate_content([prompt, image])
+        response = await generate_content(model, [EXTRACT_PROMPT, image])
         
         return response.text
     except Exception as e:
         raise Exception(f"OCR Processing Error: {str(e)}")
 
+@instrument('ocr.analyze_document')
 async def analyze_document(image_data: bytes) -> Dict[str, Any]:
     """
     Analyze document structure and content
@@ -43,9 +52,9 @@ async def analyze_document(image_data: bytes) -> Dict[str, Any]:
         Dict with document analysis
     """
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = get_model('ocr')
         
-        image = Image.open(io.BytesIO(image_data))
+        image = await prepare_image(image_data, 'ocr')
         
         prompt = """Analyze this document image and provide:
 1. Document type (e.g., letter, form, invoice, receipt)
@@ -55,7 +64,7 @@ async def analyze_document(image_data: bytes) -> Dict[str, Any]:
 
 Respond in JSON format."""
         
-        response = model.generate_content([prompt, image])
+        response = await generate_content(model, [prompt, image])
         
         return {
             'success': True,
@@ -63,3 +72,112 @@ Respond in JSON format."""
         }
     except Exception as e:
         raise Exception(f"Document Analysis Error: {str(e)}")
+
+@instrument('ocr.stream_document')
+async def stream_document(
+    source: Union[bytes, str],
+    max_concurrency: int = PAGE_CONCURRENCY
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Extract text from every page of a multi-page image, yielding pages as they finish
+    
+    Pages are decoded one at a time and at most `max_concurrency` are in
+    flight (being prepared or awaiting the model), so memory stays flat
+    however many pages the document has. A failed page is reported, not
+    raised.
+    
+    Args:
+        source: Multi-page TIFF (or any image) as bytes or a file path
+        max_concurrency: Pages in flight at once
+    
+    Yields:
+        Dicts with 'page' (0-based), 'success', 'text', 'error', in
+        completion order
+    """
+    model = get_model('ocr')
+    frames = iter_frames(source, 'ocr')
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+    tasks = set()
+    
+    async def extract_page(number: int, frame):
+        try:
+            image = await run_blocking(prepare_frame, frame, 'ocr')
+            del frame
+            response = await generate_content(model, [EXTRACT_PROMPT, image])
+            await results.put({'page': number, 'success': True, 'text': response.text, 'error': None})
+        except Exception as e:
+            await results.put({'page': number, 'success': False, 'text': '', 'error': str(e)})
+        finally:
+            semaphore.release()
+    
+    async def produce():
+        number = 0
+        try:
+            while True:
+                await semaphore.acquire()
+                # Frames must be read in order; resizing and encoding run in parallel
+                frame = await run_blocking(next, frames, None)
+                if frame is None:
+                    break
+                task = asyncio.ensure_future(extract_page(number, frame))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                number += 1
+            await results.put(number)
+        except Exception as e:
+            await results.put(e)
+    
+    producer = asyncio.ensure_future(produce())
+    try:
+        total = None
+        yielded = 0
+        while total is None or yielded < total:
+            result = await results.get()
+            if isinstance(result, Exception):
+                raise Exception(f"OCR Processing Error: {str(result)}")
+            if isinstance(result, int):
+                total = result
+                continue
+            yielded += 1
+            yield result
+    finally:
+        # Consumer stopped early or a page failed to decode
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
+        try:
+            frames.close()
+        except ValueError:
+            # Still advancing in a worker thread; it is released once that returns
+            pass
+
+@instrument('ocr.extract_document')
+async def extract_document(
+    source: Union[bytes, str],
+    max_concurrency: int = PAGE_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Extract text from every page of a multi-page image
+    
+    Args:
+        source: Multi-page TIFF (or any image) as bytes or a file path
+        max_concurrency: Pages in flight at once
+    
+    Returns:
+        Dict with 'text' (pages joined in order), per-page 'pages' and 'metadata'
+    """
+    pages = {}
+    async for result in stream_document(source, max_concurrency):
+        pages[result['page']] = result
+    
+    ordered = [pages[number] for number in sorted(pages)]
+    failed = sum(1 for page in ordered if not page['success'])
+    return {
+        'text': '\n\n'.join(page['text'] for page in ordered if page['success']),
+        'pages': ordered,
+        'metadata': {
+            'page_count': len(ordered),
+            'failed_pages': failed
+        }
+    }
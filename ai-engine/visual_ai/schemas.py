@@ -0,0 +1,19 @@
+"""
+Schemas - Pydantic models for structured vision replies
+"""
+
+from typing import List
+
+from core.structured_output import Schema
+
+class SceneAnalysis(Schema):
+    scene_type: str = ''
+    main_subjects: List[str] = []
+    composition_quality: str = ''
+    lighting: str = ''
+    mood: str = ''
+
+class ImageAnalysis(Schema):
+    description: str = ''
+    objects: List[str] = []
+    scene: SceneAnalysis = SceneAnalysis()
@@ -2,54 +2,518 @@
 Voice Processor - Audio transcription using Gemini
 """
 
-import google.generativeai as genai
-from typing import Dict, Any
-import base64
+import asyncio
+import io
+import math
+import os
+import re
+import wave
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple, Union
 
-async def transcribe(audio_data: bytes) -> Dict[str, Any]:
+import numpy as np
+
+from core.executor import generate_content, run_blocking
+from core.metrics import instrument
+from core.model_registry import get_model
+
+# Target length of one transcription request
+CHUNK_SECONDS = float(os.getenv('VOICE_CHUNK_SECONDS', '30'))
+# Audio repeated at the start of the next chunk so words at a cut are not lost
+CHUNK_OVERLAP_SECONDS = float(os.getenv('VOICE_CHUNK_OVERLAP_SECONDS', '1'))
+# How far before the target length to look for a pause to cut at
+SILENCE_SEARCH_SECONDS = float(os.getenv('VOICE_SILENCE_SEARCH_SECONDS', '5'))
+# Chunks transcribed at once for one recording
+MAX_CONCURRENCY = int(os.getenv('VOICE_MAX_CONCURRENCY', '8'))
+# Energy detector resolution
+FRAME_MS = 20
+# Longest run of words repeated across a chunk seam that stitching removes
+MAX_OVERLAP_WORDS = 20
+# Audio converted to floating point at once while scanning a recording
+BLOCK_SECONDS = 60
+
+# Quality thresholds for analyze_audio
+CLIP_LEVEL = 0.999          # |sample| at or above this fraction of full scale
+MAX_CLIPPING_RATIO = 0.001  # 'clipping' above 0.1% of samples
+MIN_SNR_DB = 10.0           # 'noisy' below
+MIN_RMS_DBFS = -45.0        # 'too_quiet' below
+MIN_SAMPLE_RATE = 8000      # 'low_sample_rate' below
+SILENCE_DBFS = -50.0        # frames quieter than this are never speech
+MIN_PAUSE_SECONDS = 0.3     # shorter pauses do not split a speech segment
+MIN_SPEECH_SECONDS = 0.25   # shorter bursts are not speech
+# Issues that make transcription pointless; transcribe() rejects these
+REJECT_ISSUES = ('no_speech', 'low_sample_rate')
+
+TRANSCRIBE_PROMPT = "Transcribe the speech in this audio. Return only the transcript without any additional commentary."
+
+# PCM sample width in bytes -> NumPy sample type (WAV is little-endian)
+_DTYPES = {1: np.dtype('u1'), 2: np.dtype('<i2'), 4: np.dtype('<i4')}
+
+# Async callable turning one WAV chunk into text
+Transcriber = Callable[[bytes], Awaitable[str]]
+
+def read_wav(audio: Union[bytes, str]) -> Dict[str, Any]:
     """
-    Transcribe audio to text using Gemini
+    Parse a WAV header
     
     Args:
-        audio_data: Audio file bytes
+        audio: WAV file bytes or path
     
     Returns:
-        Dict with transcription and metadata
+        Dict with sample_rate, channels, sample_width (bytes), frames,
+        duration (seconds), data_offset (start of the PCM data) and size
+    
+    Raises:
+        ValueError: If the data is not PCM WAV
     """
+    source = io.BytesIO(audio) if isinstance(audio, bytes) else open(audio, 'rb')
     try:
-        # Note: This is a placeholder implementation
-        # Gemini can process audio, but you'd need to upload the file properly
-        # For now, returning a mock response
-        
-        return {
-            'success': True,
-            'transcription': 'Audio transcription placeholder - integrate with Gemini Audio API',
-            'metadata': {
-                'audio_length': len(audio_data),
-                'format': 'audio/wav'
+        with source, wave.open(source, 'rb') as wav:
+            # wave leaves the file positioned at the start of the data chunk
+            data_offset = source.tell()
+            info = {
+                'sample_rate': wav.getframerate(),
+                'channels': wav.getnchannels(),
+                'sample_width': wav.getsampwidth(),
+                'frames': wav.getnframes(),
             }
-        }
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"Unsupported audio (expected PCM WAV): {str(e) or 'truncated header'}")
+    
+    size = len(audio) if isinstance(audio, bytes) else os.path.getsize(audio)
+    # Some writers leave the data size unset (streamed recordings)
+    available = (size - data_offset) // (info['channels'] * info['sample_width'])
+    info['frames'] = min(info['frames'], available)
+    info['duration'] = info['frames'] / info['sample_rate'] if info['sample_rate'] else 0.0
+    info['data_offset'] = data_offset
+    info['size'] = size
+    return info
+
+def _samples(audio: Union[bytes, str], info: Dict[str, Any]) -> np.ndarray:
+    """(frames, channels) view of the PCM data: zero-copy for bytes, memory-mapped for a path"""
+    dtype = _DTYPES.get(info['sample_width'])
+    if dtype is None:
+        raise ValueError(f"Unsupported sample width: {info['sample_width'] * 8}-bit")
+    count = info['frames'] * info['channels']
+    if count == 0:
+        return np.zeros((0, info['channels']), dtype=dtype)
+    if isinstance(audio, bytes):
+        samples = np.frombuffer(audio, dtype=dtype, count=count, offset=info['data_offset'])
+    else:
+        samples = np.memmap(audio, dtype=dtype, mode='r', offset=info['data_offset'], shape=(count,))
+    return samples.reshape(-1, info['channels'])
+
+def _scan(samples: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> Dict[str, Any]:
+    """
+    One pass over the PCM data, BLOCK_SECONDS at a time
+    
+    Only one block is ever converted to floating point, so memory stays
+    flat for recordings of any length.
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    block = frame * max(1, BLOCK_SECONDS * 1000 // frame_ms)
+    if samples.dtype == np.uint8:
+        center, scale = 128.0, 127.0
+    else:
+        center, scale = 0.0, float(np.iinfo(samples.dtype).max)
+    
+    energy = np.empty(len(samples) // frame, dtype=np.float32)
+    peak = 0.0
+    clipped = 0
+    sum_squares = 0.0
+    for start in range(0, len(samples), block):
+        x = samples[start:start + block].astype(np.float32)
+        if center:
+            x -= center
+        x /= scale
+        magnitude = np.abs(x)
+        peak = max(peak, float(magnitude.max()))
+        clipped += int(np.count_nonzero(magnitude >= CLIP_LEVEL))
+        squares = np.square(x, out=x)
+        sum_squares += float(squares.sum(dtype=np.float64))
+        
+        frames = len(squares) // frame
+        first = start // frame
+        energy[first:first + frames] = np.sqrt(squares[:frames * frame].reshape(frames, -1).mean(axis=1))
+    
+    return {
+        'energy': energy,
+        'peak': peak,
+        'clipped': clipped,
+        'sum_squares': sum_squares,
+        'count': samples.size
+    }
+
+def frame_energy(samples: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """
+    RMS level of each frame, all channels mixed
+    
+    Args:
+        samples: (frames, channels) PCM samples
+        sample_rate: Samples per second
+        frame_ms: Frame length in milliseconds
+    
+    Returns:
+        Float array of RMS levels in full-scale units (0..1), one per frame
+    """
+    return _scan(samples, sample_rate, frame_ms)['energy']
+
+def _dbfs(level: float) -> float:
+    return round(20 * math.log10(max(level, 1e-5)), 1)
+
+def speech_segments(energy: np.ndarray, threshold: float, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """
+    Runs of frames above threshold, with short pauses bridged and short bursts dropped
+    
+    Args:
+        energy: Per-frame RMS levels
+        threshold: Level separating speech from silence
+        frame_ms: Frame length in milliseconds
+    
+    Returns:
+        (n, 2) array of [start, end) frame indices
+    """
+    active = np.concatenate(([False], energy > threshold, [False]))
+    edges = np.flatnonzero(np.diff(active.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    if len(starts) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    
+    # Keep a boundary only where the pause is long enough
+    min_pause = MIN_PAUSE_SECONDS * 1000 / frame_ms
+    split = (starts[1:] - ends[:-1]) >= min_pause
+    starts = np.concatenate((starts[:1], starts[1:][split]))
+    ends = np.concatenate((ends[:-1][split], ends[-1:]))
+    
+    keep = (ends - starts) >= MIN_SPEECH_SECONDS * 1000 / frame_ms
+    return np.stack((starts[keep], ends[keep]), axis=1)
+
+def _noise_floor(energy: np.ndarray, frames: int) -> float:
+    """Level of the quietest run of frames (the whole recording when shorter)"""
+    if len(energy) <= frames:
+        return float(np.sqrt(np.mean(energy ** 2)))
+    power = np.concatenate(([0.0], np.cumsum(energy.astype(np.float64) ** 2)))
+    return float(np.sqrt((power[frames:] - power[:-frames]).min() / frames))
+
+def _metrics(info: Dict[str, Any], scan: Dict[str, Any]) -> Dict[str, Any]:
+    energy = scan['energy']
+    pause = max(1, round(MIN_PAUSE_SECONDS * 1000 / FRAME_MS))
+    if len(energy) == 0:
+        noise = level = 0.0
+    else:
+        noise, level = _noise_floor(energy, pause), float(np.percentile(energy, 95))
+    # Speech must clear an absolute floor and the recording's own noise floor
+    # (+6 dB); without pauses the floor is the speech itself, so cap it at -6 dB
+    # below the loud frames
+    threshold = max(10 ** (SILENCE_DBFS / 20), min(noise * 2, level / 2))
+    segments = speech_segments(energy, threshold)
+    frame_seconds = FRAME_MS / 1000
+    
+    # SNR against the frames that are not speech; a recording without a
+    # pause's worth of them has no noise to measure
+    quiet = energy[energy <= threshold]
+    snr_db = round(_dbfs(level) - _dbfs(float(np.sqrt(np.mean(quiet ** 2)))), 1) if len(quiet) >= pause else None
+    
+    rms = float(np.sqrt(scan['sum_squares'] / scan['count'])) if scan['count'] else 0.0
+    clipping_ratio = scan['clipped'] / scan['count'] if scan['count'] else 0.0
+    speech_seconds = float((segments[:, 1] - segments[:, 0]).sum()) * frame_seconds
+    
+    issues = []
+    if len(segments) == 0:
+        issues.append('no_speech')
+    if info['sample_rate'] < MIN_SAMPLE_RATE:
+        issues.append('low_sample_rate')
+    if clipping_ratio > MAX_CLIPPING_RATIO:
+        issues.append('clipping')
+    if _dbfs(rms) < MIN_RMS_DBFS:
+        issues.append('too_quiet')
+    if segments.size and snr_db is not None and snr_db < MIN_SNR_DB:
+        issues.append('noisy')
+    
+    if any(issue in REJECT_ISSUES for issue in issues):
+        quality = 'unusable'
+    else:
+        quality = 'fair' if issues else 'good'
+    
+    return {
+        'duration': round(info['duration'], 3),
+        'sample_rate': info['sample_rate'],
+        'channels': info['channels'],
+        'bit_depth': info['sample_width'] * 8,
+        'rms_dbfs': _dbfs(rms),
+        'peak_dbfs': _dbfs(scan['peak']),
+        'clipping_ratio': round(clipping_ratio, 6),
+        'snr_db': snr_db,
+        'silence_ratio': round(1 - speech_seconds / info['duration'], 4) if info['duration'] else 1.0,
+        'speech_seconds': round(speech_seconds, 2),
+        'speech_segments': [
+            [round(start * frame_seconds, 2), round(end * frame_seconds, 2)]
+            for start, end in segments.tolist()
+        ],
+        'quality': quality,
+        'issues': issues,
+        'format': 'audio/wav'
+    }
+
+def _inspect(audio: Union[bytes, str]) -> Tuple[Dict[str, Any], np.ndarray, Dict[str, Any]]:
+    info = read_wav(audio)
+    samples = _samples(audio, info)
+    return info, samples, _scan(samples, info['sample_rate'])
+
+def plan_chunks(
+    energy: np.ndarray,
+    frame: int,
+    total: int,
+    sample_rate: int,
+    chunk_seconds: float = CHUNK_SECONDS
+) -> List[Tuple[int, int]]:
+    """
+    Split a recording into overlapping chunks that end at pauses
+    
+    Each chunk ends at the quietest frame within SILENCE_SEARCH_SECONDS
+    before the target length; the next chunk starts CHUNK_OVERLAP_SECONDS
+    earlier. The search is capped at half a chunk and the overlap at a
+    quarter, so every chunk moves at least a quarter of chunk_seconds on.
+    
+    Args:
+        energy: Per-frame RMS levels from frame_energy
+        frame: Samples per energy frame
+        total: Total samples
+        sample_rate: Samples per second
+        chunk_seconds: Target chunk length
+    
+    Returns:
+        List of (start, end) sample indices
+    
+    Raises:
+        ValueError: If chunk_seconds is shorter than one sample
+    """
+    length = int(chunk_seconds * sample_rate)
+    if length < 1:
+        raise ValueError(f"chunk_seconds must be positive, got {chunk_seconds}")
+    overlap = min(int(CHUNK_OVERLAP_SECONDS * sample_rate), length // 4)
+    search = min(int(SILENCE_SEARCH_SECONDS * sample_rate), length // 2)
+    
+    spans = []
+    start = 0
+    while total - start > length:
+        target = start + length
+        lo, hi = (target - search) // frame, target // frame
+        if hi > lo:
+            # A frame's centre can fall just before the search window
+            cut = max((lo + int(np.argmin(energy[lo:hi]))) * frame + frame // 2, target - search)
+        else:
+            cut = target
+        spans.append((start, cut))
+        start = cut - overlap
+    spans.append((start, total))
+    return spans
+
+def _words(text: str) -> List[str]:
+    return [re.sub(r'\W+', '', word).lower() for word in text.split()]
+
+def _append(words: List[str], keys: List[str], text: str, max_overlap_words: int) -> None:
+    """Extend words with text, skipping the longest run that repeats the tail"""
+    new_words = text.split()
+    new_keys = _words(text)
+    repeated = 0
+    for size in range(min(max_overlap_words, len(keys), len(new_keys)), 0, -1):
+        if keys[-size:] == new_keys[:size]:
+            repeated = size
+            break
+    words.extend(new_words[repeated:])
+    keys.extend(new_keys[repeated:])
+
+def stitch(transcripts: List[str], max_overlap_words: int = MAX_OVERLAP_WORDS) -> str:
+    """
+    Join chunk transcripts, dropping words repeated across an overlap
+    
+    Args:
+        transcripts: Chunk transcripts in order
+        max_overlap_words: Longest repeated run looked for at each seam
+    
+    Returns:
+        Combined transcript
+    """
+    words: List[str] = []
+    keys: List[str] = []
+    for text in transcripts:
+        _append(words, keys, text, max_overlap_words)
+    return ' '.join(words)
+
+def _chunk_wav(samples: np.ndarray, info: Dict[str, Any], start: int, end: int) -> bytes:
+    """Standalone WAV file holding samples [start, end)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as out:
+        out.setnchannels(info['channels'])
+        out.setsampwidth(info['sample_width'])
+        out.setframerate(info['sample_rate'])
+        out.writeframes(samples[start:end].tobytes())
+    return buffer.getvalue()
+
+async def model_transcriber(chunk: bytes) -> str:
+    """
+    Transcribe one WAV chunk with the voice model
+    
+    Args:
+        chunk: WAV file bytes
+    
+    Returns:
+        Transcript text
+    """
+    model = get_model('voice')
+    response = await generate_content(model, [TRANSCRIBE_PROMPT, {'mime_type': 'audio/wav', 'data': chunk}])
+    return response.text.strip()
+
+_transcriber: Transcriber = model_transcriber
+
+def set_backend(transcriber: Optional[Transcriber]) -> None:
+    """
+    Route chunk transcription through another backend
+    
+    Args:
+        transcriber: Async callable taking WAV bytes and returning text
+            (e.g. a local stub), or None to restore the model
+    """
+    global _transcriber
+    _transcriber = transcriber or model_transcriber
+
+@instrument('voice.stream_transcribe')
+async def stream_transcribe(
+    audio: Union[bytes, str],
+    chunk_seconds: float = CHUNK_SECONDS,
+    max_concurrency: int = MAX_CONCURRENCY,
+    check_quality: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Transcribe audio chunk by chunk, yielding the transcript as it grows
+    
+    Chunks are transcribed concurrently; results are yielded in order as
+    soon as every earlier chunk is done.
+    
+    Args:
+        audio: WAV file bytes or path (a path is memory-mapped)
+        chunk_seconds: Target chunk length
+        max_concurrency: Chunks transcribed at once
+        check_quality: Reject recordings with no speech (or too low a
+            sample rate) before any model call
+    
+    Yields:
+        Dicts with 'chunk', 'chunks', 'start' and 'end' (seconds), the
+        chunk 'text' and the stitched 'transcript' so far
+    """
+    try:
+        info, samples, scan = await run_blocking(_inspect, audio)
     except Exception as e:
         raise Exception(f"Voice Processing Error: {str(e)}")
+    
+    if check_quality:
+        rejected = [issue for issue in _metrics(info, scan)['issues'] if issue in REJECT_ISSUES]
+        if rejected:
+            raise Exception(f"Voice Processing Error: Rejected audio: {', '.join(rejected)}")
+    
+    rate = info['sample_rate']
+    frame = max(1, rate * FRAME_MS // 1000)
+    try:
+        spans = plan_chunks(scan['energy'], frame, info['frames'], rate, chunk_seconds)
+    except ValueError as e:
+        raise Exception(f"Voice Processing Error: {str(e)}")
+    transcriber = _transcriber
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def transcribe_chunk(start: int, end: int) -> str:
+        async with semaphore:
+            return await transcriber(_chunk_wav(samples, info, start, end))
+    
+    tasks = [asyncio.ensure_future(transcribe_chunk(start, end)) for start, end in spans]
+    try:
+        words: List[str] = []
+        keys: List[str] = []
+        for index, task in enumerate(tasks):
+            try:
+                text = await task
+            except Exception as e:
+                raise Exception(f"Voice Processing Error: chunk {index}: {str(e)}")
+            _append(words, keys, text, MAX_OVERLAP_WORDS)
+            start, end = spans[index]
+            yield {
+                'chunk': index,
+                'chunks': len(spans),
+                'start': round(start / rate, 3),
+                'end': round(end / rate, 3),
+                'text': text,
+                'transcript': ' '.join(words)
+            }
+    finally:
+        # Client went away or a chunk failed
+        for task in tasks:
+            task.cancel()
+
+@instrument('voice.transcribe')
+async def transcribe(
+    audio: Union[bytes, str],
+    chunk_seconds: float = CHUNK_SECONDS,
+    max_concurrency: int = MAX_CONCURRENCY,
+    check_quality: bool = True
+) -> Dict[str, Any]:
+    """
+    Transcribe audio to text using Gemini
+    
+    Long recordings are split at pauses into overlapping chunks that are
+    transcribed concurrently and stitched back together.
+    
+    Args:
+        audio: WAV file bytes or path (a path is memory-mapped)
+        chunk_seconds: Target chunk length
+        max_concurrency: Chunks transcribed at once
+        check_quality: Reject recordings with no speech (or too low a
+            sample rate) before any model call
+    
+    Returns:
+        Dict with transcription and metadata
+    """
+    transcript = ''
+    chunks = 0
+    async for partial in stream_transcribe(audio, chunk_seconds, max_concurrency, check_quality):
+        transcript = partial['transcript']
+        chunks = partial['chunks']
+    
+    info = read_wav(audio)
+    return {
+        'success': True,
+        'transcription': transcript,
+        'metadata': {
+            'audio_length': info['size'],
+            'duration': round(info['duration'], 3),
+            'sample_rate': info['sample_rate'],
+            'channels': info['channels'],
+            'chunks': chunks,
+            'format': 'audio/wav'
+        }
+    }
 
-async def analyze_audio(audio_data: bytes) -> Dict[str, Any]:
+@instrument('voice.analyze_audio')
+async def analyze_audio(audio: Union[bytes, str]) -> Dict[str, Any]:
     """
     Analyze audio characteristics
     
+    Computes duration, RMS and peak level, clipping, an SNR estimate
+    (None without a pause to measure the noise in), silence ratio and
+    speech segments locally with NumPy, one block at a time, so it is
+    cheap enough to screen uploads before transcription.
+    
     Args:
-        audio_data: Audio file bytes
+        audio: WAV file bytes or path (a path is memory-mapped)
     
     Returns:
-        Dict with audio analysis
+        Dict with audio analysis; 'quality' is 'good', 'fair' or
+        'unusable' and 'issues' lists what was found
     """
     try:
+        info, _, scan = await run_blocking(_inspect, audio)
+        
         return {
             'success': True,
-            'analysis': {
-                'duration': 'unknown',
-                'quality': 'unknown',
-                'format': 'audio/wav'
-            }
+            'analysis': _metrics(info, scan)
         }
     except Exception as e:
         raise Exception(f"Audio Analysis Error: {str(e)}")